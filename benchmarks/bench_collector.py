@@ -0,0 +1,76 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'scripts'))
+from newsapi_standin import StandInConfig, StandInServer
+
+# --- Benchmark do Coletor contra o Servidor Local ---
+# Mede vazão e comportamento de novas tentativas do coletor sem acesso à rede:
+# o servidor de scripts/newsapi_standin.py é iniciado nesta mesma execução e o
+# coletor é importado já apontando para ele.
+
+
+def run(days, workers, requests_per_second, config, tickers=()):
+    """Coleta `days` dias de notícias (e os preços de `tickers`) do servidor local e retorna as métricas."""
+    server = StandInServer(config).start()
+    os.environ['NEWSAPI_BASE_URL'] = f"{server.url}/v2"
+    os.environ['PRICES_BASE_URL'] = server.url
+    import data_collector_newsapi_fixed as collector
+    from instrumentation import start_run
+
+    report = start_run('bench_collector', {'days': days, 'workers': workers, 'rps': requests_per_second})
+    end = datetime(2025, 7, 31)
+    dates = collector._date_range(end - timedelta(days=days - 1), end)
+    try:
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            results = collector._collect_newsapi_days('benchmark', 'Petrobras', dates, workers, requests_per_second)
+            if tickers:
+                collector._download_prices(list(tickers), end - timedelta(days=days), end)
+        elapsed = time.perf_counter() - start
+    finally:
+        server.stop()
+
+    collected = [articles for articles in results.values() if articles is not None]
+    articles = sum(len(day_articles) for day_articles in collected)
+    return {
+        'days': days,
+        'days_collected': len(collected),
+        'days_failed': days - len(collected),
+        'articles': articles,
+        'requests_per_article': round(server.stats['requests'] / articles, 4) if articles else None,
+        'seconds': round(elapsed, 3),
+        'days_per_sec': round(days / elapsed, 2),
+        'server': server.stats,
+        'http': report.http.summary(),
+    }
+
+
+# --- Execução Principal ---
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Mede o coletor contra o servidor local substituto da NewsAPI.")
+    parser.add_argument('--days', type=int, default=60, help="Dias a coletar (padrão: 60)")
+    parser.add_argument('--workers', type=int, default=8, help="Threads do coletor (padrão: 8)")
+    parser.add_argument('--rps', type=float, default=20, help="Limite de requisições/s do coletor (padrão: 20)")
+    parser.add_argument('--latency', type=float, default=0.05, help="Atraso do servidor em segundos (padrão: 0.05)")
+    parser.add_argument('--jitter', type=float, default=0.02)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--upgrade-rate', type=float, default=0.0)
+    parser.add_argument('--rate-limit', type=int, default=None, help="Requisições/s aceitas pelo servidor antes de 429")
+    parser.add_argument('--quota', type=int, default=None)
+    parser.add_argument('--articles-per-day', type=int, default=20, help="Notícias sintéticas por dia (padrão: 20)")
+    parser.add_argument('--max-results', type=int, default=100,
+                        help="Resultados alcançáveis paginando no servidor (padrão: 100; 0: sem limite)")
+    parser.add_argument('--tickers', nargs='*', default=[], help="Também baixa os preços destes tickers")
+    args = parser.parse_args()
+
+    config = StandInConfig(latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+                           upgrade_rate=args.upgrade_rate, rate_limit=args.rate_limit, quota=args.quota,
+                           articles_per_day=args.articles_per_day, max_results=args.max_results or None)
+    print(json.dumps(run(args.days, args.workers, args.rps, config, args.tickers), indent=2))
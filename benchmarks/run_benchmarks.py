@@ -0,0 +1,253 @@
+import argparse
+import contextlib
+import gc
+import io
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+BENCH_PATH = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCH_PATH, '..', 'scripts'))
+from data_processor_newsapi_fixed import (analyze_sentiment_keywords_newsapi, clean_newsapi_data,
+                                          create_complete_dataset, load_stock_csv, process_stock_data)
+from dedup import deduplicate_articles
+from storage import read_dataset, write_dataset
+from range_index import RangeIndex
+from downsample import downsample_bars, downsample_line
+from correlation import LagCorrelation
+from backtest import backtest_grid
+from price_store import PriceStore
+from sentiment_lexicon import DEFAULT_LEXICON
+from sentiment_model import LinearSentimentModel
+from intraday import align_intraday, bars_from_yfinance, bucket_sentiment
+from synthetic_corpus import TICKER, generate_intraday_bars, write_corpus
+
+# --- Configurações ---
+BASELINE_PATH = os.path.join(BENCH_PATH, 'baseline.json')
+RESULTS_PATH = os.path.join(BENCH_PATH, 'results')
+SCALES = [1_000, 10_000, 100_000]
+START_DATE = '2020-01-01'
+END_DATE = '2024-12-31'
+TOLERANCE = 0.25       # Piora relativa tolerada antes de acusar regressão
+MIN_SECONDS = 0.05     # Etapas mais rápidas que isso não são comparadas por tempo (ruído)
+DASHBOARD_COLUMNS = ['date', 'Close', 'price_change', 'sentiment_score']
+INTRADAY_TICKERS = 20  # Tickers com barras de 5 minutos nos últimos INTRADAY_DAYS dias do corpus
+INTRADAY_DAYS = 90
+
+
+def measure(func, make_args, repeat=3, memory=True):
+    """
+    Mede uma etapa: melhor tempo de `repeat` execuções e pico de memória alocada.
+
+    `make_args` prepara cópias novas das entradas a cada execução (as funções
+    do processador alteram os DataFrames recebidos), fora da medição. O pico
+    de memória vem de uma execução extra sob `tracemalloc`, para não distorcer
+    o tempo. Retorna (segundos, pico em bytes ou None, resultado).
+    """
+    times = []
+    result = None
+    for _ in range(repeat):
+        args = make_args()
+        gc.collect()
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            result = func(*args)
+            times.append(time.perf_counter() - start)
+
+    peak = None
+    if memory:
+        args = make_args()
+        gc.collect()
+        tracemalloc.start()
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                func(*args)
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return min(times), peak, result
+
+
+def dashboard_filter(index, final_df):
+    """Caminho de filtro do dashboard: recorte, métricas, correlações e redução dos gráficos."""
+    dates = index.dates
+    start, end = dates[len(dates) // 4], dates[-1]
+    df_filtered = index.slice(start, end)
+    index.metrics(start, end)
+    index.lag1_correlation(start, end)
+    downsample_line(df_filtered, x='date', y='Close')
+    downsample_bars(df_filtered, x='date', y='sentiment_score')
+    engine = LagCorrelation.from_frame(df_filtered)
+    engine.window_grid()
+    engine.rolling(21)
+    return df_filtered
+
+
+def price_store_slice(store, start, end):
+    """Leitura de preços como no processador: abre o ticker, recorta o período e monta Date/Close."""
+    return store.load(TICKER).slice(start, end).to_frame(['Date', 'Close'])
+
+
+def intraday_alignment(news, bars):
+    """Alinhamento intradiário: intervalos de 5 minutos e merge as-of com as barras de vários tickers."""
+    return align_intraday(bars, bucket_sentiment(news, '5m'))
+
+
+def run_scale(n_articles, corpus_dir, repeat=3, memory=True):
+    """Gera o corpus de `n_articles` notícias e mede cada etapa do pipeline sobre ele."""
+    news_path, prices_path = write_corpus(corpus_dir, n_articles, START_DATE, END_DATE)
+    results = {}
+
+    def record(stage, rows, func, make_args):
+        seconds, peak, result = measure(func, make_args, repeat, memory)
+        results[stage] = {
+            'rows': int(rows),
+            'seconds': round(seconds, 6),
+            'rows_per_sec': round(rows / seconds, 1) if seconds > 0 else None,
+            'peak_mb': round(peak / 2**20, 3) if peak is not None else None,
+            # Memória do DataFrame produzido (deep), para comparar os tipos das colunas
+            'output_mb': round(result.memory_usage(deep=True).sum() / 2**20, 3)
+            if isinstance(result, pd.DataFrame) else None,
+        }
+        # Valores normalizados por milhão de linhas, comparáveis entre escalas
+        if rows:
+            results[stage]['seconds_per_million'] = round(seconds / rows * 1e6, 3)
+            if peak is not None:
+                results[stage]['peak_mb_per_million'] = round(peak / 2**20 / rows * 1e6, 1)
+        print(f"  {stage:<36} {rows:>10} linhas  {seconds:>9.4f} s  "
+              f"{results[stage]['rows_per_sec'] or 0:>12.0f} linhas/s  "
+              f"{results[stage]['peak_mb'] if peak is not None else '-':>9} MB")
+        return result
+
+    news_df = record('read_news_csv', n_articles, pd.read_csv, lambda: (news_path,))
+    cleaned = record('clean_newsapi_data', len(news_df), clean_newsapi_data, lambda: (news_df.copy(),))
+    deduped = record('deduplicate_articles', len(cleaned), deduplicate_articles, lambda: (cleaned.copy(),))
+    sentiment = record('analyze_sentiment_keywords_newsapi', len(deduped), analyze_sentiment_keywords_newsapi,
+                       lambda: (deduped.copy(),))
+    # Modelo linear treinado (fora da medição) com os scores do léxico como rótulos, só para medir a pontuação
+    model = LinearSentimentModel.train(deduped['full_text'], DEFAULT_LEXICON.score_series(deduped['full_text']), epochs=5)
+    record('linear_model_score', len(deduped), model.score_series, lambda: (deduped['full_text'],))
+    stock_df = load_stock_csv(prices_path)
+    record('read_stock_csv', len(stock_df), load_stock_csv, lambda: (prices_path,))
+    store = PriceStore(os.path.join(corpus_dir, 'prices'))
+    store.append(TICKER, stock_df)
+    record('price_store_slice', len(stock_df), price_store_slice, lambda: (store, START_DATE, END_DATE))
+    processed_stock = record('process_stock_data', len(stock_df), process_stock_data, lambda: (stock_df.copy(),))
+    final_df = record('create_complete_dataset', len(processed_stock), create_complete_dataset,
+                      lambda: (processed_stock.copy(), sentiment.copy()))
+
+    record('backtest_grid', len(final_df), backtest_grid, lambda: (final_df,))
+
+    # Intradiário: notícias dos últimos INTRADAY_DAYS dias repartidas entre tickers com barras de 5 minutos
+    intraday_start = pd.Timestamp(END_DATE) - pd.Timedelta(days=INTRADAY_DAYS)
+    tickers = [f'TICK{i}.SA' for i in range(INTRADAY_TICKERS)]
+    recent = deduped[deduped['publishedAt'] >= intraday_start.tz_localize('UTC')]
+    rng = np.random.default_rng(0)
+    intraday_news = pd.DataFrame({'ticker': rng.choice(tickers, len(recent)), 'publishedAt': recent['publishedAt'].array,
+                                  'sentiment_score': rng.uniform(-1, 1, len(recent))})
+    bars = bars_from_yfinance(generate_intraday_bars(intraday_start, END_DATE, tickers))
+    record('align_intraday_5m', len(bars), intraday_alignment, lambda: (intraday_news, bars))
+
+    # Dashboard: leitura do dataset final em Parquet (como em load_data) e caminho de filtro
+    parquet_root = os.path.join(corpus_dir, 'parquet')
+    write_dataset(final_df, 'final', TICKER, mode='replace', root=parquet_root)
+    loaded = record('dashboard_load_data', len(final_df), read_dataset,
+                    lambda: ('final', None, ['ticker'] + DASHBOARD_COLUMNS, None, None, parquet_root))
+    index = record('dashboard_range_index', len(loaded), RangeIndex, lambda: (loaded,))
+    record('dashboard_filter', len(loaded), dashboard_filter, lambda: (index, loaded))
+    return results
+
+
+def compare(results, baseline, tolerance=TOLERANCE):
+    """
+    Compara os resultados com a linha de base.
+
+    Acusa regressão quando a vazão (linhas/s) cai ou o pico de memória sobe
+    mais que `tolerance`. Retorna a lista de mensagens de regressão.
+    """
+    regressions = []
+    for scale, stages in results['results'].items():
+        for stage, current in stages.items():
+            reference = baseline.get('results', {}).get(scale, {}).get(stage)
+            if reference is None:
+                continue
+            if (current['rows_per_sec'] and reference['rows_per_sec']
+                    and max(current['seconds'], reference['seconds']) >= MIN_SECONDS):
+                change = current['rows_per_sec'] / reference['rows_per_sec'] - 1
+                if change < -tolerance:
+                    regressions.append(f"{stage} ({scale} notícias): vazão {change:+.0%} "
+                                       f"({reference['rows_per_sec']:.0f} -> {current['rows_per_sec']:.0f} linhas/s)")
+            if current['peak_mb'] is not None and reference.get('peak_mb'):
+                change = current['peak_mb'] / reference['peak_mb'] - 1
+                if change > tolerance and current['peak_mb'] - reference['peak_mb'] >= 1:
+                    regressions.append(f"{stage} ({scale} notícias): memória {change:+.0%} "
+                                       f"({reference['peak_mb']:.1f} -> {current['peak_mb']:.1f} MB)")
+    return regressions
+
+
+def environment():
+    """Descrição da máquina e das versões, gravada junto dos resultados."""
+    return {
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+    }
+
+
+# --- Execução Principal ---
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Mede vazão e memória das etapas do pipeline com dados sintéticos.")
+    parser.add_argument('--scales', type=int, nargs='+', default=SCALES,
+                        help=f"Quantidades de notícias (padrão: {' '.join(map(str, SCALES))}; até 10000000)")
+    parser.add_argument('--repeat', type=int, default=3, help="Execuções por etapa; vale o melhor tempo (padrão: 3)")
+    parser.add_argument('--no-memory', action='store_true', help="Não mede o pico de memória (execução mais rápida)")
+    parser.add_argument('--corpus-dir', default=None,
+                        help="Pasta para os corpora gerados (padrão: pasta temporária apagada ao final)")
+    parser.add_argument('--baseline', default=BASELINE_PATH, help="Arquivo da linha de base (padrão: benchmarks/baseline.json)")
+    parser.add_argument('--save-baseline', action='store_true', help="Grava os resultados como nova linha de base")
+    parser.add_argument('--tolerance', type=float, default=TOLERANCE,
+                        help=f"Piora relativa tolerada (padrão: {TOLERANCE})")
+    args = parser.parse_args()
+
+    print("--- Iniciando Benchmarks do Pipeline ---")
+    results = {'created': datetime.now().isoformat(timespec='seconds'), 'environment': environment(),
+               'repeat': args.repeat, 'results': {}}
+    with contextlib.ExitStack() as stack:
+        base_dir = args.corpus_dir or stack.enter_context(tempfile.TemporaryDirectory(prefix='bench_corpus_'))
+        for scale in args.scales:
+            print(f"\nEscala: {scale} notícias")
+            results['results'][str(scale)] = run_scale(scale, os.path.join(base_dir, str(scale)),
+                                                       repeat=args.repeat, memory=not args.no_memory)
+
+    os.makedirs(RESULTS_PATH, exist_ok=True)
+    results_file = os.path.join(RESULTS_PATH, f"benchmark_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    with open(results_file, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+    print(f"\nResultados salvos em: {results_file}")
+
+    if args.save_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"Linha de base atualizada: {args.baseline}")
+    elif os.path.exists(args.baseline):
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print(f"\n{len(regressions)} regressões em relação à linha de base:")
+            for message in regressions:
+                print(f"  - {message}")
+            sys.exit(1)
+        print("\nNenhuma regressão em relação à linha de base.")
+    else:
+        print("Nenhuma linha de base encontrada; use --save-baseline para criar uma.")
@@ -0,0 +1,182 @@
+import argparse
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'scripts'))
+from sentiment_lexicon import NEGATIVE_KEYWORDS, POSITIVE_KEYWORDS
+
+# --- Corpus Sintético (NewsAPI / yfinance) ---
+
+SEARCH_TERM = "Petrobras"
+TICKER = "PETR4.SA"
+CHUNK_ROWS = 200_000      # Notícias geradas (e gravadas) por vez
+SENTENCE_POOL = 5_000     # Frases distintas usadas para montar os textos
+DUPLICATE_RATE = 0.05     # Fração de notícias republicadas por outra fonte
+
+SOURCES = ['InfoMoney', 'Valor Econômico', 'Exame', 'Money Times', 'O Globo', 'Folha de S.Paulo',
+           'Estadão', 'CNN Brasil', 'Brazil Journal', 'Seu Dinheiro', 'E-Investidor', 'Bloomberg Línea']
+DOMAINS = ['infomoney.com.br', 'valor.globo.com', 'exame.com', 'moneytimes.com.br', 'oglobo.globo.com',
+           'folha.uol.com.br', 'estadao.com.br', 'cnnbrasil.com.br', 'braziljournal.com', 'seudinheiro.com',
+           'einvestidor.estadao.com.br', 'bloomberglinea.com.br']
+SUBJECTS = ['Petrobras', 'A estatal', 'O Ibovespa', 'A companhia', 'O conselho da Petrobras', 'A ANP',
+            'O governo', 'Analistas', 'Investidores estrangeiros', 'A diretoria']
+VERBS = ['registra', 'anuncia', 'aponta', 'projeta', 'enfrenta', 'divulga', 'avalia', 'confirma',
+         'descarta', 'sinaliza']
+FILLER = ['no trimestre', 'nesta terça-feira', 'segundo fontes do mercado', 'em comunicado ao mercado',
+          'após reunião do conselho', 'na B3', 'em relação ao ano anterior', 'de acordo com relatório',
+          'no acumulado do ano', 'com o barril do Brent acima de US$ 80']
+NEUTRAL_WORDS = ['empresa', 'ações', 'papéis', 'pregão', 'bilhões', 'reais', 'preço', 'dólar', 'setor',
+                 'relatório', 'companhia', 'diretor', 'semana', 'índice', 'analista', 'governo']
+
+
+def _sentence_pool(rng, size=SENTENCE_POOL):
+    """Frases em português com uma mistura de palavras-chave positivas, negativas e neutras."""
+    positive = np.array(POSITIVE_KEYWORDS, dtype=object)
+    negative = np.array(NEGATIVE_KEYWORDS, dtype=object)
+    neutral = np.array(NEUTRAL_WORDS, dtype=object)
+    sentences = []
+    for _ in range(size):
+        tone = rng.random()
+        n_pos = rng.poisson(2.0 if tone > 0.5 else 0.7)
+        n_neg = rng.poisson(2.0 if tone <= 0.5 else 0.7)
+        words = list(rng.choice(positive, n_pos)) + list(rng.choice(negative, n_neg)) + \
+            list(rng.choice(neutral, rng.integers(3, 9)))
+        rng.shuffle(words)
+        sentences.append(f"{rng.choice(SUBJECTS)} {rng.choice(VERBS)} {' '.join(words)} "
+                         f"{rng.choice(FILLER)}, com {rng.integers(1, 999)},{rng.integers(0, 99):02d}%.")
+    return np.array(sentences, dtype=object)
+
+
+def generate_news(n_articles, start, end, seed=42, offset=0, pool=None):
+    """
+    Gera notícias no formato salvo pelo coletor da NewsAPI.
+
+    Colunas publishedAt (ISO 8601 em UTC), title, body, url, source e
+    description, com datas uniformes entre `start` e `end` em horário
+    comercial, corpos truncados com o sufixo "[+N chars]" da NewsAPI e uma
+    fração `DUPLICATE_RATE` de republicações (mesmo texto, outra fonte e URL).
+    `offset` desloca a numeração das URLs para gerar blocos independentes.
+    """
+    rng = np.random.default_rng(seed)
+    pool = _sentence_pool(rng) if pool is None else pool
+    start, end = pd.Timestamp(start), pd.Timestamp(end)
+    n_days = max((end - start).days, 0) + 1
+
+    days = rng.integers(0, n_days, n_articles)
+    seconds = rng.integers(9 * 3600, 22 * 3600, n_articles)
+    published = start.normalize() + pd.to_timedelta(days, unit='D') + pd.to_timedelta(seconds, unit='s')
+
+    picks = rng.integers(0, len(pool), (n_articles, 4))
+    titles = pool[picks[:, 0]]
+    descriptions = pool[picks[:, 1]]
+    bodies = [f"{a} {b} {c}… [+{n} chars]" for a, b, c, n in
+              zip(pool[picks[:, 1]], pool[picks[:, 2]], pool[picks[:, 3]], rng.integers(500, 6000, n_articles))]
+
+    source_idx = rng.integers(0, len(SOURCES), n_articles)
+    ids = np.arange(offset, offset + n_articles)
+    news = pd.DataFrame({
+        'publishedAt': published.strftime('%Y-%m-%dT%H:%M:%SZ'),
+        'title': titles,
+        'body': bodies,
+        'url': [f"https://{DOMAINS[s]}/mercados/noticia-{i}" for s, i in zip(source_idx, ids)],
+        'source': np.array(SOURCES, dtype=object)[source_idx],
+        'description': descriptions,
+    })
+
+    # Republicações: copiam o texto de uma notícia anterior do bloco
+    duplicates = np.flatnonzero(rng.random(n_articles) < DUPLICATE_RATE)
+    duplicates = duplicates[duplicates > 0]
+    originals = rng.integers(0, duplicates, len(duplicates)) if len(duplicates) else duplicates
+    news.loc[duplicates, ['title', 'body', 'description']] = \
+        news.loc[originals, ['title', 'body', 'description']].to_numpy()
+    return news.sort_values('publishedAt', ascending=False, ignore_index=True)
+
+
+def generate_prices(start, end, ticker=TICKER, seed=42):
+    """
+    Gera preços diários (dias úteis) no formato do yfinance: colunas Price/Ticker e índice Date.
+
+    O fechamento segue um passeio aleatório geométrico; abertura, máxima e
+    mínima ficam em torno do fechamento.
+    """
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range(start, end, name='Date')
+    close = 30.0 * np.exp(np.cumsum(rng.normal(0.0003, 0.018, len(dates))))
+    open_ = close * np.exp(rng.normal(0, 0.006, len(dates)))
+    high = np.maximum(open_, close) * (1 + np.abs(rng.normal(0, 0.006, len(dates))))
+    low = np.minimum(open_, close) * (1 - np.abs(rng.normal(0, 0.006, len(dates))))
+    volume = rng.integers(10_000_000, 80_000_000, len(dates))
+    prices = pd.DataFrame({'Close': close, 'High': high, 'Low': low, 'Open': open_, 'Volume': volume}, index=dates)
+    prices.columns = pd.MultiIndex.from_product([prices.columns, [ticker]], names=['Price', 'Ticker'])
+    return prices
+
+
+def generate_intraday_bars(start, end, tickers, freq='5min', seed=42):
+    """
+    Gera barras intradiárias no formato do yfinance (Price/Ticker), das 10h às 18h (horário da B3).
+
+    O índice é o horário de abertura de cada barra, com fuso America/Sao_Paulo,
+    como o yfinance devolve barras intradiárias da B3.
+    """
+    rng = np.random.default_rng(seed)
+    days = pd.bdate_range(start, end)
+    offsets = pd.timedelta_range('10h', '18h', freq=freq, closed='left')
+    index = (days.repeat(len(offsets)) + np.tile(offsets, len(days))).tz_localize('America/Sao_Paulo')
+    index.name = 'Datetime'
+    columns = {}
+    for ticker in tickers:
+        close = 30.0 * np.exp(np.cumsum(rng.normal(0.0, 0.002, len(index))))
+        open_ = close * np.exp(rng.normal(0, 0.0008, len(index)))
+        columns.update({
+            ('Close', ticker): close,
+            ('High', ticker): np.maximum(open_, close) * (1 + np.abs(rng.normal(0, 0.0008, len(index)))),
+            ('Low', ticker): np.minimum(open_, close) * (1 - np.abs(rng.normal(0, 0.0008, len(index)))),
+            ('Open', ticker): open_,
+            ('Volume', ticker): rng.integers(10_000, 800_000, len(index)),
+        })
+    bars = pd.DataFrame(columns, index=index)
+    bars.columns = pd.MultiIndex.from_tuples(bars.columns, names=['Price', 'Ticker'])
+    return bars
+
+
+def write_corpus(out_dir, n_articles, start, end, seed=42, search_term=SEARCH_TERM, ticker=TICKER,
+                 chunk_rows=CHUNK_ROWS, date_str='20250101'):
+    """
+    Grava um corpus sintético com os mesmos nomes de arquivo do coletor.
+
+    As notícias são geradas e anexadas ao CSV em blocos de `chunk_rows`, de
+    modo que corpora de milhões de notícias não precisam caber em memória.
+    Retorna (caminho das notícias, caminho dos preços).
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    news_path = os.path.join(out_dir, f'{search_term}_news_newsapi_fixed_{date_str}.csv')
+    prices_path = os.path.join(out_dir, f'{ticker}_prices_{date_str}.csv')
+
+    pool = _sentence_pool(np.random.default_rng(seed))
+    written = 0
+    for i, chunk_start in enumerate(range(0, n_articles, chunk_rows)):
+        rows = min(chunk_rows, n_articles - chunk_start)
+        chunk = generate_news(rows, start, end, seed=seed + i + 1, offset=chunk_start, pool=pool)
+        chunk.to_csv(news_path, mode='w' if i == 0 else 'a', header=(i == 0), index=False)
+        written += rows
+    if written == 0:
+        generate_news(0, start, end, pool=pool).to_csv(news_path, index=False)
+
+    generate_prices(start, end, ticker, seed).to_csv(prices_path)
+    return news_path, prices_path
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Gera um corpus sintético de notícias (NewsAPI) e preços (yfinance).")
+    parser.add_argument('--articles', type=int, default=100_000, help="Número de notícias (padrão: 100000)")
+    parser.add_argument('--start', default='2020-01-01', help="Data inicial (padrão: 2020-01-01)")
+    parser.add_argument('--end', default='2024-12-31', help="Data final (padrão: 2024-12-31)")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--out', required=True, help="Pasta de saída (ex.: /tmp/corpus)")
+    args = parser.parse_args()
+
+    news_path, prices_path = write_corpus(args.out, args.articles, args.start, args.end, args.seed)
+    print(f"Corpus sintético salvo em: {news_path} e {prices_path}")
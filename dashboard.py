@@ -2,7 +2,22 @@ import streamlit as st
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
+import numpy as np
 import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'scripts'))
+from storage import PARQUET_ROOT, list_tickers, read_dataset
+from range_index import RangeIndex
+from downsample import MAX_SCATTER_POINTS, downsample_bars, downsample_line
+from correlation import WINDOWS, LagCorrelation
+from live_store import read_live_sentiment
+from price_store import PriceStore
+from catalog import Catalog
+
+LIVE_REFRESH_SECONDS = 5  # Intervalo de releitura do sentimento ao vivo (scripts/live_sentiment.py)
+MAX_CANDLES = 500  # Candles exibidos no máximo; períodos maiores mostram só o fechamento
+SIGNATURE_TTL_SECONDS = 10  # Intervalo entre verificações de dados novos em data/parquet/final
 
 # --- Configuração da Página ---
 st.set_page_config(
@@ -12,52 +27,135 @@ st.set_page_config(
 )
 
 # --- Carregamento dos Dados ---
-@st.cache_data
-def load_data():
+@st.cache_data(ttl=SIGNATURE_TTL_SECONDS)
+def data_signature():
+    """
+    Assinatura dos arquivos do dataset final: (caminho, data de modificação, tamanho).
+
+    Usada como chave dos caches abaixo, de modo que dados novos aparecem no
+    dashboard sem limpar o cache manualmente. Sem Parquet, a assinatura vem
+    do catálogo: (caminho, hash do conteúdo) dos CSVs usados por `load_data`.
+    É recalculada no máximo a cada SIGNATURE_TTL_SECONDS, não a cada interação.
+    """
+    final_root = os.path.join(PARQUET_ROOT, 'final')
+    if not os.path.isdir(final_root):
+        return tuple((entry['path'], entry['content_hash']) for entry in final_csv_entries())
+    files = [os.path.join(root, name) for root, _, names in os.walk(final_root)
+             for name in names if name.endswith('.parquet')]
+    signature = []
+    for path in sorted(files):
+        stat = os.stat(path)
+        signature.append((path, stat.st_mtime_ns, stat.st_size))
+    return tuple(signature)
+
+def final_csv_entries():
+    """
+    CSVs do dataset final necessários para cobrir todo o período de cada ticker, segundo o catálogo.
+
+    Para cada ticker (e para os datasets do universo, com vários tickers),
+    arquivos cujo período já está coberto por arquivos mais novos não são lidos.
+    """
+    catalog = Catalog()
+    tickers = {entry['ticker'] for entry in catalog.entries('final')}
+    entries = [entry for ticker in tickers for entry in catalog.covering('final', ticker=ticker)]
+    return sorted(entries, key=lambda entry: entry['written_at'], reverse=True)
+
+# Só a versão atual dos dados fica em memória; a anterior é liberada quando a assinatura muda
+@st.cache_data(max_entries=1)
+def load_data(signature):
     """
-    Carrega o dataset final mais recente da pasta data/final.
+    Carrega o dataset final, preferindo o armazenamento Parquet (data/parquet/final).
+    Sem Parquet, junta os CSVs de data/final escolhidos pelo catálogo (ver
+    `final_csv_entries`); em datas repetidas vale o arquivo mais novo.
     Retorna um DataFrame vazio se nenhum arquivo for encontrado.
+    `signature` (ver `data_signature`) só serve como chave do cache.
     """
-    FINAL_DATA_PATH = os.path.join('data', 'final')
+    required_columns = ['date', 'Close', 'price_change', 'sentiment_score']
+    if list_tickers('final'):
+        # Lê somente as colunas usadas pelo dashboard, já tipadas
+        return read_dataset('final', columns=['ticker'] + required_columns)
     try:
-        # Procura por todos os arquivos que começam com 'final_dataset' e pega o mais recente.
-        files = [f for f in os.listdir(FINAL_DATA_PATH) if f.startswith('final_dataset')]
-        if not files:
+        entries = final_csv_entries()
+        if not entries:
             st.error("Nenhum arquivo de dados final encontrado. Execute os scripts de coleta e processamento primeiro.")
             return pd.DataFrame()
-            
-        latest_file = sorted(files, reverse=True)[0]
-        file_path = os.path.join(FINAL_DATA_PATH, latest_file)
-        
-        # Carrega o CSV e converte a coluna 'date' para o tipo datetime.
-        df = pd.read_csv(file_path, parse_dates=['date'])
         
-        # Verifica se as colunas necessárias existem
-        required_columns = ['date', 'Close', 'price_change', 'sentiment_score']
-        missing_columns = [col for col in required_columns if col not in df.columns]
-        
-        if missing_columns:
-            st.error(f"Colunas necessárias não encontradas: {missing_columns}")
+        frames = []
+        for entry in entries:
+            # Verifica se as colunas necessárias existem (o esquema está no catálogo)
+            missing_columns = [col for col in required_columns if col not in entry['schema']]
+            if missing_columns:
+                st.error(f"Colunas necessárias não encontradas em {os.path.basename(entry['path'])}: {missing_columns}")
+                continue
+            # Carrega o CSV e converte a coluna 'date' para o tipo datetime.
+            df = pd.read_csv(entry['path'], parse_dates=['date'])
+            if 'ticker' not in df.columns:
+                df.insert(0, 'ticker', entry['ticker'])
+            frames.append(df[['ticker'] + required_columns])
+        if not frames:
             return pd.DataFrame()
-            
-        return df
+        
+        # Os arquivos vêm do mais novo para o mais antigo: em datas repetidas fica o mais novo
+        df = pd.concat(frames, ignore_index=True).drop_duplicates(['ticker', 'date'], keep='first')
+        return df.sort_values(['ticker', 'date'], ignore_index=True)
         
     except (IndexError, FileNotFoundError) as e:
         st.error(f"Erro ao carregar dados: {e}")
         return pd.DataFrame()
 
-df = load_data()
+@st.cache_resource(max_entries=1)
+def build_range_index(signature, ticker):
+    """Índice de datas com somas prefixadas para o ticker selecionado (ver `RangeIndex`)."""
+    df = load_data(signature)
+    if 'ticker' in df.columns:
+        df = df[df['ticker'] == ticker]
+    return RangeIndex(df)
+
+def live_sentiment_panel(ticker):
+    """
+    Sentimento do dia mais recente gravado pelo monitoramento de headlines.
+
+    Lê o pequeno arquivo JSON de data/live a cada execução; com `st.fragment`
+    disponível, o painel é reexecutado sozinho a cada LIVE_REFRESH_SECONDS.
+    """
+    live = read_live_sentiment(ticker)
+    if live is None:
+        return
+    daily, updated = live
+    if daily.empty:
+        return
+    latest = daily.iloc[-1]
+    previous = daily.iloc[-2]['sentiment_score'] if len(daily) > 1 else None
+    st.metric(f"Sentimento ao Vivo ({latest['date']:%d/%m/%Y})", f"{latest['sentiment_score']:.3f}",
+              delta=None if previous is None else f"{latest['sentiment_score'] - previous:+.3f}")
+    st.caption(f"{latest['articles']} notícias pontuadas; atualizado em {updated}.")
+
+if hasattr(st, 'fragment'):
+    live_sentiment_panel = st.fragment(run_every=LIVE_REFRESH_SECONDS)(live_sentiment_panel)
+
+signature = data_signature()
+df = load_data(signature)
 
 # O código do dashboard só é executado se os dados forem carregados com sucesso.
 if not df.empty:
-    # --- Título do Dashboard ---
-    st.title('📊 Análise de Sentimentos do Mercado Financeiro para PETR4.SA')
-    st.markdown("Este dashboard interativo apresenta a correlação entre o sentimento das notícias e o preço das ações da Petrobras.")
-
     # --- Barra Lateral (Sidebar) com Filtros ---
     st.sidebar.header("Filtros")
-    min_date = df['date'].min().to_pydatetime()
-    max_date = df['date'].max().to_pydatetime()
+
+    # Datasets do modo universo trazem vários tickers; mostra um de cada vez.
+    if 'ticker' in df.columns:
+        tickers = sorted(df['ticker'].unique())
+        selected_ticker = st.sidebar.selectbox("Ticker", tickers)
+    else:
+        selected_ticker = 'PETR4.SA'
+    index = build_range_index(signature, selected_ticker)
+
+    # --- Título do Dashboard ---
+    st.title(f'📊 Análise de Sentimentos do Mercado Financeiro para {selected_ticker}')
+    st.markdown("Este dashboard interativo apresenta a correlação entre o sentimento das notícias e o preço das ações.")
+    live_sentiment_panel(selected_ticker)
+
+    min_date = pd.Timestamp(index.dates[0]).to_pydatetime()
+    max_date = pd.Timestamp(index.dates[-1]).to_pydatetime()
     
     # Cria um seletor de intervalo de datas na barra lateral.
     start_date, end_date = st.sidebar.date_input(
@@ -67,8 +165,8 @@ if not df.empty:
         max_value=max_date
     )
 
-    # Filtra o DataFrame com base no período selecionado pelo usuário.
-    df_filtered = df[(df['date'] >= pd.to_datetime(start_date)) & (df['date'] <= pd.to_datetime(end_date))]
+    # Filtra o DataFrame com base no período selecionado pelo usuário (busca binária no índice de datas).
+    df_filtered = index.slice(start_date, end_date)
 
     # Verifica se há dados após a filtragem
     if df_filtered.empty:
@@ -78,10 +176,11 @@ if not df.empty:
         st.header("Métricas Principais no Período Selecionado")
         col1, col2, col3 = st.columns(3)
         
-        # Calcula as métricas com base nos dados filtrados.
-        latest_price = df_filtered['Close'].iloc[-1]
-        avg_sentiment = df_filtered['sentiment_score'].mean()
-        price_change_sum = df_filtered['price_change'].sum() * 100
+        # Calcula as métricas do período a partir das somas prefixadas do índice.
+        metrics = index.metrics(start_date, end_date)
+        latest_price = metrics['latest_price']
+        avg_sentiment = metrics['avg_sentiment']
+        price_change_sum = metrics['price_change_sum'] * 100
 
         # Exibe as métricas usando o componente st.metric.
         col1.metric("Último Preço de Fechamento", f"R$ {latest_price:.2f}")
@@ -91,21 +190,38 @@ if not df.empty:
         # --- Gráficos Interativos ---
         st.header("Visualizações")
 
+        # Reduz os pontos enviados ao navegador em períodos longos; períodos curtos
+        # (zoom pelo seletor de datas) são exibidos com todos os pontos.
+        df_price_chart = downsample_line(df_filtered, x='date', y='Close')
+        df_sentiment_chart = downsample_bars(df_filtered, x='date', y='sentiment_score')
+        if len(df_price_chart) < len(df_filtered):
+            st.caption(f"Gráficos simplificados: {len(df_price_chart)} pontos de preço e "
+                       f"{len(df_sentiment_chart)} barras de sentimento para {len(df_filtered)} dias.")
+
         # Gráfico de Preço de Fechamento usando Plotly Express
         try:
-            fig_price = px.line(df_filtered, x='date', y='Close', title='Preço de Fechamento (PETR4.SA)',
+            fig_price = px.line(df_price_chart, x='date', y='Close', title=f'Preço de Fechamento ({selected_ticker})',
                             labels={'date': 'Data', 'Close': 'Preço (R$)'})
             fig_price.update_traces(line_color='#007bff') # Define a cor da linha
             st.plotly_chart(fig_price, use_container_width=True) # Exibe o gráfico
         except Exception as e:
             st.error(f"Erro ao criar gráfico de preços: {e}")
 
+        # Candles (OHLC) do armazenamento local de preços (data/prices); o recorte por datas não copia os dados
+        prices = PriceStore().load(selected_ticker).slice(start_date, end_date)
+        if 0 < len(prices) <= MAX_CANDLES:
+            with st.expander("Candles (OHLC) do período"):
+                fig_candles = go.Figure(go.Candlestick(x=prices.dates, open=prices.open, high=prices.high,
+                                                       low=prices.low, close=prices.close, name=selected_ticker))
+                fig_candles.update_layout(xaxis_rangeslider_visible=False, yaxis_title='Preço (R$)')
+                st.plotly_chart(fig_candles, use_container_width=True)
+
         # Gráfico de Sentimento
         try:
-            fig_sentiment = px.bar(df_filtered, x='date', y='sentiment_score', title='Score de Sentimento Diário',
+            fig_sentiment = px.bar(df_sentiment_chart, x='date', y='sentiment_score', title='Score de Sentimento Diário',
                                labels={'date': 'Data', 'sentiment_score': 'Score de Sentimento'})
             # Pinta as barras de verde (positivo) ou vermelho (negativo).
-            fig_sentiment.update_traces(marker_color=['#28a745' if s >= 0 else '#dc3545' for s in df_filtered['sentiment_score']])
+            fig_sentiment.update_traces(marker_color=np.where(df_sentiment_chart['sentiment_score'] >= 0, '#28a745', '#dc3545'))
             st.plotly_chart(fig_sentiment, use_container_width=True)
         except Exception as e:
             st.error(f"Erro ao criar gráfico de sentimento: {e}")
@@ -117,15 +233,12 @@ if not df.empty:
         Um valor de correlação próximo de 1 indica uma forte correlação positiva, enquanto um valor próximo de -1 indica uma forte correlação negativa.
         """)
         
-        # Cria uma nova coluna com o sentimento do dia anterior usando .shift(1)
-        df_filtered['sentiment_shifted'] = df_filtered['sentiment_score'].shift(1)
-        
-        # Remove linhas com valores NaN para a correlação
-        df_corr = df_filtered.dropna(subset=['sentiment_shifted', 'price_change'])
+        # Pares (sentimento de D-1, variação de D) lidos do índice, já reduzidos para o gráfico de dispersão
+        df_corr = index.lag1_pairs(start_date, end_date, max_points=MAX_SCATTER_POINTS)
         
-        if len(df_corr) > 1:
-            # Calcula a correlação de Pearson entre as duas colunas.
-            correlation = df_corr[['sentiment_shifted', 'price_change']].corr().iloc[0, 1]
+        # Correlação de Pearson a partir das somas prefixadas do índice (O(1) por período).
+        correlation, n_pairs = index.lag1_correlation(start_date, end_date)
+        if n_pairs > 1:
             
             st.metric("Correlação (Sentimento D-1 vs. Variação de Preço D)", f"{correlation:.4f}")
             
@@ -146,6 +259,33 @@ if not df.empty:
         else:
             st.warning("Dados insuficientes para calcular correlação. São necessários pelo menos 2 pontos de dados.")
 
+        # --- Correlação por Defasagem e Janela Móvel ---
+        st.subheader("Correlação por Defasagem e Janela")
+        st.markdown("""
+        Defasagem k compara o sentimento do dia D-k com a variação de preço do dia D (k = 1 é a análise acima; 
+        valores negativos comparam o sentimento posterior à variação). Dias úteis sem dados são desconsiderados.
+        """)
+        lag_engine = LagCorrelation.from_frame(df_filtered)
+        grid = lag_engine.window_grid()
+        if grid.notna().any().any():
+            fig_grid = px.imshow(grid, zmin=-1, zmax=1, color_continuous_scale='RdBu', aspect='auto',
+                                 labels={'x': 'Defasagem (dias úteis)', 'y': 'Janela (dias úteis mais recentes)', 'color': 'Correlação'},
+                                 title='Correlação por Defasagem e Tamanho da Janela')
+            fig_grid.update_yaxes(type='category')
+            st.plotly_chart(fig_grid, use_container_width=True)
+
+        windows = [w for w in WINDOWS if w <= len(lag_engine)]
+        if windows:
+            col_window, col_lag = st.columns(2)
+            window = col_window.selectbox("Janela móvel (dias úteis)", windows, index=min(2, len(windows) - 1))
+            lag = col_lag.slider("Defasagem (dias úteis)", int(lag_engine.lags.min()), int(lag_engine.lags.max()), 1)
+            rolling = lag_engine.rolling(window)[lag].rename('correlation').reset_index()
+            fig_rolling = px.line(downsample_line(rolling, x='date', y='correlation'), x='date', y='correlation',
+                                  title=f'Correlação Móvel ({window} dias, defasagem {lag})',
+                                  labels={'date': 'Data', 'correlation': 'Correlação'})
+            fig_rolling.update_yaxes(range=[-1, 1])
+            st.plotly_chart(fig_rolling, use_container_width=True)
+
         # --- Tabela de Dados ---
         st.header("Dados Detalhados")
         # Exibe o DataFrame filtrado com formatação para melhor leitura.
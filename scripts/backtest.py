@@ -0,0 +1,191 @@
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from catalog import Catalog
+from storage import list_tickers, read_dataset
+
+# --- Backtest Vetorizado de Regras de Sentimento ---
+# Regra avaliada: compra no fechamento de D-1 quando a média móvel do sentimento
+# (janela de `window` pregões) termina D-1 acima de `threshold`, e mantém a
+# posição por `holding` pregões; sinais durante a posição a estendem. Todas as
+# combinações (janela x limiar x prazo) são avaliadas com arrays NumPy em
+# broadcasting, um prazo de cada vez para limitar a memória.
+
+FINAL_DATA_PATH = os.path.join(os.path.dirname(__file__), '..', 'data', 'final')
+WINDOWS = (1, 2, 3, 5, 10, 21)                         # Janelas de suavização do sentimento (pregões)
+THRESHOLDS = np.round(np.linspace(-0.5, 0.5, 101), 3)  # Limiares de entrada
+HOLDINGS = tuple(range(1, 21))                         # Prazos de permanência (pregões)
+TRADING_DAYS = 252
+TOP = 20  # Configurações exibidas ao final
+
+
+def _prefix(values):
+    """Soma prefixada ao longo do último eixo, com zero inicial."""
+    pad = np.zeros(values.shape[:-1] + (1,), dtype=values.dtype)
+    return np.concatenate((pad, np.cumsum(values, axis=-1)), axis=-1)
+
+
+def smoothed_sentiment(sentiment, windows=WINDOWS):
+    """
+    Médias móveis do sentimento para cada janela, em uma matriz (janelas x pregões).
+
+    Pregões sem sentimento (NaN) são ignorados na média; a média é NaN se a
+    janela inteira estiver vazia.
+    """
+    sentiment = np.asarray(sentiment, dtype=float)
+    n = len(sentiment)
+    sums = _prefix(np.nan_to_num(sentiment, nan=0.0))
+    counts = _prefix((~np.isnan(sentiment)).astype(float))
+    hi = np.arange(1, n + 1)
+    lo = np.maximum(hi[None, :] - np.asarray(windows)[:, None], 0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return (sums[hi] - sums[lo]) / (counts[hi] - counts[lo])
+
+
+def _trade_hit_rate(positions, log_equity):
+    """
+    Fração de operações com retorno positivo, por linha de `positions` (configurações x pregões).
+
+    Cada bloco contínuo de posição é uma operação; seu retorno é a diferença
+    do patrimônio (em log) entre a saída e a entrada.
+    """
+    rows = positions.shape[0]
+    edges = np.diff(np.pad(positions.astype(np.int8), ((0, 0), (1, 1))), axis=1)
+    entry_rows, entry_cols = np.nonzero(edges == 1)
+    exit_rows, exit_cols = np.nonzero(edges == -1)
+    # np.nonzero percorre as linhas em ordem, então entradas e saídas ficam pareadas
+    trade_returns = log_equity[exit_rows, exit_cols] - log_equity[entry_rows, entry_cols]
+    trades = np.bincount(entry_rows, minlength=rows)
+    wins = np.bincount(entry_rows, weights=trade_returns > 0, minlength=rows)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return wins / trades, trades
+
+
+def backtest_grid(df, windows=WINDOWS, thresholds=THRESHOLDS, holdings=HOLDINGS, cost_bps=0.0):
+    """
+    Avalia todas as combinações de janela, limiar e prazo sobre o dataset final.
+
+    `df` precisa de date, price_change e sentiment_score (uma linha por
+    pregão). `cost_bps` é o custo, em pontos-base, cobrado em cada entrada e
+    em cada saída. Retorna um DataFrame com uma linha por configuração:
+    retorno total e anualizado, Sharpe, drawdown máximo, taxa de acerto por
+    operação, número de operações e exposição (fração dos pregões posicionado).
+    """
+    df = df.sort_values('date', kind='stable')
+    returns = np.nan_to_num(df['price_change'].to_numpy(dtype=float), nan=0.0)
+    n = len(returns)
+    windows, thresholds = np.asarray(windows), np.asarray(thresholds, dtype=float)
+
+    # signals[w, t, d]: a média da janela w no pregão d supera o limiar t
+    smoothed = smoothed_sentiment(df['sentiment_score'].to_numpy(dtype=float), windows)
+    with np.errstate(invalid='ignore'):
+        signals = smoothed[:, None, :] > thresholds[None, :, None]
+    # signal_count[..., d]: sinais nos pregões anteriores a d
+    signal_count = _prefix(signals.astype(np.int32))
+    cost = cost_bps / 10_000
+    idx = np.arange(n)
+
+    results = []
+    for holding in holdings:
+        # Posicionado em d se houve sinal em algum dos pregões d-holding .. d-1
+        lo = np.maximum(idx - holding, 0)
+        positions = ((signal_count[..., idx] - signal_count[..., lo]) > 0).reshape(-1, n)
+
+        strategy = positions * returns[None, :]
+        if cost:
+            changes = np.abs(np.diff(positions.astype(np.int8), axis=1, prepend=0))
+            strategy = strategy - cost * changes
+        log_equity = _prefix(np.log1p(strategy))
+
+        total = np.expm1(log_equity[:, -1])
+        drawdown = np.expm1((log_equity - np.maximum.accumulate(log_equity, axis=1)).min(axis=1))
+        mean, std = strategy.mean(axis=1), strategy.std(axis=1)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            sharpe = np.where(std > 0, mean / std * np.sqrt(TRADING_DAYS), np.nan)
+        hit_rate, trades = _trade_hit_rate(positions, log_equity)
+
+        grid_w, grid_t = np.meshgrid(windows, thresholds, indexing='ij')
+        results.append(pd.DataFrame({
+            'window': grid_w.ravel(),
+            'threshold': grid_t.ravel(),
+            'holding': holding,
+            'total_return': total,
+            'annual_return': np.expm1(log_equity[:, -1] * TRADING_DAYS / max(n, 1)),
+            'sharpe': sharpe,
+            'max_drawdown': drawdown,
+            'hit_rate': hit_rate,
+            'trades': trades,
+            'exposure': positions.mean(axis=1),
+        }))
+    return pd.concat(results, ignore_index=True)
+
+
+def buy_and_hold(df):
+    """Retorno total e drawdown máximo de manter o ativo durante todo o período (referência)."""
+    returns = np.nan_to_num(df.sort_values('date')['price_change'].to_numpy(dtype=float), nan=0.0)
+    log_equity = _prefix(np.log1p(returns))
+    return {'total_return': float(np.expm1(log_equity[-1])),
+            'max_drawdown': float(np.expm1((log_equity - np.maximum.accumulate(log_equity)).min()))}
+
+
+def load_final_dataset(ticker):
+    """
+    Dataset final de um ticker: do Parquet (data/parquet/final) ou do CSV mais recente registrado no catálogo.
+
+    Sem um CSV só do ticker, usa o dataset do universo mais recente (coluna `ticker`).
+    """
+    columns = ['date', 'Close', 'price_change', 'sentiment_score']
+    if ticker in list_tickers('final'):
+        return read_dataset('final', tickers=[ticker], columns=columns)
+    catalog = Catalog()
+    entry = catalog.latest('final', ticker=ticker) or catalog.latest('final', ticker=None)
+    if entry is None:
+        return pd.DataFrame(columns=columns)
+    df = pd.read_csv(entry['path'], parse_dates=['date'])
+    if 'ticker' in df.columns:
+        df = df[df['ticker'] == ticker]
+    return df[columns]
+
+
+# --- Execução Principal ---
+if __name__ == "__main__":
+    print("--- Iniciando Backtest das Regras de Sentimento ---")
+    parser = argparse.ArgumentParser(description="Avalia grades de regras 'comprar quando o sentimento de D-1 > limiar'.")
+    parser.add_argument('--ticker', default='PETR4.SA', help="Ticker do dataset final (padrão: PETR4.SA)")
+    parser.add_argument('--windows', type=int, nargs='+', default=list(WINDOWS),
+                        help=f"Janelas de suavização (padrão: {' '.join(map(str, WINDOWS))})")
+    parser.add_argument('--thresholds', type=float, nargs=3, default=[-0.5, 0.5, 101], metavar=('MIN', 'MAX', 'N'),
+                        help="Limiares: N valores entre MIN e MAX (padrão: -0.5 0.5 101)")
+    parser.add_argument('--max-holding', type=int, default=max(HOLDINGS),
+                        help=f"Prazos de 1 até este valor (padrão: {max(HOLDINGS)})")
+    parser.add_argument('--cost-bps', type=float, default=0.0, help="Custo por entrada/saída em pontos-base")
+    parser.add_argument('--top', type=int, default=TOP, help=f"Configurações exibidas (padrão: {TOP})")
+    args = parser.parse_args()
+
+    df = load_final_dataset(args.ticker)
+    if df.empty:
+        print("Nenhum dataset final encontrado. Execute o processador primeiro.")
+        exit()
+
+    thresholds = np.round(np.linspace(args.thresholds[0], args.thresholds[1], int(args.thresholds[2])), 4)
+    holdings = range(1, args.max_holding + 1)
+    start = time.perf_counter()
+    results = backtest_grid(df, args.windows, thresholds, holdings, args.cost_bps)
+    seconds = time.perf_counter() - start
+    print(f"{len(results)} configurações avaliadas em {len(df)} pregões em {seconds:.2f}s")
+
+    reference = buy_and_hold(df)
+    print(f"Referência (comprar e manter): retorno {reference['total_return']:.2%}, "
+          f"drawdown máximo {reference['max_drawdown']:.2%}")
+    ranked = results.sort_values('sharpe', ascending=False, na_position='last')
+    print(ranked.head(args.top).to_string(index=False, float_format=lambda v: f"{v:.4f}"))
+
+    filename = os.path.join(FINAL_DATA_PATH, f"backtest_{args.ticker}_{pd.Timestamp.now():%Y%m%d}.csv")
+    ranked.to_csv(filename, index=False)
+    Catalog().register(filename, 'backtest', ranked, ticker=args.ticker)
+    print(f"Resultados salvos em: {filename}")
+    print("--- Backtest Finalizado ---")
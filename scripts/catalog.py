@@ -0,0 +1,299 @@
+import argparse
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import time
+
+import pandas as pd
+
+# --- Catálogo dos Arquivos Gerados pelo Pipeline ---
+# Cada etapa registra aqui os arquivos que grava (tipo, ticker, termo de busca,
+# período coberto, linhas, esquema e hash do conteúdo), e os consumidores
+# escolhem o arquivo certo por consulta, em vez de listar as pastas e confiar na
+# ordem alfabética dos nomes. Cada registro é uma transação do SQLite.
+
+DATA_ROOT = os.path.join(os.path.dirname(__file__), '..', 'data')
+CATALOG_PATH = os.path.join(DATA_ROOT, 'catalog.sqlite')
+DATE_COLUMNS = ('date', 'Date', 'Datetime', 'publishedAt')  # Colunas (ou índices) usadas para o período coberto
+DEFAULT_TICKER = 'PETR4.SA'  # Ticker dos datasets finais antigos, anteriores ao modo universo
+HASH_CHUNK_BYTES = 1 << 20
+
+# Nomes dos arquivos já existentes, indexados por `Catalog.rebuild`: (pasta, padrão, tipo)
+FILE_PATTERNS = [
+    ('raw', re.compile(r'^(?P<query>.+)_news_newsapi_fixed_\d{8}\.csv$'), 'news'),
+    ('raw', re.compile(r'^(?P<query>.+)_news_newsapi_fixed_incremental\.csv$'), 'news_incremental'),
+    ('raw', re.compile(r'^(?P<query>.+)_headlines_newsapi_fixed_\d{8}\.csv$'), 'headlines'),
+    ('raw', re.compile(r'^(?P<ticker>.+?)_prices_\d{8}\.csv$'), 'prices'),
+    ('raw', re.compile(r'^(?P<ticker>.+?)_prices_incremental\.csv$'), 'prices_incremental'),
+    ('raw', re.compile(r'^(?P<ticker>.+?)_prices_[^_]+_\d{8}\.csv$'), 'prices_intraday'),
+    ('final', re.compile(r'^final_dataset.*\.csv$'), 'final'),
+    ('final', re.compile(r'^intraday_.*\.csv$'), 'intraday'),
+    ('final', re.compile(r'^backtest_(?P<ticker>.+)_\d{8}\.csv$'), 'backtest'),
+]
+PRICE_KINDS = ('prices', 'prices_incremental', 'prices_intraday')  # CSVs no formato do yfinance (Price/Ticker)
+ENTRY_COLUMNS = ['path', 'kind', 'ticker', 'query', 'start_date', 'end_date', 'rows', 'schema', 'content_hash',
+                 'size', 'written_at']
+
+
+def file_hash(path, offset=0, previous=None):
+    """
+    Hash de conteúdo (BLAKE2b, 128 bits) de um arquivo a partir do byte `offset`.
+
+    Com `previous`, o hash é encadeado ao anterior: para arquivos que só
+    crescem, apenas o trecho anexado é lido.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    if previous is not None:
+        digest.update(previous.encode())
+    with open(path, 'rb') as f:
+        f.seek(offset)
+        for chunk in iter(lambda: f.read(HASH_CHUNK_BYTES), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _coverage(df):
+    """Primeira e última data (YYYY-MM-DD) da primeira coluna ou índice de DATE_COLUMNS, ou (None, None)."""
+    for column in DATE_COLUMNS:
+        if column in df.columns:
+            values = df[column]
+        elif column in (df.index.names or []):
+            values = df.index.get_level_values(column)
+        else:
+            continue
+        dates = pd.to_datetime(pd.Series(values), errors='coerce', utc=True).dropna()
+        if dates.empty:
+            return None, None
+        return dates.min().strftime('%Y-%m-%d'), dates.max().strftime('%Y-%m-%d')
+    return None, None
+
+
+def _schema(df):
+    """Colunas e tipos do DataFrame em JSON; colunas do yfinance (Price, Ticker) viram 'Price/Ticker'."""
+    return json.dumps({'/'.join(map(str, c)) if isinstance(c, tuple) else str(c): str(dtype)
+                       for c, dtype in df.dtypes.items()}, ensure_ascii=False)
+
+
+def _read_for_rebuild(path, kind):
+    if kind in PRICE_KINDS:
+        return pd.read_csv(path, header=[0, 1], index_col=0, parse_dates=True)
+    return pd.read_csv(path)
+
+
+class Catalog:
+    """
+    Registro (SQLite) dos arquivos gravados pelo coletor, processador e scripts de análise.
+
+    Os caminhos são guardados relativos a data/. Ao ser criado, o catálogo
+    indexa os arquivos que já existem em data/raw e data/final (ver `rebuild`).
+    Entradas de arquivos que deixaram de existir são descartadas nas consultas.
+    """
+
+    def __init__(self, path=CATALOG_PATH, data_root=DATA_ROOT):
+        self.path = path
+        self.data_root = data_root
+        self._conn = None
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_conn'] = None
+        return state
+
+    @property
+    def conn(self):
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            created = not os.path.exists(self.path)
+            self._conn = sqlite3.connect(self.path, timeout=60)
+            self._conn.row_factory = sqlite3.Row
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.executescript(
+                'CREATE TABLE IF NOT EXISTS datasets ('
+                ' path TEXT PRIMARY KEY, kind TEXT NOT NULL, ticker TEXT, query TEXT,'
+                ' start_date TEXT, end_date TEXT, rows INTEGER NOT NULL, schema TEXT NOT NULL,'
+                ' content_hash TEXT NOT NULL, size INTEGER NOT NULL, written_at REAL NOT NULL) WITHOUT ROWID;'
+                'CREATE INDEX IF NOT EXISTS datasets_kind ON datasets (kind, ticker, query, written_at);'
+            )
+            if created:
+                self.rebuild()
+        return self._conn
+
+    def _relative(self, path):
+        return os.path.relpath(os.path.abspath(path), os.path.abspath(self.data_root))
+
+    def _entry(self, row):
+        entry = dict(row)
+        entry['path'] = os.path.normpath(os.path.join(self.data_root, entry['path']))
+        entry['schema'] = json.loads(entry['schema'])
+        return entry
+
+    def register(self, path, kind, df, ticker=None, query=None, append=False, written_at=None):
+        """
+        Registra (ou atualiza) um arquivo recém-gravado a partir do DataFrame que foi escrito nele.
+
+        Com `append`, `df` contém apenas as linhas anexadas: o período e a
+        contagem de linhas são somados aos já registrados e o hash é encadeado
+        a partir do tamanho anterior do arquivo.
+        """
+        relative = self._relative(path)
+        size = os.path.getsize(path)
+        start, end = _coverage(df)
+        rows = len(df)
+        with self.conn:
+            previous = self.conn.execute('SELECT * FROM datasets WHERE path = ?', (relative,)).fetchone()
+            if append and previous is not None and previous['size'] <= size:
+                content_hash = file_hash(path, previous['size'], previous['content_hash'])
+                start = min(filter(None, [start, previous['start_date']]), default=None)
+                end = max(filter(None, [end, previous['end_date']]), default=None)
+                rows += previous['rows']
+            else:
+                content_hash = file_hash(path)
+            self.conn.execute(
+                'INSERT OR REPLACE INTO datasets VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                (relative, kind, ticker, query, start, end, rows, _schema(df), content_hash, size,
+                 written_at if written_at is not None else time.time())
+            )
+
+    def _select(self, kind, filters):
+        """Cursor das entradas, da gravada mais recentemente para a mais antiga (empates: fim do período)."""
+        clauses, params = [], []
+        if kind is not None:
+            clauses.append('kind = ?')
+            params.append(kind)
+        for column, value in filters.items():
+            if column not in ('ticker', 'query'):
+                raise ValueError(f"Filtro desconhecido: {column}")
+            clauses.append(f'{column} IS ?')
+            params.append(value)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ''
+        return self.conn.execute(
+            f'SELECT * FROM datasets {where} ORDER BY written_at DESC, end_date DESC, path DESC', params)
+
+    def _existing(self, cursor, missing):
+        """Gera as entradas do cursor cujo arquivo existe; os caminhos ausentes vão para `missing`."""
+        for row in cursor:
+            entry = self._entry(row)
+            if os.path.exists(entry['path']):
+                yield entry
+            else:
+                missing.append(entry['path'])
+
+    def _forget(self, cursor, missing):
+        """Fecha o cursor e remove as entradas de arquivos que deixaram de existir."""
+        cursor.close()
+        if missing:
+            with self.conn:
+                self.conn.executemany('DELETE FROM datasets WHERE path = ?',
+                                      ((self._relative(path),) for path in missing))
+
+    def entries(self, kind=None, **filters):
+        """
+        Entradas registradas, da gravada mais recentemente para a mais antiga (empates: fim do período).
+
+        `filters` (ticker, query) comparam por igualdade; None seleciona as
+        entradas sem o campo (ex.: datasets finais com vários tickers).
+        """
+        cursor, missing = self._select(kind, filters), []
+        try:
+            return list(self._existing(cursor, missing))
+        finally:
+            self._forget(cursor, missing)
+
+    def latest(self, kind, **filters):
+        """
+        Entrada mais recente de um tipo (ver `entries`), ou None.
+
+        Percorre o cursor só até o primeiro arquivo existente; apenas as
+        entradas ausentes encontradas antes dele são removidas.
+        """
+        cursor, missing = self._select(kind, filters), []
+        try:
+            return next(self._existing(cursor, missing), None)
+        finally:
+            self._forget(cursor, missing)
+
+    def covering(self, kind, start=None, end=None, **filters):
+        """
+        Menor conjunto de arquivos que cobre o período [start, end] (datas YYYY-MM-DD), do mais novo ao mais antigo.
+
+        Arquivos cujo período já está coberto por arquivos gravados depois são
+        ignorados, então um período que atravessa vários arquivos é servido sem
+        carregar todos eles. Com `start` e `end`, a busca para assim que o
+        período está coberto.
+        """
+        selected, covered = [], []
+        cursor, missing = self._select(kind, filters), []
+        try:
+            for entry in self._existing(cursor, missing):
+                lo, hi = entry['start_date'], entry['end_date']
+                if lo is None or hi is None:
+                    continue
+                lo, hi = max(lo, start or lo), min(hi, end or hi)
+                if lo > hi or _is_covered(covered, lo, hi):
+                    continue
+                selected.append(entry)
+                covered.append((lo, hi))
+                if start and end and _is_covered(covered, start, end):
+                    break
+        finally:
+            self._forget(cursor, missing)
+        return selected
+
+    def rebuild(self):
+        """Indexa os arquivos existentes em data/raw e data/final (catálogo novo ou arquivos gravados sem registro)."""
+        for folder, pattern, kind in FILE_PATTERNS:
+            directory = os.path.join(self.data_root, folder)
+            if not os.path.isdir(directory):
+                continue
+            for name in sorted(os.listdir(directory)):
+                match = pattern.match(name)
+                if match is None:
+                    continue
+                path = os.path.join(directory, name)
+                if self.conn.execute('SELECT 1 FROM datasets WHERE path = ?', (self._relative(path),)).fetchone():
+                    continue
+                try:
+                    df = _read_for_rebuild(path, kind)
+                except (ValueError, pd.errors.ParserError) as e:
+                    print(f"Catálogo: {name} ignorado ({e})")
+                    continue
+                groups = match.groupdict()
+                ticker = groups.get('ticker')
+                if kind == 'final' and 'ticker' not in df.columns:
+                    ticker = DEFAULT_TICKER
+                self.register(path, kind, df, ticker=ticker, query=groups.get('query'),
+                              written_at=os.path.getmtime(path))
+
+
+def _is_covered(intervals, lo, hi):
+    """Verifica se [lo, hi] está contido na união dos intervalos (datas YYYY-MM-DD, dias consecutivos se juntam)."""
+    reach = pd.Timestamp(lo) - pd.Timedelta(days=1)
+    for start, end in sorted(intervals):
+        if pd.Timestamp(start) > reach + pd.Timedelta(days=1):
+            break
+        reach = max(reach, pd.Timestamp(end))
+        if reach >= pd.Timestamp(hi):
+            return True
+    return False
+
+
+# --- Execução Principal ---
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Lista os arquivos registrados no catálogo de data/.")
+    parser.add_argument('--kind', default=None, help="Filtra por tipo (news, prices, final, ...)")
+    parser.add_argument('--rebuild', action='store_true', help="Indexa arquivos de data/raw e data/final ainda sem registro")
+    args = parser.parse_args()
+
+    catalog = Catalog()
+    if args.rebuild:
+        catalog.rebuild()
+    entries = catalog.entries(args.kind)
+    if not entries:
+        print("Nenhum arquivo registrado.")
+    else:
+        table = pd.DataFrame(entries)[ENTRY_COLUMNS].drop(columns=['schema'])
+        table['path'] = [os.path.relpath(p, catalog.data_root) for p in table['path']]
+        table['written_at'] = pd.to_datetime(table['written_at'], unit='s').dt.strftime('%Y-%m-%d %H:%M')
+        print(table.to_string(index=False))
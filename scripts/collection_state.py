@@ -0,0 +1,119 @@
+import json
+import os
+import sqlite3
+import threading
+
+# --- Estado persistido da coleta incremental ---
+
+STATE_PATH = os.path.join(os.path.dirname(__file__), '..', 'data', 'state', 'collector_state.sqlite')
+LEGACY_PATH = os.path.join(os.path.dirname(__file__), '..', 'data', 'state', 'collector_state.json')
+
+
+class CollectionState:
+    """
+    Estado da coleta incremental (SQLite).
+
+    Guarda, por termo de busca, os dias já coletados e as URLs já armazenadas
+    (com o dia de publicação) e, por ticker, a data do último preço salvo. As
+    URLs são consultadas apenas para os artigos recebidos em uma execução, sem
+    carregar o registro inteiro, e as anteriores à janela de busca são
+    removidas com `prune`. Cada alteração é gravada imediatamente, então o
+    progresso sobrevive a uma etapa que falha.
+
+    A conexão é compartilhada pelas threads da coleta do universo e protegida
+    por um lock. Um `collector_state.json` do formato anterior é importado na
+    primeira abertura e renomeado para `.migrated`.
+    """
+
+    def __init__(self, path=STATE_PATH, legacy_path=LEGACY_PATH):
+        self.path = path
+        self.legacy_path = legacy_path
+        self._conn = None
+        self._lock = threading.RLock()
+
+    @property
+    def conn(self):
+        with self._lock:
+            if self._conn is None:
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                self._conn = sqlite3.connect(self.path, timeout=60, check_same_thread=False)
+                self._conn.execute('PRAGMA journal_mode=WAL')
+                self._conn.executescript(
+                    'CREATE TABLE IF NOT EXISTS news_days ('
+                    ' query TEXT NOT NULL, day TEXT NOT NULL, PRIMARY KEY (query, day)) WITHOUT ROWID;'
+                    'CREATE TABLE IF NOT EXISTS news_urls ('
+                    ' query TEXT NOT NULL, url TEXT NOT NULL, day TEXT NOT NULL, PRIMARY KEY (query, url)) WITHOUT ROWID;'
+                    'CREATE INDEX IF NOT EXISTS news_urls_day ON news_urls (query, day);'
+                    'CREATE TABLE IF NOT EXISTS price_marks ('
+                    ' ticker TEXT PRIMARY KEY, last_date TEXT NOT NULL) WITHOUT ROWID;'
+                )
+                if self.legacy_path and os.path.exists(self.legacy_path):
+                    self._import_legacy()
+            return self._conn
+
+    def _import_legacy(self):
+        """Importa o estado JSON do formato anterior, que não guardava o dia de cada URL."""
+        with open(self.legacy_path, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+        with self._conn:
+            for query, entry in state.get('news', {}).items():
+                days = entry.get('days', [])
+                # Sem o dia de publicação, cada URL fica até o último dia coletado sair da janela
+                last_day = max(days, default='9999-12-31')
+                self._conn.executemany('INSERT OR IGNORE INTO news_days VALUES (?, ?)',
+                                       ((query, day) for day in days))
+                self._conn.executemany('INSERT OR IGNORE INTO news_urls VALUES (?, ?, ?)',
+                                       ((query, url, last_day) for url in entry.get('urls', [])))
+            for ticker, entry in state.get('prices', {}).items():
+                self._conn.execute('INSERT OR REPLACE INTO price_marks VALUES (?, ?)', (ticker, entry['last_date']))
+        os.replace(self.legacy_path, self.legacy_path + '.migrated')
+
+    def news_days(self, query):
+        """Retorna o conjunto de dias (YYYY-MM-DD) já coletados para um termo de busca."""
+        with self._lock:
+            rows = self.conn.execute('SELECT day FROM news_days WHERE query = ?', (query,)).fetchall()
+        return {day for day, in rows}
+
+    def seen_urls(self, query, urls):
+        """Retorna as URLs de `urls` que já estão no registro do termo de busca."""
+        with self._lock, self.conn:
+            self.conn.execute('CREATE TEMP TABLE IF NOT EXISTS candidates (url TEXT PRIMARY KEY)')
+            self.conn.execute('DELETE FROM candidates')
+            self.conn.executemany('INSERT OR IGNORE INTO candidates VALUES (?)', ((url,) for url in urls))
+            rows = self.conn.execute(
+                'SELECT n.url FROM news_urls n JOIN candidates c ON n.url = c.url WHERE n.query = ?', (query,)
+            ).fetchall()
+        return {url for url, in rows}
+
+    def add_news(self, query, days, urls):
+        """Registra novos dias completos e novas URLs, dadas como pares (url, dia de publicação)."""
+        with self._lock, self.conn:
+            self.conn.executemany('INSERT OR IGNORE INTO news_days VALUES (?, ?)', ((query, day) for day in days))
+            self.conn.executemany('INSERT OR REPLACE INTO news_urls VALUES (?, ?, ?)',
+                                  ((query, url, day) for url, day in urls))
+
+    def prune(self, query, before):
+        """
+        Remove os dias e as URLs publicadas antes de `before` (YYYY-MM-DD).
+
+        Esses artigos estão fora da janela de busca e não podem voltar em uma
+        resposta da API. Retorna o número de URLs removidas.
+        """
+        with self._lock, self.conn:
+            self.conn.execute('DELETE FROM news_days WHERE query = ? AND day < ?', (query, before))
+            return self.conn.execute('DELETE FROM news_urls WHERE query = ? AND day < ?', (query, before)).rowcount
+
+    def last_price_date(self, ticker):
+        """Retorna a data (YYYY-MM-DD) do último preço armazenado para o ticker, ou None."""
+        with self._lock:
+            row = self.conn.execute('SELECT last_date FROM price_marks WHERE ticker = ?', (ticker,)).fetchone()
+        return None if row is None else row[0]
+
+    def update_last_price_date(self, ticker, date_str):
+        """Avança a marca d'água de preços do ticker."""
+        with self._lock, self.conn:
+            self.conn.execute(
+                'INSERT INTO price_marks VALUES (?, ?) '
+                'ON CONFLICT (ticker) DO UPDATE SET last_date = MAX(last_date, excluded.last_date)',
+                (ticker, date_str)
+            )
@@ -0,0 +1,125 @@
+import numpy as np
+import pandas as pd
+
+# --- Correlação por Defasagem e por Janela Móvel ---
+
+LAGS = np.arange(-10, 11)                   # Defasagens (dias úteis) do sentimento em relação ao preço
+WINDOWS = (5, 10, 21, 42, 63, 126, 252)     # Janelas móveis (dias úteis)
+MIN_PAIRS = 3                               # Pares válidos mínimos para uma correlação
+
+
+def align_business_days(df):
+    """
+    Reindexa o DataFrame em um calendário contínuo de dias úteis.
+
+    Dias ausentes nos dados viram linhas com NaN, de modo que uma defasagem de
+    k linhas corresponde sempre a k dias úteis, e os pares que dependem de um
+    dia ausente são descartados em vez de deslocar o alinhamento.
+    """
+    df = df.sort_values('date').drop_duplicates('date', keep='last').set_index('date')
+    if df.empty:
+        return df.reset_index()
+    calendar = pd.bdate_range(df.index[0], df.index[-1])
+    calendar = calendar.union(df.index)  # mantém datas de fim de semana presentes nos dados
+    return df.reindex(calendar).rename_axis('date').reset_index()
+
+
+class LagCorrelation:
+    """
+    Correlações de Pearson entre sentimento e variação de preço para várias defasagens.
+
+    Para a defasagem k, o sentimento do dia t-k é comparado com a variação de
+    preço do dia t (k = 1 é a análise "D-1 vs. D"; k negativo compara o
+    sentimento posterior à variação). As séries defasadas são empilhadas em
+    matrizes (defasagens x dias) e reduzidas a somas prefixadas de n, x, y, x²,
+    y² e xy em uma única passada; a correlação de qualquer janela, para todas
+    as defasagens ao mesmo tempo, sai de diferenças dessas somas.
+    """
+
+    def __init__(self, dates, sentiment, price_change, lags=LAGS, min_pairs=MIN_PAIRS):
+        self.dates = pd.DatetimeIndex(dates)
+        self.lags = np.asarray(lags)
+        self.min_pairs = min_pairs
+        sentiment = np.asarray(sentiment, dtype=float)
+        price_change = np.asarray(price_change, dtype=float)
+        n = len(sentiment)
+
+        # x[k, t] = sentimento de t - lags[k]; posições fora da série viram NaN
+        pad = int(np.abs(self.lags).max()) if len(self.lags) else 0
+        padded = np.concatenate((np.full(pad, np.nan), sentiment, np.full(pad, np.nan)))
+        x = padded[np.arange(n)[None, :] - self.lags[:, None] + pad]
+        y = np.broadcast_to(price_change, x.shape)
+        valid = ~np.isnan(x) & ~np.isnan(y)
+
+        # Centraliza pelas médias globais para reduzir o cancelamento numérico nas somas
+        x_center = x[valid].mean() if valid.any() else 0.0
+        y_center = y[valid].mean() if valid.any() else 0.0
+        x = np.where(valid, x - x_center, 0.0)
+        y = np.where(valid, y - y_center, 0.0)
+
+        def prefix(values):
+            return np.concatenate((np.zeros((len(self.lags), 1)), np.cumsum(values, axis=1)), axis=1)
+
+        self._n = prefix(valid.astype(float))
+        self._x = prefix(x)
+        self._y = prefix(y)
+        self._xx = prefix(x * x)
+        self._yy = prefix(y * y)
+        self._xy = prefix(x * y)
+
+    @classmethod
+    def from_frame(cls, df, lags=LAGS, min_pairs=MIN_PAIRS):
+        """Constrói o motor a partir de um DataFrame com date, sentiment_score e price_change."""
+        aligned = align_business_days(df[['date', 'sentiment_score', 'price_change']])
+        return cls(aligned['date'], aligned['sentiment_score'], aligned['price_change'], lags, min_pairs)
+
+    def __len__(self):
+        return len(self.dates)
+
+    def _correlation(self, lo, hi, min_pairs):
+        """Correlações das janelas [lo, hi) (arrays de posições), para todas as defasagens."""
+        n = self._n[:, hi] - self._n[:, lo]
+        sx = self._x[:, hi] - self._x[:, lo]
+        sy = self._y[:, hi] - self._y[:, lo]
+        sxx = self._xx[:, hi] - self._xx[:, lo]
+        syy = self._yy[:, hi] - self._yy[:, lo]
+        sxy = self._xy[:, hi] - self._xy[:, lo]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            cov = sxy - sx * sy / n
+            var_x = sxx - sx * sx / n
+            var_y = syy - sy * sy / n
+            corr = cov / np.sqrt(var_x * var_y)
+            # Poucos pares ou variância nula (até o erro de arredondamento): correlação indefinida
+            undefined = (n < min_pairs) | ~(var_x > 1e-12 * sxx) | ~(var_y > 1e-12 * syy)
+        return np.where(undefined, np.nan, np.clip(corr, -1.0, 1.0))
+
+    def window_grid(self, windows=WINDOWS):
+        """
+        Correlação na janela mais recente de cada tamanho, para cada defasagem.
+
+        Retorna um DataFrame (janelas x defasagens); a linha 'Período' usa todos
+        os dias. Janelas maiores que o período são omitidas.
+        """
+        n = len(self)
+        windows = [w for w in windows if w <= n]
+        hi = np.full(len(windows) + 1, n)
+        lo = np.array([n - w for w in windows] + [0])
+        grid = self._correlation(lo, hi, self.min_pairs).T
+        return pd.DataFrame(grid, index=[*windows, 'Período'], columns=self.lags)
+
+    def rolling(self, window, min_pairs=None):
+        """
+        Correlação móvel (janelas de `window` dias úteis) para todas as defasagens.
+
+        Retorna um DataFrame indexado pela data final de cada janela, com uma
+        coluna por defasagem. Janelas com menos de `min_pairs` pares válidos
+        (por padrão, metade da janela) ficam como NaN.
+        """
+        if min_pairs is None:
+            min_pairs = max(self.min_pairs, window // 2)
+        n = len(self)
+        if window > n:
+            return pd.DataFrame(columns=self.lags, index=pd.DatetimeIndex([], name='date'), dtype=float)
+        hi = np.arange(window, n + 1)
+        corr = self._correlation(hi - window, hi, min_pairs).T
+        return pd.DataFrame(corr, index=self.dates[window - 1:].rename('date'), columns=self.lags)
@@ -1,145 +1,635 @@
+import argparse
+import math
 import os
+import random
+import threading
+import time
 import yfinance as yf
 import pandas as pd
 import requests
 from dotenv import load_dotenv
-from datetime import datetime, timedelta
-import time
+from datetime import datetime, timedelta, timezone
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from http_client import TokenBucket, create_session
+from collection_state import CollectionState
+from universe import UNIVERSE_PATH, load_universe, universe_query
+from storage import write_dataset, flatten_yfinance_prices
+from price_store import PriceStore, to_day
+from catalog import Catalog
+from instrumentation import in_current_stage, record_http, record_throttle, stage, start_run
 
 load_dotenv()
 
-# Configurações da NewsAPI.org
+# Configurações da NewsAPI.org (a chave só é exigida ao executar o script)
 NEWSAPI_KEY = os.getenv("NEWSAPI_KEY")  # Nova chave para newsapi.org
-if not NEWSAPI_KEY:
-    raise ValueError("Chave da NEWSAPI_KEY não encontrada. Verifique seu arquivo .env")
+
+# Endereços dos serviços; apontam para o servidor local de scripts/newsapi_standin.py em testes de carga
+NEWSAPI_BASE_URL = os.getenv("NEWSAPI_BASE_URL", "https://newsapi.org/v2").rstrip('/')
+PRICES_BASE_URL = os.getenv("PRICES_BASE_URL")  # Sem valor, os preços vêm do yfinance
 
 TICKER = "PETR4.SA"
 SEARCH_TERM = "Petrobras"
 END_DATE = datetime.now()
 START_DATE = END_DATE - timedelta(days=30)  # Reduzido para 30 dias para evitar problemas
 
+# Coleta concorrente: número de threads e limite de requisições por segundo
+MAX_WORKERS = 8
+REQUESTS_PER_SECOND = 5
+UNIVERSE_WORKERS = 4  # Tickers coletados simultaneamente no modo universo
+
+NEWSAPI_EVERYTHING_URL = f"{NEWSAPI_BASE_URL}/everything"
+NEWSAPI_HEADLINES_URL = f"{NEWSAPI_BASE_URL}/top-headlines"
+
+# Novas tentativas para limite de taxa (429) e erros do servidor, com espera exponencial
+RETRY_STATUS = (429, 500, 502, 503, 504)
+MAX_RETRIES = 3
+BACKOFF_SECONDS = 1.0
+MAX_BACKOFF_SECONDS = 60.0
+NEWS_COLUMNS = ['publishedAt', 'title', 'body', 'url', 'source', 'description']
+
+# Planejamento das consultas ao /everything: janelas largas paginadas, divididas só quando necessário
+NEWSAPI_PAGE_SIZE = 100  # Máximo de artigos por página aceito pela NewsAPI.org
+NEWSAPI_MAX_RESULTS = int(os.getenv("NEWSAPI_MAX_RESULTS", "100"))  # Resultados alcançáveis paginando (plano developer: 100)
+MIN_WINDOW = timedelta(hours=1)  # Menor janela; acima do limite nela, o excedente não é coletado
+
+# Headers adequados para a API
+NEWSAPI_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
+    'Accept': 'application/json',
+    'Accept-Encoding': 'gzip, deflate',
+    'Connection': 'keep-alive'
+}
+
 RAW_DATA_PATH = os.path.join(os.path.dirname(__file__), '..', 'data', 'raw')
 os.makedirs(RAW_DATA_PATH, exist_ok=True)
+STORE_START_SLACK_DAYS = 4  # Dias sem pregão (fim de semana + feriado) tolerados antes do primeiro preço local
+STORE_MAX_GAP_DAYS = 5  # Maior intervalo entre pregões sem buraco nos dados (ex.: sexta -> quarta de Cinzas)
+STORE_REFRESH_SESSIONS = 2  # Últimos pregões gravados que são baixados de novo, para corrigir barras parciais
 
 # --- Funções de Coleta ---
 
-def fetch_stock_prices(ticker, start, end):
+def fetch_stock_prices(ticker, start, end, interval='1d'):
     """
     Busca dados históricos de preços de ações usando o yfinance.
+
+    `interval` aceita os intervalos do yfinance ('1d', '1h', '5m', ...); barras
+    intradiárias são salvas à parte (ver `_save_stock_prices`). O yfinance só
+    fornece barras de 5 minutos dos últimos 60 dias e de 1 hora dos últimos 730.
     """
-    print(f"Buscando preços das ações para {ticker} de {start.strftime('%Y-%m-%d')} a {end.strftime('%Y-%m-%d')}...")
-    try:
-        stock_data = yf.download(ticker, start=start, end=end, progress=False)
-        if stock_data.empty:
-            print(f"Nenhum dado encontrado para {ticker}.")
+    print(f"Buscando preços ({interval}) das ações para {ticker} de {start.strftime('%Y-%m-%d')} a {end.strftime('%Y-%m-%d')}...")
+    with stage('fetch_stock_prices') as s:
+        try:
+            if interval == '1d':
+                stock_data = _download_missing_prices(ticker, start, end)
+            else:
+                stock_data = _download_prices(ticker, start, end, interval)
+            if stock_data.empty:
+                print(f"Nenhum dado encontrado para {ticker}.")
+                return None
+            # Salva os dados em um arquivo CSV
+            _save_stock_prices(stock_data, ticker, interval)
+            s.rows_out = len(stock_data)
+            return stock_data
+        except Exception as e:
+            print(f"Erro ao buscar dados de ações: {e}")
             return None
-        # Salva os dados em um arquivo CSV
-        filename = f"{ticker}_prices_{END_DATE.strftime('%Y%m%d')}.csv"
+
+def _download_missing_prices(ticker, start, end):
+    """
+    Preços diários de [start, end) usando o armazenamento local (data/prices) como base.
+
+    Se o armazenamento cobre o período desde o início, sem buracos, baixa de
+    novo apenas os últimos STORE_REFRESH_SESSIONS pregões gravados (o último
+    pode ter sido gravado com o pregão em andamento) e os posteriores, e monta
+    o resultado a partir dele; caso contrário, baixa o período inteiro.
+    """
+    store = PriceStore()
+    series = store.load(ticker)
+    start_day = to_day([start])[0]
+    if (not len(series) or series.day[0] > start_day + STORE_START_SLACK_DAYS
+            or series._slice(start_day, None).largest_gap() > STORE_MAX_GAP_DAYS):
+        return _download_prices(ticker, start, end)
+    refresh_day = series.day[max(0, len(series) - STORE_REFRESH_SESSIONS)]
+    download_start = max(start, pd.Timestamp(refresh_day.astype('datetime64[D]')).to_pydatetime())
+    if download_start.date() < end.date():
+        new_data = _download_prices(ticker, download_start, end)
+        if not new_data.empty:
+            store.append(ticker, flatten_yfinance_prices(new_data))
+    else:
+        print(f"Preços de {ticker} já presentes em data/prices; nada a baixar.")
+    # `end` é exclusivo, como no yfinance
+    return store.load(ticker).slice(start, end - timedelta(days=1)).to_yfinance()
+
+def _download_prices(tickers, start, end, interval='1d'):
+    """
+    Baixa preços no formato do yfinance, registrando a duração e o resultado no relatório da execução.
+
+    Com PRICES_BASE_URL definido, os preços vêm de um servidor compatível com a
+    API de gráficos do Yahoo (ex.: scripts/newsapi_standin.py) em vez do yfinance.
+    """
+    if PRICES_BASE_URL:
+        return _download_prices_chart_api(tickers, start, end, interval)
+    request_start = time.perf_counter()
+    try:
+        stock_data = yf.download(tickers, start=start, end=end, interval=interval, progress=False)
+    except Exception:
+        record_http('yfinance', 'error', time.perf_counter() - request_start)
+        raise
+    record_http('yfinance', 200, time.perf_counter() - request_start)
+    return stock_data
+
+def _download_prices_chart_api(tickers, start, end, interval='1d'):
+    """
+    Busca preços em PRICES_BASE_URL/v8/finance/chart e monta o DataFrame do yfinance (Price/Ticker).
+
+    Barras diárias são indexadas pela data; intradiárias, pelo horário em UTC.
+    """
+    frames = []
+    with create_session() as session:
+        for ticker in [tickers] if isinstance(tickers, str) else tickers:
+            params = {'period1': int(start.timestamp()), 'period2': int(end.timestamp()), 'interval': interval}
+            request_start = time.perf_counter()
+            try:
+                response = session.get(f"{PRICES_BASE_URL}/v8/finance/chart/{ticker}", params=params, timeout=30)
+            except requests.exceptions.RequestException:
+                record_http('yfinance', 'error', time.perf_counter() - request_start)
+                raise
+            record_http('yfinance', response.status_code, time.perf_counter() - request_start)
+            response.raise_for_status()
+            result = response.json()['chart']['result'][0]
+            quote = result['indicators']['quote'][0]
+            if interval == '1d':
+                dates = pd.to_datetime(result.get('timestamp', []), unit='s').normalize().rename('Date')
+            else:
+                dates = pd.to_datetime(result.get('timestamp', []), unit='s', utc=True).rename('Datetime')
+            frame = pd.DataFrame({'Close': quote['close'], 'High': quote['high'], 'Low': quote['low'],
+                                  'Open': quote['open'], 'Volume': quote['volume']}, index=dates)
+            frame.columns = pd.MultiIndex.from_product([frame.columns, [ticker]], names=['Price', 'Ticker'])
+            frames.append(frame)
+    return pd.concat(frames, axis=1) if frames else pd.DataFrame()
+
+def _save_stock_prices(stock_data, ticker, interval='1d'):
+    """
+    Salva os preços de um ticker no CSV datado, no formato do yfinance.
+
+    Barras intradiárias vão para `<ticker>_prices_<intervalo>_<data>.csv` e
+    para o dataset Parquet `intraday`, sem misturar com os preços diários.
+    """
+    if interval != '1d':
+        filename = f"{ticker}_prices_{interval}_{END_DATE.strftime('%Y%m%d')}.csv"
         stock_data.to_csv(os.path.join(RAW_DATA_PATH, filename))
-        print(f"Dados de preços salvos em: {filename}")
-        return stock_data
-    except Exception as e:
-        print(f"Erro ao buscar dados de ações: {e}")
-        return None
+        Catalog().register(os.path.join(RAW_DATA_PATH, filename), 'prices_intraday', stock_data, ticker=ticker)
+        bars = flatten_yfinance_prices(stock_data).rename(columns={'Date': 'Datetime'})
+        bars.insert(1, 'interval', interval)
+        write_dataset(bars, 'intraday', ticker)
+        print(f"Barras de {interval} salvas em: {filename} (e em data/parquet/intraday)")
+        return
+    filename = f"{ticker}_prices_{END_DATE.strftime('%Y%m%d')}.csv"
+    stock_data.to_csv(os.path.join(RAW_DATA_PATH, filename))
+    Catalog().register(os.path.join(RAW_DATA_PATH, filename), 'prices', stock_data, ticker=ticker)
+    write_dataset(flatten_yfinance_prices(stock_data), 'prices', ticker)
+    PriceStore().append(ticker, flatten_yfinance_prices(stock_data))
+    print(f"Dados de preços salvos em: {filename} (e em data/parquet/prices e data/prices)")
 
-def fetch_newsapi_news_fixed(api_key, query, start_date, end_date):
+def _append_stock_prices(stock_data, ticker):
     """
-    Busca notícias usando a NewsAPI.org com headers corretos.
+    Anexa preços novos ao CSV acumulado do ticker.
+
+    O arquivo mantém o formato do yfinance (cabeçalho de três linhas) para que
+    o processador continue lendo-o da mesma forma. Pregões baixados de novo
+    são anexados outra vez, e quem lê o arquivo fica com a última linha de
+    cada data.
     """
-    print(f"Buscando notícias para '{query}' na NewsAPI.org...")
-    
-    # URL base da NewsAPI.org
-    base_url = "https://newsapi.org/v2/everything"
+    filename = f"{ticker}_prices_incremental.csv"
+    file_path = os.path.join(RAW_DATA_PATH, filename)
+    if os.path.exists(file_path):
+        # Mantém a ordem de colunas do arquivo existente
+        existing_columns = list(pd.read_csv(file_path, nrows=0).columns[1:])
+        stock_data[existing_columns].to_csv(file_path, mode='a', header=False)
+    else:
+        stock_data.to_csv(file_path)
+    Catalog().register(file_path, 'prices_incremental', stock_data, ticker=ticker, append=True)
+    write_dataset(flatten_yfinance_prices(stock_data), 'prices', ticker)
+    PriceStore().append(ticker, flatten_yfinance_prices(stock_data))
+    print(f"{len(stock_data)} pregões anexados em: {filename}")
+
+def fetch_stock_prices_batch(tickers, start, end, state=None):
+    """
+    Busca os preços de vários tickers em uma única chamada ao yfinance.
+
+    O resultado é separado por ticker e salvo em um CSV por símbolo, no mesmo
+    formato de `fetch_stock_prices`. Com `state`, funciona em modo incremental:
+    a chamada começa na menor marca d'água entre os tickers e cada um recebe
+    os pregões a partir do seu último preço salvo, que é baixado de novo
+    para substituir uma barra gravada com o pregão em andamento.
+    Retorna {ticker: DataFrame}.
+    """
+    if state is not None:
+        watermarks = [state.last_price_date(ticker) for ticker in tickers]
+        if all(watermarks):
+            start = max(start, datetime.strptime(min(watermarks), '%Y-%m-%d'))
+        if start >= end:
+            print("Preços de todos os tickers já atualizados.")
+            return {}
     
-    # Headers adequados para a API
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
-        'Accept': 'application/json',
-        'Accept-Encoding': 'gzip, deflate',
-        'Connection': 'keep-alive'
-    }
+    print(f"Buscando preços de {len(tickers)} tickers de {start.strftime('%Y-%m-%d')} a {end.strftime('%Y-%m-%d')}...")
+    try:
+        with stage('fetch_stock_prices_batch', rows_in=len(tickers)) as s:
+            all_data = _download_prices(tickers, start, end)
+            s.rows_out = len(all_data)
+    except Exception as e:
+        print(f"Erro ao buscar dados de ações: {e}")
+        return {}
+    if all_data.empty:
+        print("Nenhum dado de preços encontrado.")
+        return {}
     
+    prices = {}
+    for ticker in tickers:
+        if ticker not in all_data.columns.get_level_values('Ticker'):
+            print(f"Nenhum dado encontrado para {ticker}.")
+            continue
+        # Mantém as colunas (Price, Ticker) para que o arquivo tenha o mesmo formato de um download individual
+        stock_data = all_data.xs(ticker, axis=1, level='Ticker', drop_level=False).dropna(how='all')
+        if state is not None:
+            watermark = state.last_price_date(ticker)
+            if watermark is not None:
+                stock_data = stock_data[stock_data.index >= watermark]
+            if stock_data.empty:
+                continue
+            _append_stock_prices(stock_data, ticker)
+            state.update_last_price_date(ticker, stock_data.index.max().strftime('%Y-%m-%d'))
+        else:
+            _save_stock_prices(stock_data, ticker)
+        prices[ticker] = stock_data
+    return prices
+
+def _parse_newsapi_articles(data):
+    """Converte os artigos de uma resposta da NewsAPI.org para o formato do pipeline."""
     articles = []
-    current_date = start_date
-    
-    while current_date <= end_date:
-        # Busca por dia para evitar limites da API
-        date_str = current_date.strftime('%Y-%m-%d')
-        
-        print(f"Buscando notícias para {date_str}...")
-        
-        # Parâmetros da requisição
+    for article in data.get('articles', []):
+        articles.append({
+            'publishedAt': article.get('publishedAt', ''),
+            'title': article.get('title', ''),
+            'body': article.get('content', ''),  # NewsAPI usa 'content' em vez de 'body'
+            'url': article.get('url', ''),
+            'source': (article.get('source') or {}).get('name', ''),
+            'description': article.get('description', '')
+        })
+    return articles
+
+def _retry_delay(response, attempt):
+    """Espera antes da próxima tentativa: o Retry-After do servidor ou espera exponencial com variação aleatória."""
+    retry_after = response.headers.get('Retry-After', '')
+    if retry_after.isdigit():
+        return min(float(retry_after), MAX_BACKOFF_SECONDS)
+    return min(BACKOFF_SECONDS * 2 ** attempt * random.uniform(1.0, 1.25), MAX_BACKOFF_SECONDS)
+
+def _newsapi_get(session, limiter, params, headers=None, retry=False, url=NEWSAPI_EVERYTHING_URL):
+    """
+    Faz uma requisição à NewsAPI.org (padrão: /everything) passando pelo limitador de taxa.
+
+    Respostas 429 e 5xx são repetidas até MAX_RETRIES vezes, respeitando o
+    Retry-After quando presente. A espera no limitador, a latência e o status
+    de cada tentativa são registrados no relatório da execução; `retry` marca
+    a chamada como nova tentativa (ex.: o fallback do erro 426).
+    """
+    for attempt in range(MAX_RETRIES + 1):
+        wait_start = time.perf_counter()
+        limiter.acquire()
+        record_throttle('newsapi', time.perf_counter() - wait_start)
+        request_start = time.perf_counter()
+        try:
+            response = session.get(url, params=params, headers=headers, timeout=30)
+        except requests.exceptions.RequestException:
+            record_http('newsapi', 'error', time.perf_counter() - request_start, retry or attempt > 0)
+            raise
+        record_http('newsapi', response.status_code, time.perf_counter() - request_start, retry or attempt > 0)
+        if response.status_code not in RETRY_STATUS or attempt == MAX_RETRIES:
+            return response
+        delay = _retry_delay(response, attempt)
+        print(f"HTTP {response.status_code} para {params.get('from') or url}; nova tentativa em {delay:.1f}s...")
+        time.sleep(delay)
+
+def _is_day_aligned(moment):
+    return moment == datetime.combine(moment.date(), datetime.min.time())
+
+def _window_params(window):
+    """
+    Parâmetros from/to (inclusivos) de uma janela [início, fim).
+
+    Janelas de dias inteiros usam datas (YYYY-MM-DD); frações de dia, data e hora em UTC.
+    """
+    start, end = window
+    if _is_day_aligned(start) and _is_day_aligned(end):
+        return {'from': start.strftime('%Y-%m-%d'), 'to': (end - timedelta(days=1)).strftime('%Y-%m-%d')}
+    return {'from': start.strftime('%Y-%m-%dT%H:%M:%S'), 'to': (end - timedelta(seconds=1)).strftime('%Y-%m-%dT%H:%M:%S')}
+
+def _window_label(window):
+    params = _window_params(window)
+    return params['from'] if params['from'] == params['to'] else f"{params['from']} a {params['to']}"
+
+def _date_windows(dates):
+    """Agrupa dias (YYYY-MM-DD) consecutivos em janelas [início, fim)."""
+    windows = []
+    for date_str in sorted(dates):
+        day = datetime.strptime(date_str, '%Y-%m-%d')
+        if windows and windows[-1][1] == day:
+            windows[-1] = (windows[-1][0], day + timedelta(days=1))
+        else:
+            windows.append((day, day + timedelta(days=1)))
+    return windows
+
+def _split_window(window, parts):
+    """
+    Divide uma janela em até `parts` partes de tamanho próximo.
+
+    Janelas de vários dias são cortadas nas viradas de dia; um único dia é
+    cortado em múltiplos de MIN_WINDOW.
+    """
+    start, end = window
+    unit = timedelta(days=1) if _is_day_aligned(start) and end - start > timedelta(days=1) else MIN_WINDOW
+    units = (end - start) // unit
+    parts = max(2, min(parts, units))
+    cuts = [start + unit * round(i * units / parts) for i in range(parts)] + [end]
+    return list(zip(cuts[:-1], cuts[1:]))
+
+def _published_at(article):
+    """Instante de publicação (UTC, sem fuso) de um artigo, ou None se `publishedAt` for inválido."""
+    try:
+        moment = datetime.fromisoformat((article.get('publishedAt') or '').replace('Z', '+00:00'))
+    except ValueError:
+        return None
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(timezone.utc).replace(tzinfo=None)
+    return moment
+
+def _window_days(window):
+    """Dias (YYYY-MM-DD) tocados por uma janela e o trecho de cada um que ela cobre."""
+    start, end = window
+    day = datetime.combine(start.date(), datetime.min.time())
+    while day < end:
+        next_day = day + timedelta(days=1)
+        yield day.strftime('%Y-%m-%d'), min(end, next_day) - max(start, day)
+        day = next_day
+
+class NewsApiPlanner:
+    """
+    Planejador das consultas ao /everything da NewsAPI.org.
+
+    Em vez de uma requisição por dia, pede janelas de datas largas com o
+    tamanho máximo de página e percorre as páginas. Uma janela só é dividida
+    quando o total informado pela API (`totalResults`) passa do que a
+    paginação alcança (NEWSAPI_MAX_RESULTS); o número de partes acompanha o
+    excesso, e cada parte é dividida de novo se ainda exceder, até MIN_WINDOW.
+    As janelas são buscadas em paralelo por threads que compartilham a sessão
+    e o limitador de taxa.
+    """
+
+    def __init__(self, session, limiter, api_key, query, max_results=NEWSAPI_MAX_RESULTS,
+                 page_size=NEWSAPI_PAGE_SIZE):
+        self.session = session
+        self.limiter = limiter
+        self.api_key = api_key
+        self.query = query
+        self.max_results = max_results
+        self.page_size = min(page_size, max_results)
+        self._lock = threading.Lock()
+        self.stats = {'requests': 0, 'windows': 0, 'splits': 0, 'resumed': 0, 'truncated': 0, 'out_of_window': 0}
+
+    def _count(self, key, value=1):
+        with self._lock:
+            self.stats[key] += value
+
+    def _get_page(self, window, page):
+        """
+        Busca uma página de uma janela e retorna a resposta (com `articles` já convertidos) ou None.
+
+        O fallback para o erro 426 e o tratamento de erros são aplicados por
+        requisição, de modo que a falha de uma janela não interrompe as demais.
+        """
+        label = _window_label(window) + (f" (página {page})" if page > 1 else '')
         params = {
-            'q': query,
-            'from': date_str,
-            'to': date_str,
+            'q': self.query,
+            **_window_params(window),
             'language': 'pt',  # Português
             'sortBy': 'publishedAt',
-            'pageSize': 5,  # Reduzido para 5 artigos por dia
-            'apiKey': api_key
+            'pageSize': self.page_size,
+            'page': page,
+            'apiKey': self.api_key
         }
         
         try:
-            # Faz a requisição com headers adequados
-            response = requests.get(
-                base_url, 
-                params=params, 
-                headers=headers,
-                timeout=30  # Timeout de 30 segundos
-            )
+            # Faz a requisição com headers adequados (timeout de 30 segundos)
+            self._count('requests')
+            response = _newsapi_get(self.session, self.limiter, params, headers=NEWSAPI_HEADERS)
+            if response.status_code == 426:
+                print(f"Erro 426 (Upgrade Required) para {label}. Tentando com headers diferentes...")
+                # Tenta sem alguns headers
+                self._count('requests')
+                response = _newsapi_get(self.session, self.limiter, params, retry=True)
             
             # Verifica o status da resposta
             if response.status_code == 200:
                 data = response.json()
-                
                 if data['status'] == 'ok':
-                    day_articles = data.get('articles', [])
-                    print(f"Encontradas {len(day_articles)} notícias para {date_str}")
-                    
-                    for article in day_articles:
-                        articles.append({
-                            'publishedAt': article.get('publishedAt', ''),
-                            'title': article.get('title', ''),
-                            'body': article.get('content', ''),  # NewsAPI usa 'content' em vez de 'body'
-                            'url': article.get('url', ''),
-                            'source': article.get('source', {}).get('name', ''),
-                            'description': article.get('description', '')
-                        })
-                else:
-                    print(f"Erro na API para {date_str}: {data.get('message', 'Erro desconhecido')}")
-            elif response.status_code == 426:
-                print(f"Erro 426 (Upgrade Required) para {date_str}. Tentando com headers diferentes...")
-                # Tenta sem alguns headers
-                response = requests.get(
-                    base_url, 
-                    params=params, 
-                    timeout=30
-                )
-                if response.status_code == 200:
-                    data = response.json()
-                    if data['status'] == 'ok':
-                        day_articles = data.get('articles', [])
-                        print(f"Encontradas {len(day_articles)} notícias para {date_str} (segunda tentativa)")
-                        for article in day_articles:
-                            articles.append({
-                                'publishedAt': article.get('publishedAt', ''),
-                                'title': article.get('title', ''),
-                                'body': article.get('content', ''),
-                                'url': article.get('url', ''),
-                                'source': article.get('source', {}).get('name', ''),
-                                'description': article.get('description', '')
-                            })
+                    data['articles'] = _parse_newsapi_articles(data)
+                    return data
+                print(f"Erro na API para {label}: {data.get('message', 'Erro desconhecido')}")
             else:
-                print(f"Erro HTTP {response.status_code} para {date_str}: {response.text}")
+                print(f"Erro HTTP {response.status_code} para {label}: {response.text}")
                 
         except requests.exceptions.RequestException as e:
-            print(f"Erro na requisição para {date_str}: {e}")
+            print(f"Erro na requisição para {label}: {e}")
         except Exception as e:
-            print(f"Erro inesperado para {date_str}: {e}")
+            print(f"Erro inesperado para {label}: {e}")
+        return None
+
+    def fetch(self, window):
+        """
+        Busca todas as páginas de uma janela.
+
+        Retorna (janela coberta, artigos, subjanelas a buscar):
+        - (janela, artigos, []) quando todas as páginas responderam;
+        - (None, None, subjanelas) se o total passar do alcance da paginação;
+        - (janela, None, []) se a primeira página falhou (artigos None indicam
+          falha, diferente de uma janela sem notícias).
+        Se uma página seguinte falhar, as já recebidas são mantidas: como vêm
+        da mais recente para a mais antiga, cobrem o fim da janela até a hora
+        da notícia mais antiga, e só o início da janela é buscado de novo.
+        """
+        print(f"Buscando notícias para {_window_label(window)}...")
+        data = self._get_page(window, 1)
+        if data is None:
+            return window, None, []
+        total = int(data.get('totalResults') or 0)
+        if total > self.max_results and window[1] - window[0] > MIN_WINDOW:
+            self._count('splits')
+            return None, None, _split_window(window, math.ceil(total / self.max_results))
         
-        # Pausa para evitar rate limiting
-        time.sleep(1)  # Aumentado para 1 segundo entre requisições
+        articles = data['articles']
+        pages = math.ceil(min(total, self.max_results) / self.page_size)
+        for page in range(2, pages + 1):
+            data = self._get_page(window, page)
+            if data is None:
+                return self._keep_fetched(window, articles)
+            if not data['articles']:
+                break
+            articles.extend(data['articles'])
+        if total > self.max_results:
+            # Janela mínima ainda acima do limite: o excedente fica de fora
+            self._count('truncated', total - len(articles))
+            print(f"Aviso: {total - len(articles)} notícias de {_window_label(window)} além do alcance da paginação")
+        self._count('windows')
+        print(f"Encontradas {len(articles)} notícias para {_window_label(window)}")
+        return window, articles, []
+
+    def _keep_fetched(self, window, articles):
+        """
+        Resultado de uma janela cuja paginação falhou no meio.
+
+        As horas inteiras depois da notícia mais antiga recebida estão
+        completas e viram a janela coberta; o restante, do início da janela
+        até o fim dessa hora, volta para a fila. Sem horas completas, a
+        janela inteira falha.
+        """
+        start, end = window
+        published = [(article, _published_at(article)) for article in articles]
+        moments = [moment for _, moment in published if moment is not None]
+        if moments:
+            cut = min(moments).replace(minute=0, second=0, microsecond=0) + MIN_WINDOW
+            if start < cut < end:
+                kept = [article for article, moment in published if moment is not None and moment >= cut]
+                self._count('windows')
+                self._count('resumed')
+                print(f"Paginação interrompida em {_window_label(window)}: {len(kept)} notícias mantidas; "
+                      f"buscando de novo {_window_label((start, cut))}")
+                return (cut, end), kept, [(start, cut)]
+        return window, None, []
+
+    def collect(self, windows, max_workers=MAX_WORKERS):
+        """
+        Gera (janela, artigos ou None) das janelas finais, na ordem em que são concluídas.
+
+        Subjanelas de uma janela dividida, ou o início de uma janela cuja
+        paginação falhou no meio, entram na fila assim que ela responde. Se o consumidor parar antes do fim, as janelas ainda não
+        iniciadas são canceladas.
+        """
+        # As requisições das threads contam para a etapa que consome o gerador
+        fetch = in_current_stage(self.fetch)
+        executor = ThreadPoolExecutor(max_workers=max_workers)
+        try:
+            pending = {executor.submit(fetch, window): window for window in windows}
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    pending.pop(future)
+                    covered, articles, parts = future.result()
+                    for part in parts:
+                        pending[executor.submit(fetch, part)] = part
+                    if covered is not None:
+                        yield covered, articles
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+def stream_newsapi_days(api_key, query, dates, max_workers=MAX_WORKERS,
+                        requests_per_second=REQUESTS_PER_SECOND, limiter=None, stats=None):
+    """
+    Gera (dia, artigos ou None) na ordem em que os dias ficam completos.
+
+    Os dias consecutivos viram janelas do `NewsApiPlanner`; um dia está
+    completo quando todas as janelas que o cobrem responderam, e é None se
+    alguma delas falhou. Notícias com `publishedAt` fora dos dias da janela
+    (fuso ou data malformada) entram no dia mais próximo dela e são contadas
+    em `out_of_window`. Os contadores do planejador (requisições, janelas,
+    divisões) são copiados para `stats` ao final. Um `limiter` externo
+    permite que várias coletas simultâneas dividam a mesma cota.
+    """
+    if limiter is None:
+        limiter = TokenBucket(requests_per_second)
+    with create_session(pool_size=max_workers) as session:
+        planner = NewsApiPlanner(session, limiter, api_key, query)
+        # dia -> [artigos ou None, trecho do dia ainda sem resposta]
+        pending = {}
+        try:
+            for window, articles in planner.collect(_date_windows(dates), max_workers):
+                days = dict(_window_days(window))
+                for day, covered in days.items():
+                    entry = pending.setdefault(day, [[], timedelta(days=1)])
+                    if articles is None:
+                        entry[0] = None
+                    entry[1] -= covered
+                first, last = min(days), max(days)
+                for article in articles or []:
+                    day = (article.get('publishedAt') or '')[:10]
+                    if day not in days:
+                        planner._count('out_of_window')
+                        day = first if day < first else last
+                    if pending[day][0] is not None:
+                        pending[day][0].append(article)
+                for day in days:
+                    if pending[day][1] <= timedelta(0):
+                        yield day, pending.pop(day)[0]
+        finally:
+            if stats is not None:
+                stats.update(planner.stats)
+
+def report_newsapi_plan(record, plan, articles):
+    """Registra na etapa (`record`) e imprime as requisições feitas e as requisições por notícia coletada."""
+    per_article = round(plan['requests'] / articles, 4) if articles else None
+    record.update(plan, requests_per_article=per_article)
+    print(f"NewsAPI: {plan['requests']} requisições para {articles} notícias "
+          f"({per_article if per_article is not None else '-'} por notícia; "
+          f"{plan['windows']} janelas, {plan['splits']} divididas, {plan['resumed']} retomadas)")
+    if plan['truncated']:
+        print(f"Aviso: {plan['truncated']} notícias ficaram além do alcance da paginação (NEWSAPI_MAX_RESULTS)")
+    if plan['out_of_window']:
+        print(f"Aviso: {plan['out_of_window']} notícias com data fora da janela consultada foram atribuídas ao dia mais próximo")
+
+def _collect_newsapi_days(api_key, query, dates, max_workers=MAX_WORKERS,
+                          requests_per_second=REQUESTS_PER_SECOND, limiter=None):
+    """
+    Busca uma lista de dias e retorna {dia: artigos ou None}, em ordem cronológica.
+
+    Os dias são agrupados em janelas largas e paginadas pelo `NewsApiPlanner`
+    (ver `stream_newsapi_days`). Com `max_workers=1` a coleta é sequencial. O
+    número de requisições por notícia coletada fica na etapa do relatório.
+    """
+    plan = {}
+    with stage('fetch_newsapi_days', rows_in=len(dates)) as s:
+        collected = dict(stream_newsapi_days(api_key, query, dates, max_workers, requests_per_second,
+                                             limiter, plan))
+        results = {date_str: collected.get(date_str) for date_str in dates}
+        s.rows_out = sum(len(day_articles) for day_articles in results.values() if day_articles)
+        report_newsapi_plan(s, plan, s.rows_out)
+    return results
+
+def _date_range(start_date, end_date):
+    """Lista os dias (YYYY-MM-DD) entre duas datas, inclusive."""
+    dates = []
+    current_date = start_date
+    while current_date <= end_date:
+        dates.append(current_date.strftime('%Y-%m-%d'))
         current_date += timedelta(days=1)
+    return dates
+
+def fetch_newsapi_news_fixed(api_key, query, start_date, end_date,
+                             max_workers=MAX_WORKERS, requests_per_second=REQUESTS_PER_SECOND,
+                             name=None, limiter=None, ticker=TICKER):
+    """
+    Busca notícias usando a NewsAPI.org com headers corretos.
+
+    O período é buscado em janelas largas e paginadas, divididas só quando a
+    paginação não alcança todos os resultados (ver `NewsApiPlanner`).
+    `name` define o prefixo do arquivo salvo (padrão: o próprio termo de busca);
+    `ticker` define a partição do dataset Parquet.
+    """
+    print(f"Buscando notícias para '{query}' na NewsAPI.org...")
+    
+    results = _collect_newsapi_days(api_key, query, _date_range(start_date, end_date),
+                                    max_workers, requests_per_second, limiter)
+    articles = [article for day_articles in results.values() if day_articles for article in day_articles]
     
     if not articles:
         print("Nenhuma notícia foi encontrada na NewsAPI.org.")
@@ -157,27 +647,138 @@ def fetch_newsapi_news_fixed(api_key, query, start_date, end_date):
             for source, count in source_counts.head(10).items():
                 print(f"  {source}: {count}")
     
-    filename = f"{query.replace(' ', '_')}_news_newsapi_fixed_{END_DATE.strftime('%Y%m%d')}.csv"
-    df.to_csv(os.path.join(RAW_DATA_PATH, filename), index=False)
-    print(f"Notícias salvas em: {filename}")
+    prefix = name or query.replace(' ', '_')
+    filename = f"{prefix}_news_newsapi_fixed_{END_DATE.strftime('%Y%m%d')}.csv"
+    with stage('write_news', rows_in=len(df)) as s:
+        df.to_csv(os.path.join(RAW_DATA_PATH, filename), index=False)
+        Catalog().register(os.path.join(RAW_DATA_PATH, filename), 'news', df, ticker=ticker, query=prefix)
+        write_dataset(df, 'news', ticker)
+        s.rows_out = len(df)
+    print(f"Notícias salvas em: {filename} (e em data/parquet/news)")
     return df
 
-def fetch_newsapi_headlines_fixed(api_key, query):
+def fetch_newsapi_news_incremental(api_key, query, start_date, end_date, state,
+                                   max_workers=MAX_WORKERS, requests_per_second=REQUESTS_PER_SECOND,
+                                   name=None, limiter=None, ticker=TICKER):
     """
-    Busca headlines atuais da NewsAPI.org com headers corretos.
+    Busca apenas os dias ainda não coletados e anexa as notícias novas ao dataset acumulado.
+
+    Dias anteriores a hoje que foram coletados com sucesso são registrados no
+    estado e não são buscados novamente; o dia corrente é sempre rebuscado por
+    estar incompleto. Artigos cujas URLs já estão no registro são descartados;
+    o registro esquece as URLs publicadas antes de `start_date`.
     """
-    print(f"Buscando headlines atuais para '{query}' na NewsAPI.org...")
+    print(f"Buscando notícias novas para '{query}' na NewsAPI.org (modo incremental)...")
     
-    # URL para top headlines
-    base_url = "https://newsapi.org/v2/top-headlines"
+    pruned = state.prune(query, start_date.strftime('%Y-%m-%d'))
+    if pruned:
+        print(f"{pruned} URLs anteriores à janela de busca removidas do registro")
+    known_days = state.news_days(query)
+    today_str = datetime.now().strftime('%Y-%m-%d')
+    missing_days = [d for d in _date_range(start_date, end_date) if d not in known_days or d >= today_str]
+    print(f"Dias a buscar: {len(missing_days)} (já coletados: {len(known_days)})")
+    if not missing_days:
+        return None
     
-    # Headers adequados
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
-        'Accept': 'application/json',
-        'Accept-Encoding': 'gzip, deflate',
-        'Connection': 'keep-alive'
-    }
+    results = _collect_newsapi_days(api_key, query, missing_days, max_workers, requests_per_second, limiter)
+    
+    fetched = [article for day_articles in results.values() for article in day_articles or [] if article['url']]
+    known_urls = state.seen_urls(query, [article['url'] for article in fetched])
+    new_articles = []
+    for article in fetched:
+        if article['url'] not in known_urls:
+            known_urls.add(article['url'])
+            new_articles.append(article)
+    
+    prefix = name or query.replace(' ', '_')
+    filename = f"{prefix}_news_newsapi_fixed_incremental.csv"
+    file_path = os.path.join(RAW_DATA_PATH, filename)
+    if new_articles:
+        df = pd.DataFrame(new_articles, columns=NEWS_COLUMNS)
+        with stage('write_news', rows_in=len(df)) as s:
+            df.to_csv(file_path, mode='a', header=not os.path.exists(file_path), index=False)
+            Catalog().register(file_path, 'news_incremental', df, ticker=ticker, query=prefix, append=True)
+            write_dataset(df, 'news', ticker)
+            s.rows_out = len(df)
+        print(f"{len(new_articles)} notícias novas anexadas em: {filename}")
+    else:
+        df = None
+        print("Nenhuma notícia nova encontrada.")
+    
+    # Somente dias completos e coletados com sucesso entram no registro
+    completed_days = [d for d, day_articles in results.items() if day_articles is not None and d < today_str]
+    state.add_news(query, completed_days,
+                   [(a['url'], (a['publishedAt'] or today_str)[:10]) for a in new_articles])
+    return df
+
+def fetch_stock_prices_incremental(ticker, start, end, state):
+    """
+    Busca os pregões a partir do último preço salvo e os anexa ao CSV acumulado.
+
+    O último pregão salvo é baixado de novo: se foi gravado com o pregão em
+    andamento, a nova linha o substitui (vale a última linha de cada data).
+    """
+    last_date = state.last_price_date(ticker)
+    if last_date is not None:
+        start = max(start, datetime.strptime(last_date, '%Y-%m-%d'))
+    if start >= end:
+        print(f"Preços de {ticker} já atualizados até {last_date}.")
+        return None
+    
+    print(f"Buscando preços novos para {ticker} de {start.strftime('%Y-%m-%d')} a {end.strftime('%Y-%m-%d')}...")
+    try:
+        with stage('fetch_stock_prices_incremental') as s:
+            stock_data = _download_prices(ticker, start, end)
+            if stock_data.empty:
+                print(f"Nenhum preço novo para {ticker}.")
+                return None
+            
+            _append_stock_prices(stock_data, ticker)
+            state.update_last_price_date(ticker, stock_data.index.max().strftime('%Y-%m-%d'))
+            s.rows_out = len(stock_data)
+            return stock_data
+    except Exception as e:
+        print(f"Erro ao buscar dados de ações: {e}")
+        return None
+
+def collect_universe(api_key, universe, start_date, end_date, state=None,
+                     ticker_workers=UNIVERSE_WORKERS, requests_per_second=REQUESTS_PER_SECOND):
+    """
+    Coleta preços e notícias para todos os tickers do universo.
+
+    Os preços vêm de um único download em lote; as notícias de cada ticker são
+    buscadas em paralelo, com um limitador de taxa único para respeitar a cota
+    da API. Com `state`, usa o modo incremental.
+    """
+    print(f"Coletando dados para {len(universe)} tickers...")
+    fetch_stock_prices_batch([entry['ticker'] for entry in universe], start_date, end_date, state)
+    
+    limiter = TokenBucket(requests_per_second)
+    
+    def collect_news(entry):
+        query = universe_query(entry)
+        with stage(f"collect_news:{entry['ticker']}") as s:
+            if state is not None:
+                df = fetch_newsapi_news_incremental(api_key, query, start_date, end_date, state,
+                                                    name=entry['name'], limiter=limiter,
+                                                    ticker=entry['ticker'])
+            else:
+                df = fetch_newsapi_news_fixed(api_key, query, start_date, end_date,
+                                              name=entry['name'], limiter=limiter, ticker=entry['ticker'])
+            s.rows_out = 0 if df is None else len(df)
+            return df
+    
+    with ThreadPoolExecutor(max_workers=ticker_workers) as executor:
+        list(executor.map(in_current_stage(collect_news), universe))
+
+def fetch_newsapi_headlines_fixed(api_key, query, requests_per_second=REQUESTS_PER_SECOND, limiter=None):
+    """
+    Busca headlines atuais da NewsAPI.org com headers corretos.
+
+    A requisição passa pela sessão com pool, pelo limitador de taxa e pelas
+    novas tentativas de `_newsapi_get`, como as consultas ao /everything.
+    """
+    print(f"Buscando headlines atuais para '{query}' na NewsAPI.org...")
     
     # Parâmetros da requisição
     params = {
@@ -187,36 +788,28 @@ def fetch_newsapi_headlines_fixed(api_key, query):
         'pageSize': 10,  # Máximo de 10 artigos
         'apiKey': api_key
     }
+    if limiter is None:
+        limiter = TokenBucket(requests_per_second)
     
     try:
-        response = requests.get(
-            base_url, 
-            params=params, 
-            headers=headers,
-            timeout=30
-        )
+        with create_session(pool_size=1) as session:
+            response = _newsapi_get(session, limiter, params, headers=NEWSAPI_HEADERS, url=NEWSAPI_HEADLINES_URL)
+            if response.status_code == 426:
+                print("Erro 426 (Upgrade Required) nas headlines. Tentando com headers diferentes...")
+                response = _newsapi_get(session, limiter, params, retry=True, url=NEWSAPI_HEADLINES_URL)
         
         if response.status_code == 200:
             data = response.json()
             
             if data['status'] == 'ok':
-                articles = data.get('articles', [])
-                print(f"Encontradas {len(articles)} headlines atuais")
+                headlines_data = _parse_newsapi_articles(data)
+                print(f"Encontradas {len(headlines_data)} headlines atuais")
                 
-                headlines_data = []
-                for article in articles:
-                    headlines_data.append({
-                        'publishedAt': article.get('publishedAt', ''),
-                        'title': article.get('title', ''),
-                        'body': article.get('content', ''),
-                        'url': article.get('url', ''),
-                        'source': article.get('source', {}).get('name', ''),
-                        'description': article.get('description', '')
-                    })
-                
-                df = pd.DataFrame(headlines_data)
+                df = pd.DataFrame(headlines_data, columns=NEWS_COLUMNS)
                 filename = f"{query.replace(' ', '_')}_headlines_newsapi_fixed_{END_DATE.strftime('%Y%m%d')}.csv"
                 df.to_csv(os.path.join(RAW_DATA_PATH, filename), index=False)
+                Catalog().register(os.path.join(RAW_DATA_PATH, filename), 'headlines', df,
+                                   query=query.replace(' ', '_'))
                 print(f"Headlines salvas em: {filename}")
                 return df
             else:
@@ -236,15 +829,41 @@ def fetch_newsapi_headlines_fixed(api_key, query):
 # --- Execução Principal ---
 if __name__ == "__main__":
     print("--- Iniciando Pipeline de Coleta de Dados (NewsAPI.org - Versão Corrigida) ---")
-    print(f"Período de busca: {START_DATE.strftime('%Y-%m-%d')} a {END_DATE.strftime('%Y-%m-%d')}")
+    parser = argparse.ArgumentParser(description="Coleta notícias da NewsAPI.org e preços do yfinance.")
+    parser.add_argument('--incremental', action='store_true',
+                        help="Busca apenas dias e preços ainda não coletados e anexa aos arquivos acumulados")
+    parser.add_argument('--universe', nargs='?', const=UNIVERSE_PATH, default=None,
+                        help="Coleta todos os tickers do arquivo de universo (padrão: config/universe.json)")
+    args = parser.parse_args()
     
-    # Coleta dados de ações
-    fetch_stock_prices(TICKER, START_DATE, END_DATE)
+    if not NEWSAPI_KEY:
+        raise ValueError("Chave da NEWSAPI_KEY não encontrada. Verifique seu arquivo .env")
     
-    # Coleta notícias históricas
-    fetch_newsapi_news_fixed(NEWSAPI_KEY, SEARCH_TERM, START_DATE, END_DATE)
+    print(f"Período de busca: {START_DATE.strftime('%Y-%m-%d')} a {END_DATE.strftime('%Y-%m-%d')}")
+    report = start_run('collector', vars(args))
     
-    # Coleta headlines atuais
-    fetch_newsapi_headlines_fixed(NEWSAPI_KEY, SEARCH_TERM)
+    try:
+        if args.universe:
+            state = CollectionState() if args.incremental else None
+            collect_universe(NEWSAPI_KEY, load_universe(args.universe), START_DATE, END_DATE, state)
+        elif args.incremental:
+            # O progresso é gravado a cada etapa, mesmo se a seguinte falhar
+            state = CollectionState()
+            fetch_stock_prices_incremental(TICKER, START_DATE, END_DATE, state)
+            fetch_newsapi_news_incremental(NEWSAPI_KEY, SEARCH_TERM, START_DATE, END_DATE, state)
+        else:
+            # Coleta dados de ações
+            fetch_stock_prices(TICKER, START_DATE, END_DATE)
+            
+            # Coleta notícias históricas
+            fetch_newsapi_news_fixed(NEWSAPI_KEY, SEARCH_TERM, START_DATE, END_DATE)
+        
+        # Coleta headlines atuais
+        with stage('fetch_newsapi_headlines') as s:
+            headlines = fetch_newsapi_headlines_fixed(NEWSAPI_KEY, SEARCH_TERM)
+            s.rows_out = 0 if headlines is None else len(headlines)
+    finally:
+        # O relatório é gravado mesmo quando a coleta falha
+        print(f"Relatório da execução salvo em: {report.save()}")
     
     print("--- Pipeline de Coleta de Dados Finalizado ---") 
\ No newline at end of file
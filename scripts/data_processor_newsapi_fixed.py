@@ -1,6 +1,22 @@
+import argparse
+import io
 import os
+import numpy as np
 import pandas as pd
 from datetime import datetime, timedelta
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from functools import partial
+
+from sentiment_lexicon import DEFAULT_LEXICON
+from sentiment_model import MODEL_PATH, SCORERS, load_scorer
+from universe import UNIVERSE_PATH, load_universe
+from storage import flatten_yfinance_prices, list_tickers, read_dataset, write_dataset
+from score_cache import ScoreCache
+from dedup import deduplicate_articles
+from instrumentation import stage, start_run
+from processor_state import AggregateStore
+from catalog import Catalog
+from price_store import PriceStore
 
 # --- Configurações ---
 BASE_PATH = os.path.dirname(__file__)
@@ -11,99 +27,101 @@ os.makedirs(FINAL_DATA_PATH, exist_ok=True)
 TODAY_STR = datetime.now().strftime('%Y%m%d')
 SEARCH_TERM = "Petrobras"
 TICKER = "PETR4.SA"
+CHUNK_SIZE = 50_000  # Notícias por bloco no modo --stream
+NEWS_INPUT_COLUMNS = ['publishedAt', 'title', 'description', 'body', 'url']  # Colunas lidas do Parquet
+PROFILE_STAGE = 'analyze_sentiment'  # Etapa perfilada por padrão com --profile
+NEWSAPI_TIME_FORMAT = '%Y-%m-%dT%H:%M:%SZ'  # Formato de publishedAt nas respostas da NewsAPI
+NEWS_TEXT_COLUMNS = ['title', 'description', 'body', 'url']
+STRING_DTYPE = 'string[pyarrow]'  # Textos em buffers do Arrow (sem um objeto Python por célula)
 
 # --- Funções de Processamento ---
 
-def clean_newsapi_data(df):
-    """Limpa e pré-processa os dados das notícias da NewsAPI.org."""
-    print("Limpando dados das notícias da NewsAPI.org...")
+def parse_published_at(values):
+    """
+    Converte `publishedAt` em datetime UTC com o formato explícito da NewsAPI.
+
+    Valores fora do formato padrão (ex.: com frações de segundo ou fuso
+    "+00:00") são lidos como ISO 8601; valores inválidos viram NaT. Colunas
+    já convertidas (ex.: lidas do Parquet) são apenas ajustadas para UTC.
+    """
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return values.dt.tz_localize('UTC') if values.dt.tz is None else values.dt.tz_convert('UTC')
+    parsed = pd.to_datetime(values, format=NEWSAPI_TIME_FORMAT, utc=True, errors='coerce')
+    retry = parsed.isna() & values.notna()
+    if retry.any():
+        parsed[retry] = pd.to_datetime(values[retry], format='ISO8601', utc=True, errors='coerce')
+    return parsed
+
+def day_ordinals(published):
+    """Dias desde 1970-01-01 (int32) das datas UTC de uma Series de datetimes."""
+    return published.dt.tz_localize(None).to_numpy(dtype='datetime64[D]').astype(np.int32)
+
+def ordinal_dates(days):
+    """Converte dias desde 1970-01-01 de volta em datas (datetime64 à meia-noite)."""
+    return pd.to_datetime(np.asarray(days, dtype=np.int64), unit='D')
+
+def clean_newsapi_data(df, verbose=True):
+    """
+    Limpa e pré-processa os dados das notícias da NewsAPI.org.
+
+    Não altera `df`: retorna um novo DataFrame com `publishedAt` em UTC, os
+    textos como strings do pyarrow, `source` categórica, `day` (dias desde
+    1970-01-01, int32) e `full_text` (título, descrição e corpo) montado de
+    forma vetorizada.
+    """
+    if verbose:
+        print("Limpando dados das notícias da NewsAPI.org...")
     
-    # Remove linhas com dados faltantes
-    df.dropna(subset=['body', 'publishedAt'], inplace=True)
+    # Remove linhas com dados faltantes ou datas inválidas
+    df = df.dropna(subset=['body', 'publishedAt'])
+    published = parse_published_at(df['publishedAt'])
+    valid = published.notna().to_numpy()
+    if verbose and not valid.all():
+        print(f"{int((~valid).sum())} notícias com data inválida descartadas")
     
-    # Converte datas
-    df['date'] = pd.to_datetime(df['publishedAt']).dt.date
+    cleaned = {}
+    for column in df.columns:
+        if column == 'publishedAt':
+            cleaned[column] = published[valid]
+        elif column in NEWS_TEXT_COLUMNS:
+            cleaned[column] = df[column][valid].astype(STRING_DTYPE)
+        elif column == 'source':
+            cleaned[column] = df[column][valid].astype('category')
+        else:
+            cleaned[column] = df[column][valid]
+    df = pd.DataFrame(cleaned, index=df.index[valid])
+    df['day'] = day_ordinals(df['publishedAt'])
     
     # Combina título e descrição com o corpo para análise mais completa
-    df['full_text'] = df.apply(lambda row: 
-        f"{row.get('title', '')} {row.get('description', '')} {row.get('body', '')}", 
-        axis=1
-    )
+    parts = [df[column].fillna('') if column in df.columns else pd.Series('', index=df.index, dtype=STRING_DTYPE)
+             for column in ('title', 'description', 'body')]
+    df['full_text'] = parts[0] + ' ' + parts[1] + ' ' + parts[2]
     
-    print(f"Dados limpos: {len(df)} notícias")
+    if verbose:
+        print(f"Dados limpos: {len(df)} notícias")
     return df
 
-def analyze_sentiment_keywords_newsapi(df):
-    """Análise de sentimento baseada em palavras-chave para dados da NewsAPI.org."""
+def analyze_sentiment_keywords_newsapi(df, lexicon=DEFAULT_LEXICON, cache=None):
+    """
+    Análise de sentimento baseada em palavras-chave para dados da NewsAPI.org.
+
+    `lexicon` pode ser qualquer pontuador com `score_series` e `fingerprint`
+    (ex.: o modelo linear de `sentiment_model`). Com um `ScoreCache`, apenas
+    artigos novos ou alterados são pontuados.
+    """
     print("Aplicando análise de sentimento baseada em palavras-chave...")
     
-    # Palavras-chave positivas e negativas relacionadas a finanças e economia
-    positive_keywords = [
-        # Termos financeiros positivos
-        'alta', 'subida', 'crescimento', 'lucro', 'ganho', 'positivo', 'melhora',
-        'recuperação', 'forte', 'bom', 'excelente', 'ótimo', 'favorável', 'otimista',
-        'avanço', 'progresso', 'sucesso', 'benefício', 'vantagem', 'superior',
-        'elevado', 'ascendente', 'próspero', 'rentável', 'lucrativo', 'promissor',
-        'expansão', 'desenvolvimento', 'inovação', 'tecnologia', 'investimento',
-        'parceria', 'acordo', 'negociação', 'cooperação', 'integração',
-        'sustentável', 'responsável', 'eficiente', 'produtivo', 'competitivo',
-        'estratégico', 'planejamento', 'visão', 'futuro', 'oportunidade',
-        'mercado', 'demanda', 'oferta', 'consumo', 'vendas', 'receita',
-        'dividendo', 'retorno', 'performance', 'resultado', 'balanço',
-        # Termos específicos da Petrobras
-        'petróleo', 'óleo', 'gás', 'refinaria', 'exploração', 'produção',
-        'reservas', 'pré-sal', 'bacia', 'poço', 'plataforma', 'navio',
-        'exportação', 'importação', 'comercialização', 'distribuição'
-    ]
-    
-    negative_keywords = [
-        # Termos financeiros negativos
-        'queda', 'perda', 'negativo', 'piora', 'crise', 'problema',
-        'fraco', 'ruim', 'péssimo', 'desfavorável', 'pessimista', 'risco',
-        'declínio', 'recessão', 'falência', 'prejuízo', 'déficit',
-        'fracasso', 'insucesso', 'desvantagem', 'inferior', 'baixo', 'mínimo',
-        'redução', 'diminuição', 'queda', 'decréscimo', 'contração',
-        'instabilidade', 'volatilidade', 'incerteza', 'dúvida', 'preocupação',
-        'ameaça', 'perigo', 'risco', 'vulnerabilidade', 'fragilidade',
-        'dependência', 'limitação', 'obstáculo', 'barreira', 'impedimento',
-        'conflito', 'disputa', 'guerra', 'sanção', 'tarifa', 'taxação',
-        'inflação', 'desemprego', 'falta', 'escassez', 'carência',
-        'dívida', 'endividamento', 'calote', 'inadimplência', 'falência',
-        # Termos específicos negativos da Petrobras
-        'vazamento', 'poluição', 'acidente', 'greve', 'paralisação',
-        'investigação', 'multa', 'sanção', 'corrupção', 'escândalo',
-        'prejuízo', 'perda', 'queda', 'redução', 'corte', 'demissão'
-    ]
-    
-    def calculate_sentiment_score(text):
-        if pd.isna(text) or not text:
-            return 0
-        
-        text_lower = str(text).lower()
-        
-        # Conta palavras positivas e negativas
-        positive_count = sum(1 for word in positive_keywords if word in text_lower)
-        negative_count = sum(1 for word in negative_keywords if word in text_lower)
-        
-        # Calcula o total de palavras para normalização
-        total_words = len(text_lower.split())
-        if total_words == 0:
-            return 0
-        
-        # Calcula o score baseado na diferença entre palavras positivas e negativas
-        score = (positive_count - negative_count) / max(total_words, 1)
-        
-        # Aplica uma função sigmóide para suavizar os valores extremos
-        import math
-        score = math.tanh(score * 3)  # Multiplica por 3 para dar mais peso
-        
-        return score
-    
-    # Aplica a análise ao texto completo
-    df['sentiment_score'] = df['full_text'].apply(calculate_sentiment_score)
+    # Aplica a análise ao texto completo em lote (léxico compilado uma única vez)
+    if cache is not None:
+        df['sentiment_score'] = cache.score_series(df['full_text'], lexicon)
+        print(f"Cache de sentimento: {cache.last_hits} scores reaproveitados, {cache.last_misses} calculados")
+    else:
+        df['sentiment_score'] = lexicon.score_series(df['full_text'])
     
     # Agrupa por data e calcula a média
-    sentiment_by_date = df.groupby('date')['sentiment_score'].mean().reset_index()
+    sentiment_by_date = df.groupby('day')['sentiment_score'].mean()
+    sentiment_by_date = pd.DataFrame({'date': ordinal_dates(sentiment_by_date.index),
+                                      'sentiment_score': sentiment_by_date.to_numpy()})
     
     print(f"Análise por palavras-chave concluída. {len(sentiment_by_date)} datas processadas.")
     print(f"Range de sentimento: {sentiment_by_date['sentiment_score'].min():.3f} a {sentiment_by_date['sentiment_score'].max():.3f}")
@@ -119,6 +137,69 @@ def analyze_sentiment_keywords_newsapi(df):
     
     return sentiment_by_date
 
+def _score_news_chunk(chunk, cache=None, dedup=True, lexicon=DEFAULT_LEXICON):
+    """
+    Limpa e pontua um bloco de notícias, retornando soma e contagem de scores por dia.
+
+    Executada nos processos do pool de `analyze_sentiment_streaming`. As
+    duplicatas são removidas dentro de cada bloco.
+    """
+    cleaned = clean_newsapi_data(chunk, verbose=False)
+    if dedup:
+        cleaned = deduplicate_articles(cleaned, verbose=False)
+    if cache is not None:
+        scores = cache.score_series(cleaned['full_text'], lexicon)
+    else:
+        scores = lexicon.score_series(cleaned['full_text'])
+    return scores.groupby(cleaned['day'].to_numpy()).agg(['sum', 'count'])
+
+def analyze_sentiment_streaming(news_path, chunksize=CHUNK_SIZE, max_workers=None, cache=None, dedup=True,
+                                lexicon=DEFAULT_LEXICON):
+    """
+    Análise de sentimento em blocos para arquivos de notícias grandes.
+
+    Lê o CSV em blocos de `chunksize` linhas e pontua os blocos em um pool de
+    processos. Cada bloco devolve agregados parciais (soma e contagem por data),
+    que são combinados no mesmo `sentiment_by_date` de
+    `analyze_sentiment_keywords_newsapi`. No máximo dois blocos por processo
+    ficam em memória ao mesmo tempo.
+    """
+    print(f"Aplicando análise de sentimento em blocos de {chunksize} notícias...")
+    max_workers = max_workers or os.cpu_count()
+    
+    partials = []
+    pending = set()
+    n_chunks = 0
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        for chunk in pd.read_csv(news_path, chunksize=chunksize):
+            # Limita os blocos em voo para manter a memória proporcional ao tamanho do bloco
+            if len(pending) >= 2 * max_workers:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                partials.extend(future.result() for future in done)
+            pending.add(executor.submit(_score_news_chunk, chunk, cache, dedup, lexicon))
+            n_chunks += 1
+        partials.extend(future.result() for future in pending)
+    
+    sentiment_by_date, n_articles = combine_partial_sentiment(partials)
+    print(f"Análise em blocos concluída. {n_chunks} blocos, {n_articles} notícias, "
+          f"{len(sentiment_by_date)} datas processadas.")
+    return sentiment_by_date
+
+def combine_partial_sentiment(partials):
+    """
+    Combina agregados parciais (soma e contagem de scores por dia, indexados por
+    `day`) na média diária.
+
+    Retorna (sentiment_by_date, número de notícias pontuadas).
+    """
+    if not partials:
+        return pd.DataFrame(columns=['date', 'sentiment_score']), 0
+    
+    totals = pd.concat(partials).groupby(level=0).sum()
+    sentiment_by_date = pd.DataFrame({'date': ordinal_dates(totals.index),
+                                      'sentiment_score': (totals['sum'] / totals['count']).to_numpy()})
+    return sentiment_by_date, int(totals['count'].sum())
+
 def process_stock_data(df):
     """Processa os dados de preços das ações."""
     print("Processando dados das ações...")
@@ -141,7 +222,7 @@ def create_complete_dataset(stock_df, sentiment_df):
     final_df = pd.merge(stock_df, sentiment_df, on='date', how='left')
     
     # Para datas sem notícias, usa sentimento neutro (0)
-    final_df['sentiment_score'].fillna(0, inplace=True)
+    final_df['sentiment_score'] = final_df['sentiment_score'].fillna(0)
     
     # Remove linhas com dados faltantes
     final_df.dropna(inplace=True)
@@ -153,43 +234,301 @@ def create_complete_dataset(stock_df, sentiment_df):
     
     return final_df
 
+def find_raw_files(news_prefix, ticker):
+    """
+    Localiza os arquivos brutos mais recentes de notícias e preços de um ticker.
+
+    Consulta o catálogo (data/catalog.sqlite): vale o arquivo gravado por
+    último, não o último nome em ordem alfabética, e os arquivos acumulados
+    (--incremental) e intradiários não são confundidos com os diários.
+    Retorna (caminho das notícias, caminho dos preços) ou None se algum não existir.
+    """
+    catalog = Catalog()
+    news_entry = catalog.latest('news', query=news_prefix)
+    stock_entry = catalog.latest('prices', ticker=ticker)
+    
+    if news_entry is None:
+        print(f"Arquivos de notícias de {news_prefix} não encontrados. Execute o data_collector_newsapi_fixed.py primeiro.")
+        return None
+    if stock_entry is None:
+        print(f"Arquivos de ações de {ticker} não encontrados. Execute o data_collector_newsapi_fixed.py primeiro.")
+        return None
+    
+    return news_entry['path'], stock_entry['path']
+
+def load_stock_csv(stock_path):
+    """
+    Lê um CSV de preços salvo pelo coletor no formato do yfinance (colunas Price/Ticker).
+
+    Datas repetidas (pregões baixados de novo no modo incremental) ficam com a última linha.
+    """
+    stock_data = pd.read_csv(stock_path, header=[0, 1], index_col=0, parse_dates=True)
+    return flatten_yfinance_prices(stock_data).drop_duplicates('Date', keep='last', ignore_index=True)
+
+def load_raw_inputs(news_prefix, ticker):
+    """
+    Carrega os dados brutos de notícias e preços de um ticker.
+
+    Lê do armazenamento Parquet quando o ticker já tem notícias e preços
+    gravados, carregando apenas as colunas usadas no processamento; caso
+    contrário, usa os CSVs mais recentes de data/raw. Os preços vêm do
+    armazenamento local mapeado em memória (data/prices) sempre que o ticker
+    estiver nele.
+    Retorna (news_df, stock_df) ou None se os dados não existirem.
+    """
+    prices = PriceStore().load(ticker)
+    if ticker in list_tickers('news') and (len(prices) or ticker in list_tickers('prices')):
+        print(f"Carregando notícias e preços de {ticker} de data/parquet...")
+        with stage('read_parquet') as s:
+            news_df = read_dataset('news', tickers=[ticker], columns=NEWS_INPUT_COLUMNS)
+            if len(prices):
+                stock_df = prices.to_frame(['Date', 'Close'])
+            else:
+                stock_df = read_dataset('prices', tickers=[ticker], columns=['Date', 'Close'])
+            s.rows_out = len(news_df) + len(stock_df)
+        return news_df, stock_df
+    
+    paths = find_raw_files(news_prefix, ticker)
+    if paths is None:
+        return None
+    news_path, stock_path = paths
+    
+    print(f"Carregando {os.path.basename(news_path)} e {os.path.basename(stock_path)}...")
+    with stage('read_csv') as s:
+        news_df = pd.read_csv(news_path)
+        stock_df = prices.to_frame(['Date', 'Close']) if len(prices) else load_stock_csv(stock_path)
+        s.rows_out = len(news_df) + len(stock_df)
+    return news_df, stock_df
+
+def build_final_dataset(news_df, stock_df, cache=None, dedup=True, lexicon=DEFAULT_LEXICON):
+    """Executa limpeza, deduplicação, sentimento, preços e junção sobre os dados brutos de um ticker."""
+    with stage('clean_newsapi_data', rows_in=len(news_df)) as s:
+        cleaned_news = clean_newsapi_data(news_df)
+        s.rows_out = len(cleaned_news)
+    if dedup:
+        with stage('deduplicate_articles', rows_in=len(cleaned_news)) as s:
+            cleaned_news = deduplicate_articles(cleaned_news)
+            s.rows_out = len(cleaned_news)
+    with stage('analyze_sentiment', rows_in=len(cleaned_news)) as s:
+        sentiment_data = analyze_sentiment_keywords_newsapi(cleaned_news, lexicon=lexicon, cache=cache)
+        s.rows_out = len(sentiment_data)
+    with stage('process_stock_data', rows_in=len(stock_df)) as s:
+        processed_stock = process_stock_data(stock_df)
+        s.rows_out = len(processed_stock)
+    with stage('create_complete_dataset', rows_in=len(processed_stock)) as s:
+        final_df = create_complete_dataset(processed_stock, sentiment_data)
+        s.rows_out = len(final_df)
+    return final_df
+
+def process_ticker(entry, cache=None, dedup=True, lexicon=DEFAULT_LEXICON):
+    """
+    Processa um ticker do universo e retorna seu dataset final com a coluna `ticker`.
+
+    Função de nível de módulo para poder ser enviada a um ProcessPoolExecutor.
+    Retorna None se os dados brutos do ticker não existirem.
+    """
+    raw = load_raw_inputs(entry['name'], entry['ticker'])
+    if raw is None:
+        return None
+    final_df = build_final_dataset(*raw, cache=cache, dedup=dedup, lexicon=lexicon)
+    write_dataset(final_df, 'final', entry['ticker'], mode='replace')
+    final_df.insert(0, 'ticker', entry['ticker'])
+    return final_df
+
+def process_universe(universe, max_workers=None, cache=None, dedup=True, lexicon=DEFAULT_LEXICON):
+    """
+    Processa todos os tickers do universo em paralelo, um processo por núcleo.
+
+    Retorna um único DataFrame com as linhas de todos os tickers, identificadas
+    pela coluna `ticker`.
+    """
+    print(f"Processando {len(universe)} tickers em paralelo...")
+    # As etapas de cada ticker rodam nos processos filhos; o relatório registra o conjunto
+    with stage('process_universe', rows_in=len(universe)) as s:
+        with ProcessPoolExecutor(max_workers=max_workers or os.cpu_count()) as executor:
+            results = [df for df in executor.map(partial(process_ticker, cache=cache, dedup=dedup, lexicon=lexicon), universe) if df is not None]
+        s.rows_out = sum(len(df) for df in results)
+    
+    if not results:
+        return pd.DataFrame(columns=['ticker', 'date', 'Close', 'price_change', 'sentiment_score'])
+    combined = pd.concat(results, ignore_index=True).sort_values(['ticker', 'date'], ignore_index=True)
+    print(f"Dataset do universo criado com {len(combined)} registros de {combined['ticker'].nunique()} tickers")
+    return combined
+
+def read_appended_csv(path, offset, header_rows=1):
+    """
+    Lê as linhas de um CSV acumulado (append-only) a partir do byte `offset`.
+
+    O cabeçalho (`header_rows` linhas) é sempre lido do início do arquivo e
+    colado ao trecho novo; uma última linha ainda incompleta fica para a
+    próxima leitura. Retorna (bytes do cabeçalho + trecho novo, posição final).
+    """
+    with open(path, 'rb') as f:
+        header = b''.join(f.readline() for _ in range(header_rows))
+        f.seek(max(offset, len(header)))
+        data = f.read()
+    data = data[:data.rfind(b'\n') + 1]
+    return header + data, max(offset, len(header)) + len(data)
+
+def process_incremental(news_prefix, ticker, store, cache=None, dedup=True, lexicon=DEFAULT_LEXICON):
+    """
+    Atualiza o dataset final de um ticker apenas com o que chegou desde a última execução.
+
+    Lê somente o final dos arquivos acumulados do coletor (--incremental),
+    soma os scores das notícias novas aos agregados por data de `store` e
+    calcula a variação dos pregões novos a partir do último fechamento
+    guardado. As linhas do dataset final das datas afetadas (pregões novos e
+    dias com notícias novas) são regravadas no Parquet por upsert. O custo é
+    proporcional às notícias e pregões novos, não ao histórico.
+    Quase duplicatas são detectadas apenas dentro do trecho novo; URLs
+    repetidas já são filtradas pelo coletor.
+    Retorna as linhas atualizadas ou None se os arquivos não existirem.
+    """
+    news_path = os.path.join(RAW_DATA_PATH, f"{news_prefix}_news_newsapi_fixed_incremental.csv")
+    stock_path = os.path.join(RAW_DATA_PATH, f"{ticker}_prices_incremental.csv")
+    for path in (news_path, stock_path):
+        if not os.path.exists(path):
+            print(f"{os.path.basename(path)} não encontrado. Execute o coletor com --incremental primeiro.")
+            return None
+
+    with store.conn:  # Agregados e posições de leitura avançam na mesma transação
+        news_offset = store.offset(ticker, 'news', news_path)
+        stock_offset = store.offset(ticker, 'prices', stock_path)
+        if news_offset > os.path.getsize(news_path) or stock_offset > os.path.getsize(stock_path):
+            print(f"Arquivos acumulados de {ticker} foram recriados; reprocessando todo o histórico...")
+            store.reset(ticker)
+            news_offset = stock_offset = 0
+
+        with stage('read_appended') as s:
+            news_bytes, news_end = read_appended_csv(news_path, news_offset)
+            stock_bytes, stock_end = read_appended_csv(stock_path, stock_offset, header_rows=3)
+            news_df = pd.read_csv(io.BytesIO(news_bytes))
+            stock_df = load_stock_csv(io.BytesIO(stock_bytes))[['Date', 'Close']]
+            s.rows_out = len(news_df) + len(stock_df)
+        print(f"Novos desde a última execução: {len(news_df)} notícias, {len(stock_df)} pregões")
+
+        affected = set()
+        if not news_df.empty:
+            with stage('analyze_sentiment_incremental', rows_in=len(news_df)) as s:
+                cleaned = clean_newsapi_data(news_df, verbose=False)
+                if dedup and not cleaned.empty:
+                    cleaned = deduplicate_articles(cleaned, verbose=False)
+                if cache is not None:
+                    scores = cache.score_series(cleaned['full_text'], lexicon)
+                else:
+                    scores = lexicon.score_series(cleaned['full_text'])
+                totals = scores.groupby(cleaned['publishedAt'].dt.strftime('%Y-%m-%d').to_numpy()).agg(
+                    ['sum', 'count', 'min', 'max'])
+                store.add_sentiment(ticker, totals)
+                affected.update(totals.index)
+                s.rows_out = len(totals)
+
+        if not stock_df.empty:
+            with stage('process_stock_incremental', rows_in=len(stock_df)) as s:
+                stock_df = stock_df.dropna(subset=['Close']).sort_values('Date', kind='stable', ignore_index=True)
+                stock_df['date'] = pd.to_datetime(stock_df['Date']).dt.strftime('%Y-%m-%d')
+                # O último pregão já processado pode vir de novo, revisado; a linha nova o substitui
+                stock_df = stock_df.drop_duplicates('date', keep='last', ignore_index=True)
+                # A variação do primeiro pregão usa o último fechamento processado antes dele
+                _, last_close = store.last_price(ticker, before=stock_df['date'].iloc[0] if len(stock_df) else None)
+                closes = pd.concat([pd.Series([last_close], dtype=float), stock_df['Close']], ignore_index=True)
+                stock_df['price_change'] = (closes / closes.shift(1) - 1).to_numpy()[1:]
+                store.add_prices(ticker, stock_df)
+                affected.update(stock_df['date'])
+                s.rows_out = len(stock_df)
+
+        with stage('write_final_incremental', rows_in=len(affected)) as s:
+            final_rows = store.final_rows(ticker, sorted(affected))
+            if not final_rows.empty:
+                # Regrava apenas as partições mensais das datas afetadas
+                write_dataset(final_rows, 'final', ticker, mode='upsert')
+            s.rows_out = len(final_rows)
+        store.set_offset(ticker, 'news', news_path, news_end)
+        store.set_offset(ticker, 'prices', stock_path, stock_end)
+
+    print(f"Dataset final de {ticker}: {len(final_rows)} datas atualizadas em data/parquet/final")
+    return final_rows
+
 # --- Execução Principal ---
 if __name__ == "__main__":
     print("--- Iniciando Pipeline de Processamento de Dados (NewsAPI.org - Versão Corrigida) ---")
     
+    parser = argparse.ArgumentParser(description="Processa os dados brutos e gera o dataset final.")
+    parser.add_argument('--universe', nargs='?', const=UNIVERSE_PATH, default=None,
+                        help="Processa todos os tickers do arquivo de universo (padrão: config/universe.json)")
+    parser.add_argument('--incremental', action='store_true',
+                        help="Processa apenas o que o coletor anexou desde a última execução (data/state)")
+    parser.add_argument('--stream', action='store_true',
+                        help="Lê as notícias em blocos e pontua em paralelo (arquivos grandes)")
+    parser.add_argument('--chunksize', type=int, default=CHUNK_SIZE,
+                        help=f"Linhas por bloco no modo --stream (padrão: {CHUNK_SIZE})")
+    parser.add_argument('--no-cache', action='store_true',
+                        help="Recalcula todos os scores sem usar o cache em data/cache")
+    parser.add_argument('--no-dedup', action='store_true',
+                        help="Não remove notícias duplicadas antes da análise de sentimento")
+    parser.add_argument('--scorer', choices=SCORERS, default='keywords',
+                        help="Pontuador de sentimento: léxico de palavras-chave ou modelo linear treinado (padrão: keywords)")
+    parser.add_argument('--model', default=MODEL_PATH,
+                        help="Arquivo do modelo linear usado com --scorer linear (padrão: data/models/sentiment_linear.npz)")
+    parser.add_argument('--profile', nargs='?', const=PROFILE_STAGE, default=None, metavar='ETAPA',
+                        help=f"Executa uma etapa sob o cProfile (padrão: {PROFILE_STAGE}); "
+                             "o perfil é salvo em data/reports junto do relatório")
+    args = parser.parse_args()
+    
+    cache = None if args.no_cache else ScoreCache()
+    dedup = not args.no_dedup
+    lexicon = load_scorer(args.scorer, args.model)
+    report = start_run('processor', vars(args), profile=[args.profile] if args.profile else ())
+    
     try:
-        # Busca arquivos mais recentes da NewsAPI.org corrigida
-        news_files = [f for f in os.listdir(RAW_DATA_PATH) if f.startswith(f"{SEARCH_TERM}_news_newsapi_fixed")]
-        stock_files = [f for f in os.listdir(RAW_DATA_PATH) if f.startswith(f"{TICKER}_prices")]
-        
-        if not news_files:
-            print("Arquivos de notícias da NewsAPI.org corrigida não encontrados. Execute o data_collector_newsapi_fixed.py primeiro.")
-            exit()
-        if not stock_files:
-            print("Arquivos de ações não encontrados. Execute o data_collector_newsapi_fixed.py primeiro.")
-            exit()
+        if args.incremental:
+            # Atualiza o Parquet por upsert; o CSV completo não é regravado a cada execução
+            store = AggregateStore()
+            entries = load_universe(args.universe) if args.universe else [{'name': SEARCH_TERM, 'ticker': TICKER}]
+            for entry in entries:
+                process_incremental(entry['name'], entry['ticker'], store, cache=cache, dedup=dedup, lexicon=lexicon)
+            final_filename = None
+        elif args.universe:
+            final_df = process_universe(load_universe(args.universe), cache=cache, dedup=dedup, lexicon=lexicon)
+            final_filename = os.path.join(FINAL_DATA_PATH, f'final_dataset_universe_{TODAY_STR}.csv')
+        elif args.stream:
+            paths = find_raw_files(SEARCH_TERM, TICKER)
+            if paths is None:
+                exit()
+            news_path, stock_path = paths
             
-        news_file = sorted(news_files)[-1]
-        stock_file = sorted(stock_files)[-1]
+            # No modo em blocos a pontuação roda nos processos filhos (ver children_cpu_seconds)
+            with stage('analyze_sentiment_streaming') as s:
+                sentiment_data = analyze_sentiment_streaming(news_path, chunksize=args.chunksize, cache=cache, dedup=dedup,
+                                                             lexicon=lexicon)
+                s.rows_out = len(sentiment_data)
+            with stage('process_stock_data') as s:
+                processed_stock = process_stock_data(load_stock_csv(stock_path))
+                s.rows_out = len(processed_stock)
+            with stage('create_complete_dataset', rows_in=len(processed_stock)) as s:
+                final_df = create_complete_dataset(processed_stock, sentiment_data)
+                s.rows_out = len(final_df)
+            final_filename = os.path.join(FINAL_DATA_PATH, f'final_dataset_newsapi_fixed_{TODAY_STR}.csv')
+        else:
+            # Busca arquivos mais recentes da NewsAPI.org corrigida
+            raw = load_raw_inputs(SEARCH_TERM, TICKER)
+            if raw is None:
+                exit()
+            
+            # Cria dataset completo
+            final_df = build_final_dataset(*raw, cache=cache, dedup=dedup, lexicon=lexicon)
+            final_filename = os.path.join(FINAL_DATA_PATH, f'final_dataset_newsapi_fixed_{TODAY_STR}.csv')
         
-    except IndexError:
-        print("Arquivos de dados brutos não encontrados. Execute o data_collector_newsapi_fixed.py primeiro.")
-        exit()
-
-    print(f"Carregando {news_file} e {stock_file}...")
-    news_df = pd.read_csv(os.path.join(RAW_DATA_PATH, news_file))
-    colunas = ['Date', 'Close', 'High', 'Low', 'Open', 'Volume']
-    stock_df = pd.read_csv(os.path.join(RAW_DATA_PATH, stock_file), header=2, names=colunas)
-
-    cleaned_news = clean_newsapi_data(news_df)
-    sentiment_data = analyze_sentiment_keywords_newsapi(cleaned_news)
-    processed_stock = process_stock_data(stock_df)
-    
-    # Cria dataset completo
-    final_df = create_complete_dataset(processed_stock, sentiment_data)
-
-    final_filename = os.path.join(FINAL_DATA_PATH, f'final_dataset_newsapi_fixed_{TODAY_STR}.csv')
-    final_df.to_csv(final_filename, index=False)
+        if final_filename is not None:
+            with stage('write_final', rows_in=len(final_df)) as s:
+                if not args.universe:
+                    write_dataset(final_df, 'final', TICKER, mode='replace')
+                final_df.to_csv(final_filename, index=False)
+                Catalog().register(final_filename, 'final', final_df, ticker=None if args.universe else TICKER)
+                s.rows_out = len(final_df)
+            print(f"Dataset completo criado e salvo em: {final_filename}")
+    finally:
+        # O relatório é gravado mesmo quando o processamento falha
+        print(f"Relatório da execução salvo em: {report.save()}")
     
-    print(f"Dataset completo criado e salvo em: {final_filename}")
-    print("--- Pipeline de Processamento de Dados Finalizado ---") 
\ No newline at end of file
+    print("--- Pipeline de Processamento de Dados Finalizado ---") 
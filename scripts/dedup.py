@@ -0,0 +1,211 @@
+import re
+from urllib.parse import urlsplit
+
+import numpy as np
+import pandas as pd
+
+# --- Detecção de Notícias Duplicadas ---
+
+NUM_PERM = 64          # Tamanho da assinatura MinHash
+BANDS = 16             # Bandas do LSH (NUM_PERM / BANDS linhas por banda)
+SHINGLE_SIZE = 3       # Palavras por shingle
+THRESHOLD = 0.7        # Similaridade de Jaccard estimada para considerar duplicata
+_MAX_HASH = np.uint64((1 << 32) - 1)
+_CHUNK_SHINGLES = 250_000  # Shingles processados por vez no cálculo das assinaturas
+
+_TOKEN_RE = re.compile(r'\w+')
+# A NewsAPI trunca o conteúdo com "… [+1234 chars]"; o sufixo varia entre cópias
+_TRUNCATION_RE = re.compile(r'…?\s*\[\+\d+ chars\]\s*$')
+
+
+def normalize_url(url):
+    """Normaliza a URL para comparação exata (sem esquema, query, fragmento ou barra final)."""
+    if pd.isna(url) or not url:
+        return ''
+    parts = urlsplit(str(url).strip())
+    host = parts.netloc.lower()
+    if host.startswith('www.'):
+        host = host[4:]
+    return host + parts.path.rstrip('/')
+
+
+def _tokenize(text):
+    """Palavras do texto em minúsculas, sem o sufixo de truncamento da NewsAPI."""
+    if pd.isna(text):
+        return []
+    return _TOKEN_RE.findall(_TRUNCATION_RE.sub('', str(text)).lower())
+
+
+def _shingle_values(texts, k=SHINGLE_SIZE):
+    """
+    Calcula os valores dos shingles de `k` palavras de todos os textos de uma vez.
+
+    Os tokens são convertidos em inteiros com `pd.factorize` e concatenados;
+    textos com menos de `k` palavras são completados com um marcador, de modo
+    que todo texto não vazio gera ao menos um shingle. As janelas de `k` tokens
+    são combinadas de forma vetorizada, e só as que não cruzam a fronteira entre
+    textos são mantidas. Retorna (valores, número de shingles por texto).
+    """
+    tokens_per_text = [_tokenize(text) for text in texts]
+    n_tokens = np.fromiter((len(t) for t in tokens_per_text), dtype=np.int64, count=len(tokens_per_text))
+    codes, _ = pd.factorize(pd.Series([tok for tokens in tokens_per_text for tok in tokens], dtype=object))
+
+    # Vetor concatenado com cada texto ocupando max(n, k) posições (0 = marcador)
+    padded = np.where(n_tokens > 0, np.maximum(n_tokens, k), 0)
+    padded_starts = np.cumsum(padded) - padded
+    token_starts = np.cumsum(n_tokens) - n_tokens
+    positions = np.repeat(padded_starts - token_starts, n_tokens) + np.arange(n_tokens.sum())
+    tokens = np.zeros(padded.sum(), dtype=np.uint64)
+    tokens[positions] = codes.astype(np.uint64) + np.uint64(1)
+
+    # Combina k tokens consecutivos em um único valor de 64 bits
+    n_windows = max(len(tokens) - k + 1, 0)
+    mixed = np.zeros(n_windows, dtype=np.uint64)
+    for offset in range(k):
+        mixed = mixed * np.uint64(0x9E3779B97F4A7C15) + tokens[offset:offset + n_windows]
+    mixed ^= mixed >> np.uint64(29)
+
+    counts = np.where(padded > 0, padded - k + 1, 0)
+    window_starts = np.repeat(padded_starts, counts) + np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    return mixed[window_starts], counts
+
+
+def minhash_signatures(texts, num_perm=NUM_PERM, k=SHINGLE_SIZE, seed=42):
+    """
+    Calcula as assinaturas MinHash de uma sequência de textos.
+
+    As permutações (hashing multiplicativo a*x + b, 32 bits superiores) são
+    aplicadas aos shingles de vários textos por vez com NumPy e reduzidas por
+    texto com `np.minimum.reduceat`. Retorna uma matriz (n_textos, num_perm);
+    textos sem palavras recebem o valor máximo em todas as posições.
+    """
+    values, counts = _shingle_values(texts, k)
+    signatures = np.full((len(counts), num_perm), _MAX_HASH, dtype=np.uint64)
+    if len(values) == 0:
+        return signatures
+
+    rng = np.random.default_rng(seed)
+    a = rng.integers(1, np.iinfo(np.uint64).max, size=num_perm, dtype=np.uint64, endpoint=True) | np.uint64(1)
+    b = rng.integers(0, np.iinfo(np.uint64).max, size=num_perm, dtype=np.uint64, endpoint=True)
+
+    nonempty = np.flatnonzero(counts)
+    offsets = np.cumsum(counts) - counts
+    # Processa textos inteiros em blocos de aproximadamente _CHUNK_SHINGLES shingles
+    cumulative = np.cumsum(counts[nonempty])
+    cuts = np.unique(np.searchsorted(cumulative, np.arange(_CHUNK_SHINGLES, cumulative[-1], _CHUNK_SHINGLES)) + 1)
+    for docs in np.split(nonempty, cuts):
+        if len(docs) == 0:
+            continue
+        first, last = offsets[docs[0]], offsets[docs[-1]] + counts[docs[-1]]
+        chunk = values[first:last]
+        permuted = (chunk[None, :] * a[:, None] + b[:, None]) >> np.uint64(32)
+        signatures[docs] = np.minimum.reduceat(permuted, offsets[docs] - first, axis=1).T
+    return signatures
+
+
+class _UnionFind:
+    def __init__(self, n):
+        self.parent = np.arange(n)
+
+    def find(self, i):
+        root = i
+        while self.parent[root] != root:
+            root = self.parent[root]
+        while self.parent[i] != root:
+            self.parent[i], i = root, self.parent[i]
+        return root
+
+    def union(self, i, j):
+        ri, rj = self.find(i), self.find(j)
+        if ri != rj:
+            self.parent[max(ri, rj)] = min(ri, rj)
+
+    def labels(self):
+        return np.array([self.find(i) for i in range(len(self.parent))])
+
+
+def _groups(codes):
+    """Agrupa as posições por código, retornando apenas grupos com mais de um item."""
+    order = np.argsort(codes, kind='stable')
+    sorted_codes = codes[order]
+    starts = np.flatnonzero(np.r_[True, sorted_codes[1:] != sorted_codes[:-1]])
+    ends = np.r_[starts[1:], len(codes)]
+    repeated = (ends - starts) > 1
+    return [order[start:end] for start, end in zip(starts[repeated], ends[repeated])]
+
+
+def _union_groups(uf, keys):
+    """Une todos os itens que compartilham a mesma chave não vazia."""
+    keys = pd.Series(keys, dtype=object).replace('', None)
+    codes, _ = pd.factorize(keys)
+    for members in _groups(codes):
+        if codes[members[0]] >= 0:
+            for m in members[1:]:
+                uf.union(members[0], m)
+
+
+def find_duplicate_clusters(df, text_column='full_text', url_column='url', threshold=THRESHOLD,
+                            num_perm=NUM_PERM, bands=BANDS):
+    """
+    Atribui um rótulo de cluster a cada notícia.
+
+    Duplicatas exatas (mesma URL normalizada ou mesmo texto) e quase duplicatas
+    (similaridade de Jaccard estimada por MinHash >= `threshold`) recebem o
+    mesmo rótulo. Candidatos vêm de LSH por bandas, evitando a comparação de
+    todos os pares; cada candidato é confirmado contra o representante do balde.
+    """
+    n = len(df)
+    uf = _UnionFind(n)
+    texts = df[text_column].tolist()
+
+    # 1) Duplicatas exatas
+    if url_column in df.columns:
+        _union_groups(uf, [normalize_url(u) for u in df[url_column]])
+    _union_groups(uf, ['' if pd.isna(t) else str(t).strip().lower() for t in texts])
+
+    # 2) Quase duplicatas via MinHash + LSH
+    signatures = minhash_signatures(texts, num_perm=num_perm)
+    candidates = np.flatnonzero((signatures != _MAX_HASH).any(axis=1))
+    rows = num_perm // bands
+    for band in range(bands):
+        band_values = np.ascontiguousarray(signatures[candidates, band * rows:(band + 1) * rows])
+        band_keys = band_values.view([('', band_values.dtype)] * rows).ravel()
+        _, inverse = np.unique(band_keys, return_inverse=True)
+        for bucket in _groups(inverse.ravel()):
+            members = candidates[bucket]
+            representative = members[0]
+            similarity = (signatures[members[1:]] == signatures[representative]).mean(axis=1)
+            for m in members[1:][similarity >= threshold]:
+                uf.union(representative, m)
+
+    return uf.labels()
+
+
+def deduplicate_articles(df, text_column='full_text', url_column='url', threshold=THRESHOLD, verbose=True):
+    """
+    Mantém uma notícia por cluster de duplicatas e registra o tamanho do cluster.
+
+    O representante é a publicação mais antiga do cluster. A coluna
+    `cluster_size` indica quantas cópias a notícia tinha e pode ser usada como
+    peso na agregação diária.
+    """
+    if verbose:
+        print("Removendo notícias duplicadas...")
+    df = df.reset_index(drop=True)
+    if df.empty:
+        return df.assign(cluster_size=pd.Series(dtype='int64'))
+
+    labels = find_duplicate_clusters(df, text_column, url_column, threshold)
+    sizes = np.bincount(labels, minlength=len(df))
+
+    order = np.argsort(pd.to_datetime(df['publishedAt'], utc=True).to_numpy(), kind='stable') \
+        if 'publishedAt' in df.columns else np.arange(len(df))
+    ordered_labels = labels[order]
+    _, first = np.unique(ordered_labels, return_index=True)
+    keep = np.sort(order[first])
+
+    deduped = df.iloc[keep].copy()
+    deduped['cluster_size'] = sizes[labels[keep]]
+    if verbose:
+        print(f"Notícias únicas: {len(deduped)} de {len(df)} ({len(df) - len(deduped)} duplicatas removidas)")
+    return deduped.reset_index(drop=True)
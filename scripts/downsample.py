@@ -0,0 +1,74 @@
+import numpy as np
+import pandas as pd
+
+# --- Redução de Pontos para os Gráficos ---
+
+MAX_LINE_POINTS = 1500  # Pontos máximos enviados ao navegador por série de linha
+MAX_BARS = 400          # Barras máximas no gráfico de sentimento
+MAX_SCATTER_POINTS = 2000  # Pontos máximos no gráfico de dispersão da correlação
+
+
+def lttb_indices(x, y, threshold):
+    """
+    Posições selecionadas pelo algoritmo Largest-Triangle-Three-Buckets.
+
+    Mantém o primeiro e o último ponto e, em cada um dos `threshold - 2` baldes
+    intermediários, o ponto que forma o maior triângulo com o ponto escolhido
+    no balde anterior e a média do balde seguinte. Preserva picos e vales da
+    série, de modo que a linha reduzida fica visualmente igual à original.
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    # Limites dos baldes intermediários (o primeiro e o último ponto ficam de fora)
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = n - 1
+
+    previous = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        next_start, next_end = edges[i + 1], (edges[i + 2] if i + 2 < len(edges) else n)
+        avg_x = x[next_start:next_end].mean()
+        avg_y = y[next_start:next_end].mean()
+        area = np.abs((x[previous] - avg_x) * (y[start:end] - y[previous])
+                      - (x[previous] - x[start:end]) * (avg_y - y[previous]))
+        previous = start + int(np.argmax(area))
+        selected[i + 1] = previous
+    return selected
+
+
+def downsample_line(df, x='date', y='Close', max_points=MAX_LINE_POINTS):
+    """
+    Reduz um DataFrame a no máximo `max_points` linhas com LTTB sobre (x, y).
+
+    Se o DataFrame já couber no limite, é retornado sem alterações; caso
+    contrário, linhas com `y` ausente são descartadas antes da redução.
+    """
+    if len(df) <= max_points:
+        return df
+    df = df.dropna(subset=[y])
+    if len(df) <= max_points:
+        return df
+    x_values = df[x]
+    if pd.api.types.is_datetime64_any_dtype(x_values):
+        x_values = x_values.to_numpy(dtype='datetime64[ns]').astype(np.int64)
+    return df.iloc[lttb_indices(np.asarray(x_values, dtype=float), df[y].to_numpy(), max_points)]
+
+
+def downsample_bars(df, x='date', y='sentiment_score', max_bars=MAX_BARS):
+    """
+    Agrupa linhas consecutivas em no máximo `max_bars` baldes.
+
+    Cada balde é rotulado pela sua primeira data e recebe a média de `y`
+    (dias sem valor são ignorados). Se o DataFrame já couber no limite, é
+    retornado sem alterações.
+    """
+    if len(df) <= max_bars:
+        return df
+    buckets = np.arange(len(df)) * max_bars // len(df)
+    return df.groupby(buckets).agg({x: 'first', y: 'mean'}).reset_index(drop=True)
@@ -0,0 +1,52 @@
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# --- Utilitários HTTP compartilhados pelos coletores ---
+
+class TokenBucket:
+    """
+    Limitador de taxa do tipo token bucket, seguro para uso entre threads.
+
+    Libera até `rate` requisições por segundo em média, permitindo rajadas de
+    até `capacity` requisições. Substitui o `time.sleep(1)` fixo entre chamadas.
+    """
+
+    def __init__(self, rate, capacity=None):
+        if rate <= 0:
+            raise ValueError("A taxa do limitador deve ser positiva.")
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else max(1.0, rate))
+        self._tokens = self.capacity
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Bloqueia até que uma ficha esteja disponível e a consome."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+                self._last = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+def create_session(pool_size=10):
+    """
+    Cria uma sessão HTTP com pool de conexões keep-alive.
+
+    A mesma sessão pode ser compartilhada pelas threads de coleta; o pool é
+    dimensionado para o número de workers, evitando um novo handshake TLS a
+    cada requisição.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
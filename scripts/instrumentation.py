@@ -0,0 +1,315 @@
+import cProfile
+import io
+import json
+import os
+import pstats
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+import numpy as np
+
+try:
+    import resource
+except ImportError:  # Windows: sem getrusage, o pico de RSS não é registrado
+    resource = None
+
+# --- Instrumentação das Etapas do Pipeline ---
+
+REPORTS_PATH = os.path.join(os.path.dirname(__file__), '..', 'data', 'reports')
+PROFILE_TOP = 20  # Funções listadas no relatório para cada etapa perfilada
+
+_active = None
+_local = threading.local()
+
+
+def _peak_rss_mb(who):
+    """
+    Pico de memória residente (MB) do processo ou dos processos filhos já encerrados.
+
+    É o máximo desde o início do processo, não de uma etapa: etapas posteriores
+    à de maior consumo repetem o mesmo valor.
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(who).ru_maxrss
+    # Linux informa em KB; macOS, em bytes
+    return round(peak / (2**20 if sys.platform == 'darwin' else 2**10), 1)
+
+
+def _current_rss_mb():
+    """Memória residente atual (MB), lida de /proc/self/statm; None fora do Linux."""
+    try:
+        with open('/proc/self/statm') as f:
+            pages = int(f.read().split()[1])
+    except (OSError, ValueError, IndexError):
+        return None
+    return pages * os.sysconf('SC_PAGE_SIZE') / 2**20
+
+
+def _children_cpu():
+    if resource is None:
+        return 0.0
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+
+class HttpStats:
+    """
+    Contadores de requisições HTTP, seguros para uso entre threads.
+
+    Registra, por serviço (ex.: 'newsapi', 'yfinance'), o número de
+    requisições, os status, as novas tentativas, as latências e o tempo de
+    espera no limitador de taxa.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._services = {}
+
+    def _service(self, service):
+        return self._services.setdefault(service, {
+            'requests': 0, 'retries': 0, 'errors': 0, 'status': {}, 'latencies': [], 'throttle_seconds': 0.0,
+        })
+
+    def record(self, service, status, latency, retry=False):
+        """Registra uma requisição; `status` é o código HTTP ou 'error' para falhas de conexão."""
+        with self._lock:
+            stats = self._service(service)
+            stats['requests'] += 1
+            stats['retries'] += int(retry)
+            key = str(status)
+            stats['status'][key] = stats['status'].get(key, 0) + 1
+            if status == 'error' or (isinstance(status, int) and status >= 400):
+                stats['errors'] += 1
+            stats['latencies'].append(latency)
+
+    def record_throttle(self, service, seconds):
+        """Registra o tempo bloqueado no limitador de taxa antes de uma requisição."""
+        with self._lock:
+            self._service(service)['throttle_seconds'] += seconds
+
+    def summary(self):
+        """Resumo por serviço, com percentis de latência em segundos."""
+        with self._lock:
+            summary = {}
+            for service, stats in self._services.items():
+                latencies = np.array(stats['latencies']) if stats['latencies'] else np.zeros(1)
+                summary[service] = {
+                    'requests': stats['requests'],
+                    'retries': stats['retries'],
+                    'errors': stats['errors'],
+                    'status': dict(stats['status']),
+                    'throttle_seconds': round(stats['throttle_seconds'], 4),
+                    'latency_seconds': {
+                        'mean': round(float(latencies.mean()), 4),
+                        'p50': round(float(np.percentile(latencies, 50)), 4),
+                        'p95': round(float(np.percentile(latencies, 95)), 4),
+                        'max': round(float(latencies.max()), 4),
+                    },
+                }
+            return summary
+
+
+class StageRecord(dict):
+    """
+    Registro de uma etapa; a etapa informa as linhas produzidas em `rows_out`.
+
+    `http` conta as requisições feitas dentro da etapa, inclusive por threads
+    iniciadas com `in_current_stage`.
+    """
+
+    def __init__(self, **fields):
+        super().__init__(**fields)
+        self['http'] = {'requests': 0, 'retries': 0, 'errors': 0}
+
+    @property
+    def rows_out(self):
+        return self.get('rows_out')
+
+    @rows_out.setter
+    def rows_out(self, value):
+        self['rows_out'] = None if value is None else int(value)
+
+
+class RunReport:
+    """
+    Relatório de uma execução do coletor ou do processador.
+
+    Cada etapa registra tempo de relógio, tempo de CPU da thread que abriu a
+    etapa (`thread_cpu_seconds`), do processo inteiro no mesmo intervalo,
+    inclusive de outras threads e etapas simultâneas (`process_cpu_seconds`),
+    e dos processos filhos encerrados durante a etapa, a variação da memória
+    residente durante a etapa (`rss_delta_mb`), o pico de RSS do processo até
+    o fim dela (`process_peak_rss_mb`), linhas de entrada e saída e as
+    requisições HTTP feitas pela etapa (na thread que a abriu ou em threads
+    iniciadas com `in_current_stage`), não por outras etapas simultâneas. As
+    etapas listadas em `profile` são executadas sob o cProfile. `save` grava
+    o relatório em JSON em data/reports.
+    """
+
+    def __init__(self, script, args=None, profile=()):
+        self.script = script
+        self.args = args or {}
+        self.profile = set(profile or ())
+        self.started = datetime.now()
+        self.run_id = f"{script}_{self.started.strftime('%Y%m%d_%H%M%S')}"
+        self.http = HttpStats()
+        self.stages = []
+        self._lock = threading.Lock()
+        self._wall_start = time.perf_counter()
+        self._cpu_start = time.process_time()
+
+    @contextmanager
+    def stage(self, name, rows_in=None):
+        stack = _stack()
+        record = StageRecord(name=name, parent=stack[-1]['name'] if stack else None,
+                             rows_in=None if rows_in is None else int(rows_in), rows_out=None)
+        stack.append(record)
+
+        profiler = cProfile.Profile() if name in self.profile else None
+        rss_before = _current_rss_mb()
+        children_before = _children_cpu()
+        cpu_before = time.process_time()
+        thread_cpu_before = time.thread_time()
+        wall_before = time.perf_counter()
+        if profiler is not None:
+            profiler.enable()
+        try:
+            yield record
+            record['status'] = 'ok'
+        except BaseException as e:
+            record['status'] = f'error: {type(e).__name__}'
+            raise
+        finally:
+            if profiler is not None:
+                profiler.disable()
+            rss_after = _current_rss_mb()
+            record.update({
+                'wall_seconds': round(time.perf_counter() - wall_before, 4),
+                'thread_cpu_seconds': round(time.thread_time() - thread_cpu_before, 4),
+                'process_cpu_seconds': round(time.process_time() - cpu_before, 4),
+                'children_cpu_seconds': round(_children_cpu() - children_before, 4),
+                'rss_delta_mb': round(rss_after - rss_before, 1) if rss_before is not None else None,
+                'process_peak_rss_mb': _peak_rss_mb(resource.RUSAGE_SELF) if resource else None,
+            })
+            if profiler is not None:
+                record['profile'] = self._save_profile(name, profiler)
+            stack.pop()
+            with self._lock:
+                self.stages.append(record)
+
+    def record_http(self, service, status, latency, retry=False):
+        """Registra uma requisição no resumo da execução e nas etapas abertas na thread corrente."""
+        self.http.record(service, status, latency, retry)
+        failed = status == 'error' or (isinstance(status, int) and status >= 400)
+        with self._lock:
+            for record in _stack():
+                record['http']['requests'] += 1
+                record['http']['retries'] += int(retry)
+                record['http']['errors'] += int(failed)
+
+    def _save_profile(self, name, profiler):
+        """Grava o perfil da etapa em .prof e retorna o caminho e as funções mais custosas."""
+        os.makedirs(REPORTS_PATH, exist_ok=True)
+        path = os.path.join(REPORTS_PATH, f"{self.run_id}_{name}.prof")
+        profiler.dump_stats(path)
+        output = io.StringIO()
+        pstats.Stats(profiler, stream=output).sort_stats('cumulative').print_stats(PROFILE_TOP)
+        return {'path': os.path.abspath(path), 'top': output.getvalue().splitlines()}
+
+    def to_dict(self):
+        return {
+            'run_id': self.run_id,
+            'script': self.script,
+            'args': self.args,
+            'started': self.started.isoformat(timespec='seconds'),
+            'finished': datetime.now().isoformat(timespec='seconds'),
+            'wall_seconds': round(time.perf_counter() - self._wall_start, 4),
+            'process_cpu_seconds': round(time.process_time() - self._cpu_start, 4),
+            'peak_rss_mb': _peak_rss_mb(resource.RUSAGE_SELF) if resource else None,
+            'children_peak_rss_mb': _peak_rss_mb(resource.RUSAGE_CHILDREN) if resource else None,
+            'stages': list(self.stages),
+            'http': self.http.summary(),
+        }
+
+    def save(self, path=None):
+        """Grava o relatório em JSON (padrão: data/reports/<script>_<data>_<hora>.json)."""
+        path = path or os.path.join(REPORTS_PATH, f"{self.run_id}.json")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, indent=2, ensure_ascii=False, default=str)
+        return os.path.abspath(path)
+
+
+def _stack():
+    """Etapas abertas na thread corrente (a mais interna por último)."""
+    stack = getattr(_local, 'stack', None)
+    if stack is None:
+        stack = _local.stack = []
+    return stack
+
+
+# --- Relatório ativo ---
+# As funções dos scripts registram etapas e requisições no relatório ativo; sem
+# um relatório iniciado (ex.: uso como biblioteca ou em processos filhos), os
+# registros são descartados.
+
+def start_run(script, args=None, profile=()):
+    """Inicia o relatório da execução corrente e o torna ativo."""
+    global _active
+    _active = RunReport(script, args, profile)
+    return _active
+
+
+def current_report():
+    """Relatório ativo, ou None."""
+    return _active
+
+
+@contextmanager
+def stage(name, rows_in=None):
+    """
+    Mede um trecho como etapa do relatório ativo.
+
+    Uso: `with stage('clean_newsapi_data', rows_in=len(df)) as s: ...; s.rows_out = len(out)`.
+    """
+    if _active is None:
+        yield StageRecord(name=name)
+        return
+    with _active.stage(name, rows_in) as record:
+        yield record
+
+
+def record_http(service, status, latency, retry=False):
+    """Registra uma requisição HTTP no relatório ativo."""
+    if _active is not None:
+        _active.record_http(service, status, latency, retry)
+
+
+def in_current_stage(func):
+    """
+    Envolve `func` para rodar em outra thread dentro das etapas abertas agora.
+
+    Uso: `executor.submit(in_current_stage(fetch), ...)`. As requisições feitas
+    pela função contam para essas etapas, e etapas abertas por ela têm a
+    etapa corrente como pai.
+    """
+    stack = list(_stack())
+
+    def run(*args, **kwargs):
+        previous = getattr(_local, 'stack', None)
+        _local.stack = list(stack)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            _local.stack = previous
+    return run
+
+
+def record_throttle(service, seconds):
+    """Registra a espera no limitador de taxa no relatório ativo."""
+    if _active is not None:
+        _active.http.record_throttle(service, seconds)
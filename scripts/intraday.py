@@ -0,0 +1,276 @@
+import argparse
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+import pandas as pd
+
+import data_collector_newsapi_fixed as collector
+from data_processor_newsapi_fixed import (FINAL_DATA_PATH, NEWS_INPUT_COLUMNS, SEARCH_TERM, TICKER, TODAY_STR,
+                                          clean_newsapi_data)
+from catalog import Catalog
+from dedup import deduplicate_articles
+from instrumentation import in_current_stage, stage, start_run
+from market_hours import MARKET_TIMEZONE, session_close_times
+from score_cache import ScoreCache
+from sentiment_lexicon import DEFAULT_LEXICON
+from sentiment_model import MODEL_PATH, SCORERS, load_scorer
+from storage import read_dataset
+from universe import UNIVERSE_PATH, load_universe
+
+# --- Sentimento Intradiário Alinhado às Barras de Preço ---
+# Em vez de reduzir `publishedAt` ao dia do calendário, as notícias são
+# agrupadas em intervalos (5m, 1h, ...) ou atribuídas ao pregão em que passam a
+# valer: notícias publicadas depois do fechamento da B3 contam para o pregão
+# seguinte. A junção com as barras é um merge "as-of" ordenado, em UTC, em que
+# cada barra só enxerga intervalos já encerrados na sua abertura.
+
+# Intervalos de agrupamento: frequência do pandas e intervalo das barras pedido ao yfinance
+INTERVALS = {
+    '5m': ('5min', '5m'),
+    '15m': ('15min', '15m'),
+    '30m': ('30min', '30m'),
+    '1h': ('1h', '1h'),
+    'session': (None, '1d'),
+}
+DEFAULT_INTERVAL = '1h'
+DEFAULT_DAYS = 30  # O yfinance limita barras de 5 minutos aos últimos 60 dias
+
+
+def to_utc(values, naive_tz='UTC'):
+    """Converte uma Series de datas para UTC; datas sem fuso são interpretadas em `naive_tz`."""
+    values = pd.to_datetime(values)
+    if values.dt.tz is None:
+        values = values.dt.tz_localize(naive_tz)
+    # Mesma resolução dos dois lados do merge as-of
+    return values.dt.tz_convert('UTC').astype('datetime64[ns, UTC]')
+
+
+def bars_from_yfinance(stock_data, ticker=None):
+    """
+    Converte barras no formato do yfinance (colunas Price/Ticker) em formato longo.
+
+    Retorna ticker, Datetime (UTC), Open, High, Low, Close e Volume, ordenado
+    por ticker e horário. Horários sem fuso são tratados como horário da B3.
+    """
+    if isinstance(stock_data.columns, pd.MultiIndex):
+        tickers = stock_data.columns.get_level_values('Ticker').unique()
+        frames = {t: stock_data.xs(t, axis=1, level='Ticker') for t in tickers}
+    else:
+        frames = {ticker: stock_data}
+    parts = []
+    for symbol, frame in frames.items():
+        frame = frame.dropna(how='all')
+        part = pd.DataFrame({'Datetime': to_utc(pd.Series(frame.index), naive_tz=MARKET_TIMEZONE)})
+        part.insert(0, 'ticker', symbol)
+        for column in ('Open', 'High', 'Low', 'Close', 'Volume'):
+            part[column] = frame[column].to_numpy()
+        parts.append(part)
+    if not parts:
+        return pd.DataFrame(columns=['ticker', 'Datetime', 'Open', 'High', 'Low', 'Close', 'Volume'])
+    bars = pd.concat(parts, ignore_index=True)
+    return bars.sort_values(['ticker', 'Datetime'], ignore_index=True)
+
+
+def bucket_sentiment(news, interval=DEFAULT_INTERVAL, session_dates=None):
+    """
+    Soma e média dos scores por intervalo (e por ticker, se houver a coluna `ticker`).
+
+    `news` precisa de `publishedAt` e `sentiment_score`. Para intervalos
+    intradiários, cada notícia cai no intervalo que contém sua publicação, e
+    `available_at` marca o fim do intervalo. Para `'session'`, cada notícia
+    vai para o primeiro pregão de `session_dates` cujo fechamento ocorre
+    depois dela (um merge as-of para frente); notícias posteriores ao último
+    pregão conhecido são descartadas.
+    """
+    freq = INTERVALS[interval][0]
+    by = ['ticker'] if 'ticker' in news.columns else []
+    news = news[by + ['publishedAt', 'sentiment_score']].assign(publishedAt=to_utc(news['publishedAt']))
+
+    if interval == 'session':
+        if session_dates is None:
+            raise ValueError("O intervalo 'session' exige as datas dos pregões (session_dates).")
+        dates = pd.DatetimeIndex(pd.to_datetime(pd.Series(session_dates).drop_duplicates())).sort_values()
+        sessions = pd.DataFrame({'session': dates,
+                                 'available_at': session_close_times(dates).astype('datetime64[ns, UTC]')})
+        keyed = pd.merge_asof(news.sort_values('publishedAt'), sessions, left_on='publishedAt',
+                              right_on='available_at', direction='forward', allow_exact_matches=True)
+        keyed = keyed.dropna(subset=['session'])
+        key = 'session'
+    else:
+        keyed = news.assign(bucket=news['publishedAt'].dt.floor(freq))
+        keyed['available_at'] = keyed['bucket'] + pd.Timedelta(freq)
+        key = 'bucket'
+
+    grouped = keyed.groupby(by + [key, 'available_at'])['sentiment_score'].agg(['sum', 'count'])
+    grouped = grouped.reset_index().rename(columns={'sum': 'sentiment_sum', 'count': 'articles'})
+    grouped['sentiment_score'] = grouped['sentiment_sum'] / grouped['articles']
+    return grouped.sort_values('available_at', ignore_index=True)
+
+
+def align_intraday(bars, buckets, tolerance=None):
+    """
+    Junta a cada barra o sentimento do intervalo mais recente já encerrado na sua abertura.
+
+    `bars` vem de `bars_from_yfinance` (horários de abertura em UTC) e
+    `buckets`, de `bucket_sentiment` com um intervalo intradiário. O merge
+    as-of é feito por ticker quando as duas tabelas têm a coluna `ticker`;
+    `tolerance` (ex.: pd.Timedelta('1D')) descarta sentimentos mais antigos.
+    Acrescenta `return` (variação em relação à barra anterior do ticker) e
+    `session` (data do pregão no horário da B3).
+    """
+    by = 'ticker' if 'ticker' in bars.columns and 'ticker' in buckets.columns else None
+    bars = bars.sort_values(([by] if by else []) + ['Datetime'], ignore_index=True)
+    closes = bars['Close']
+    previous = closes.groupby(bars[by]).shift(1) if by else closes.shift(1)
+    bars['return'] = closes / previous - 1
+    bars['session'] = bars['Datetime'].dt.tz_convert(MARKET_TIMEZONE).dt.tz_localize(None).dt.normalize()
+
+    right = buckets[([by] if by else []) + ['available_at', 'sentiment_score', 'articles']]
+    aligned = pd.merge_asof(bars.sort_values('Datetime', kind='stable'), right.sort_values('available_at'),
+                            left_on='Datetime', right_on='available_at', by=by, direction='backward',
+                            tolerance=tolerance)
+    aligned = aligned.rename(columns={'available_at': 'sentiment_asof'})
+    return aligned.sort_values(([by] if by else []) + ['Datetime'], ignore_index=True)
+
+
+def align_sessions(bars, buckets):
+    """
+    Junta o sentimento de cada pregão às barras diárias, como `create_complete_dataset`.
+
+    `buckets` vem de `bucket_sentiment(..., 'session')`. Pregões sem notícias
+    recebem sentimento neutro (0); o primeiro pregão de cada ticker, sem
+    variação, é descartado.
+    """
+    by = ['ticker'] if 'ticker' in bars.columns else []
+    daily = bars.sort_values(by + ['Datetime'], ignore_index=True)
+    daily['session'] = daily['Datetime'].dt.tz_convert(MARKET_TIMEZONE).dt.tz_localize(None).dt.normalize()
+    closes = daily['Close']
+    previous = closes.groupby(daily['ticker']).shift(1) if by else closes.shift(1)
+    daily['price_change'] = closes / previous - 1
+    sentiment = buckets[[c for c in by + ['session', 'sentiment_score', 'articles'] if c in buckets.columns]]
+    merged = daily.merge(sentiment, on=[c for c in by + ['session'] if c in sentiment.columns], how='left')
+    merged = merged.fillna({'sentiment_score': 0.0, 'articles': 0}).dropna(subset=['price_change'])
+    merged['articles'] = merged['articles'].astype(int)
+    return merged[by + ['session', 'Close', 'price_change', 'sentiment_score', 'articles']].rename(
+        columns={'session': 'date'}).reset_index(drop=True)
+
+
+def load_scored_news(entries, start, cache=None, dedup=True, lexicon=DEFAULT_LEXICON):
+    """Lê do Parquet as notícias dos tickers desde `start`, limpa, remove duplicatas e pontua."""
+    frames = []
+    for entry in entries:
+        news = read_dataset('news', tickers=[entry['ticker']], columns=NEWS_INPUT_COLUMNS, start=start)
+        if news.empty:
+            print(f"Nenhuma notícia de {entry['ticker']} em data/parquet/news.")
+            continue
+        cleaned = clean_newsapi_data(news, verbose=False)
+        if dedup and not cleaned.empty:
+            cleaned = deduplicate_articles(cleaned, verbose=False)
+        if cache is not None:
+            scores = cache.score_series(cleaned['full_text'], lexicon)
+        else:
+            scores = lexicon.score_series(cleaned['full_text'])
+        frames.append(pd.DataFrame({'ticker': entry['ticker'], 'publishedAt': cleaned['publishedAt'].array,
+                                    'sentiment_score': scores.to_numpy()}))
+    if not frames:
+        return pd.DataFrame(columns=['ticker', 'publishedAt', 'sentiment_score'])
+    return pd.concat(frames, ignore_index=True)
+
+
+def fetch_bars(ticker, start, end, bar_interval):
+    """
+    Barras de um ticker no formato do yfinance, ou None.
+
+    Barras intradiárias vêm de `fetch_stock_prices`, que também as grava em
+    data/parquet/intraday. Barras diárias (intervalo 'session') vêm do
+    armazenamento local (data/prices), completado com os pregões que faltam,
+    sem gravar CSVs, Parquet ou entradas no catálogo.
+    """
+    if bar_interval != '1d':
+        return collector.fetch_stock_prices(ticker, start, end, bar_interval)
+    try:
+        stock_data = collector._download_missing_prices(ticker, start, end)
+    except Exception as e:
+        print(f"Erro ao buscar preços de {ticker}: {e}")
+        return None
+    return None if stock_data.empty else stock_data
+
+
+def build_intraday_dataset(entries, interval=DEFAULT_INTERVAL, days=DEFAULT_DAYS, cache=None, dedup=True,
+                           max_workers=collector.UNIVERSE_WORKERS, lexicon=DEFAULT_LEXICON):
+    """
+    Busca as barras dos tickers via `fetch_bars` e as alinha ao sentimento das notícias.
+
+    Retorna o dataset alinhado (uma linha por barra, ou por pregão com
+    `interval='session'`) ou None se não houver barras.
+    """
+    end = collector.END_DATE
+    start = end - timedelta(days=days)
+    bar_interval = INTERVALS[interval][1]
+
+    with stage('fetch_intraday_bars', rows_in=len(entries)) as s:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            downloads = list(executor.map(in_current_stage(
+                lambda entry: fetch_bars(entry['ticker'], start, end, bar_interval)), entries))
+        frames = [bars_from_yfinance(data, entry['ticker'])
+                  for entry, data in zip(entries, downloads) if data is not None]
+        if not frames:
+            return None
+        bars = pd.concat(frames, ignore_index=True)
+        s.rows_out = len(bars)
+
+    with stage('score_news', rows_in=len(entries)) as s:
+        news = load_scored_news(entries, start.strftime('%Y-%m-%d'), cache, dedup, lexicon)
+        s.rows_out = len(news)
+
+    with stage('align_intraday', rows_in=len(bars)) as s:
+        if interval == 'session':
+            sessions = bars['Datetime'].dt.tz_convert(MARKET_TIMEZONE).dt.tz_localize(None).dt.normalize()
+            buckets = bucket_sentiment(news, interval, session_dates=sessions)
+            aligned = align_sessions(bars, buckets)
+        else:
+            aligned = align_intraday(bars, bucket_sentiment(news, interval))
+        s.rows_out = len(aligned)
+    return aligned
+
+
+# --- Execução Principal ---
+if __name__ == "__main__":
+    print("--- Iniciando Alinhamento Intradiário de Sentimento ---")
+    parser = argparse.ArgumentParser(description="Alinha o sentimento das notícias a barras intradiárias de preço.")
+    parser.add_argument('--interval', choices=list(INTERVALS), default=DEFAULT_INTERVAL,
+                        help=f"Intervalo de agrupamento (padrão: {DEFAULT_INTERVAL})")
+    parser.add_argument('--days', type=int, default=DEFAULT_DAYS, help=f"Dias de histórico (padrão: {DEFAULT_DAYS})")
+    parser.add_argument('--universe', nargs='?', const=UNIVERSE_PATH, default=None,
+                        help="Processa todos os tickers do arquivo de universo (padrão: config/universe.json)")
+    parser.add_argument('--no-cache', action='store_true',
+                        help="Recalcula todos os scores sem usar o cache em data/cache")
+    parser.add_argument('--no-dedup', action='store_true',
+                        help="Não remove notícias duplicadas antes da análise de sentimento")
+    parser.add_argument('--scorer', choices=SCORERS, default='keywords',
+                        help="Pontuador de sentimento: léxico de palavras-chave ou modelo linear treinado (padrão: keywords)")
+    parser.add_argument('--model', default=MODEL_PATH,
+                        help="Arquivo do modelo linear usado com --scorer linear (padrão: data/models/sentiment_linear.npz)")
+    args = parser.parse_args()
+
+    entries = load_universe(args.universe) if args.universe else [{'name': SEARCH_TERM, 'ticker': TICKER}]
+    report = start_run('intraday', vars(args))
+    try:
+        aligned = build_intraday_dataset(entries, args.interval, args.days,
+                                         cache=None if args.no_cache else ScoreCache(), dedup=not args.no_dedup,
+                                         lexicon=load_scorer(args.scorer, args.model))
+        if aligned is None:
+            print("Nenhuma barra de preço encontrada.")
+        else:
+            filename = os.path.join(FINAL_DATA_PATH, f'intraday_{args.interval}_{TODAY_STR}.csv')
+            with stage('write_intraday', rows_in=len(aligned)) as s:
+                aligned.to_csv(filename, index=False)
+                Catalog().register(filename, 'intraday', aligned, ticker=None if args.universe else TICKER)
+                s.rows_out = len(aligned)
+            with_news = aligned['sentiment_score'].notna() & (aligned['articles'] > 0)
+            print(f"{len(aligned)} linhas ({with_news.mean():.0%} com sentimento) salvas em: {filename}")
+    finally:
+        print(f"Relatório da execução salvo em: {report.save()}")
+
+    print("--- Alinhamento Intradiário Finalizado ---")
@@ -0,0 +1,297 @@
+import argparse
+import json
+import os
+import time
+from datetime import datetime, timedelta, timezone
+
+import pandas as pd
+
+import data_collector_newsapi_fixed as collector
+from data_processor_newsapi_fixed import clean_newsapi_data
+from dedup import normalize_url
+from http_client import TokenBucket, create_session
+from instrumentation import stage, start_run
+from live_store import live_frame, live_path, save_live_state
+from market_hours import market_is_open, seconds_until_open
+from score_cache import ScoreCache, text_hash
+from sentiment_lexicon import DEFAULT_LEXICON
+from sentiment_model import MODEL_PATH, SCORERS, load_scorer
+
+# --- Monitoramento Contínuo de Headlines (Sentimento do Dia em Tempo Quase Real) ---
+# Durante o pregão da B3, consulta periodicamente /top-headlines e /everything,
+# pontua apenas as notícias ainda não vistas e soma os scores aos totais por
+# dia gravados em data/live/<ticker>_sentiment.json. O dashboard lê esse
+# arquivo a cada poucos segundos (ver live_store.py), sem depender do
+# processador em lote.
+
+POLL_SECONDS = 180  # Intervalo normal entre consultas
+MAX_POLL_SECONDS = 1800  # Teto do intervalo após respostas 429 ou falhas seguidas
+RETENTION_DAYS = 7  # Dias cujas chaves de notícias vistas são mantidas no arquivo
+POLL_PAGE_SIZE = 100  # Artigos por página do /everything
+
+
+class LiveSentiment:
+    """
+    Totais de sentimento por dia (soma e contagem de scores) mantidos entre consultas.
+
+    As chaves das notícias já pontuadas (URL normalizada e hash do texto) são
+    guardadas por dia de publicação, de modo que cada notícia entra nos totais
+    uma única vez mesmo reaparecendo em consultas seguintes ou nos dois
+    endpoints. Os dias seguem a convenção do processador (data UTC de
+    `publishedAt`).
+    """
+
+    def __init__(self, path):
+        self.path = path
+        state = {}
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        self.days = state.get('days', {})
+        self.seen = {day: set(keys) for day, keys in state.get('seen', {}).items()}
+        self.last_published = state.get('last_published')
+        self._seen_all = set().union(*self.seen.values())
+
+    def add_articles(self, articles, lexicon=DEFAULT_LEXICON, cache=None, advance=True):
+        """
+        Pontua as notícias ainda não vistas e as soma aos totais dos seus dias.
+
+        Com `advance=False` (consulta incompleta), `last_published` não avança,
+        e a próxima consulta começa de novo do mesmo ponto. Retorna o número de
+        notícias pontuadas.
+        """
+        if not articles:
+            return 0
+        cleaned = clean_newsapi_data(pd.DataFrame(articles, columns=collector.NEWS_COLUMNS), verbose=False)
+        keep, keys = [], []
+        for url, text in zip(cleaned['url'], cleaned['full_text']):
+            row_keys = [key for key in (normalize_url(url), text_hash(str(text).strip().lower())) if key]
+            is_new = not any(key in self._seen_all for key in row_keys)
+            keep.append(is_new)
+            if is_new:
+                # Também descarta repetições dentro da mesma consulta
+                self._seen_all.update(row_keys)
+                keys.append(row_keys)
+        new = cleaned[keep]
+        if new.empty:
+            return 0
+
+        if cache is not None:
+            scores = cache.score_series(new['full_text'], lexicon)
+        else:
+            scores = lexicon.score_series(new['full_text'])
+        day_strs = new['publishedAt'].dt.strftime('%Y-%m-%d').to_numpy()
+        for day, total in scores.groupby(day_strs).agg(['sum', 'count']).iterrows():
+            entry = self.days.setdefault(day, {'sum': 0.0, 'count': 0})
+            entry['sum'] += float(total['sum'])
+            entry['count'] += int(total['count'])
+        for day, row_keys in zip(day_strs, keys):
+            self.seen.setdefault(day, set()).update(row_keys)
+
+        latest = new['publishedAt'].max().strftime('%Y-%m-%dT%H:%M:%SZ')
+        if advance and (self.last_published is None or latest > self.last_published):
+            self.last_published = latest
+        return len(new)
+
+    def prune(self, retention_days=RETENTION_DAYS):
+        """Esquece as chaves vistas de dias antigos (os totais desses dias são mantidos)."""
+        cutoff = (datetime.now(timezone.utc) - timedelta(days=retention_days)).strftime('%Y-%m-%d')
+        for day in [day for day in self.seen if day < cutoff]:
+            del self.seen[day]
+        self._seen_all = set().union(*self.seen.values())
+
+    def daily_frame(self):
+        """Média diária no formato do processador (date, sentiment_score), mais o número de notícias."""
+        return live_frame(self.days)
+
+    def save(self):
+        """Grava os totais de forma atômica; o dashboard nunca lê um arquivo pela metade."""
+        save_live_state({
+            'updated': datetime.now().isoformat(timespec='seconds'),
+            'last_published': self.last_published,
+            'days': self.days,
+            'seen': {day: sorted(keys) for day, keys in self.seen.items()},
+        }, self.path)
+
+
+class HeadlinePoller:
+    """
+    Consulta os endpoints /top-headlines e /everything da NewsAPI.org em intervalos adaptativos.
+
+    Cada requisição passa pelo limitador de taxa e pelas novas tentativas de
+    `_newsapi_get`. Quando uma consulta termina com HTTP 429 (ou falha), o
+    intervalo até a próxima dobra, até `max_interval`, respeitando o
+    Retry-After enviado pelo servidor; consultas bem-sucedidas o reduzem pela
+    metade até voltar a `interval`. `complete` indica se a última consulta
+    trouxe todas as notícias do /everything desde `since`.
+    """
+
+    def __init__(self, api_key, query, session, limiter, interval=POLL_SECONDS, max_interval=MAX_POLL_SECONDS):
+        self.api_key = api_key
+        self.query = query
+        self.session = session
+        self.limiter = limiter
+        self.interval = interval
+        self.max_interval = max_interval
+        self.delay = interval
+        self.complete = True
+
+    def _get_articles(self, url, params):
+        """Busca um endpoint e retorna (resposta com os artigos convertidos ou None, status HTTP, Retry-After em segundos ou None)."""
+        try:
+            response = collector._newsapi_get(self.session, self.limiter, params,
+                                              headers=collector.NEWSAPI_HEADERS, url=url)
+            if response.status_code == 426:
+                # Mesmo fallback da coleta diária: repete sem os headers de navegador
+                response = collector._newsapi_get(self.session, self.limiter, params, retry=True, url=url)
+        except Exception as e:
+            print(f"Erro na requisição para {url}: {e}")
+            return None, 'error', None
+        retry_after = response.headers.get('Retry-After', '')
+        retry_after = float(retry_after) if retry_after.isdigit() else None
+        if response.status_code != 200:
+            print(f"Erro HTTP {response.status_code} em {url}")
+            return None, response.status_code, retry_after
+        data = response.json()
+        if data.get('status') != 'ok':
+            print(f"Erro na API em {url}: {data.get('message', 'Erro desconhecido')}")
+            return None, response.status_code, retry_after
+        data['articles'] = collector._parse_newsapi_articles(data)
+        return data, response.status_code, retry_after
+
+    def _everything_since(self, since, failures):
+        """
+        Todas as notícias do /everything publicadas desde `since`.
+
+        Percorre as páginas da consulta (mais recentes primeiro). Se o total
+        passar do que a paginação alcança (NEWSAPI_MAX_RESULTS), consulta de
+        novo com `to` na notícia mais antiga recebida, até cobrir `since`.
+        Falhas são anexadas a `failures`. Retorna (artigos, completo).
+        """
+        params = {'q': self.query, 'from': since, 'language': 'pt', 'sortBy': 'publishedAt',
+                  'pageSize': min(POLL_PAGE_SIZE, collector.NEWSAPI_MAX_RESULTS), 'apiKey': self.api_key}
+        articles = []
+        while True:
+            found, page = [], 1
+            while True:
+                data, status, wait = self._get_articles(collector.NEWSAPI_EVERYTHING_URL, {**params, 'page': page})
+                if data is None:
+                    failures.append((status, wait))
+                    return articles, False
+                found.extend(data['articles'])
+                total = int(data.get('totalResults') or 0)
+                if not data['articles'] or page * params['pageSize'] >= min(total, collector.NEWSAPI_MAX_RESULTS):
+                    break
+                page += 1
+            articles.extend(found)
+            if total <= collector.NEWSAPI_MAX_RESULTS or not found:
+                return articles, True
+            # A notícia mais antiga entra de novo na próxima consulta; repetições são descartadas pelas chaves vistas
+            oldest = min(article['publishedAt'] for article in found)
+            if oldest == params.get('to'):
+                print(f"Aviso: mais de {collector.NEWSAPI_MAX_RESULTS} notícias em {oldest}; o excedente não é coletado")
+                return articles, True
+            params['to'] = oldest
+
+    def poll(self, since):
+        """
+        Busca as headlines atuais e todas as notícias publicadas desde `since` (ISO 8601, UTC).
+
+        Retorna a lista de artigos e atualiza `delay`, a espera até a próxima
+        consulta, e `complete`.
+        """
+        headline_params = {'q': self.query, 'country': 'br', 'category': 'business',
+                           'pageSize': POLL_PAGE_SIZE, 'apiKey': self.api_key}
+        articles, failures = [], []
+        data, status, wait = self._get_articles(collector.NEWSAPI_HEADLINES_URL, headline_params)
+        if data is None:
+            failures.append((status, wait))
+        else:
+            articles.extend(data['articles'])
+        found, self.complete = self._everything_since(since, failures)
+        articles.extend(found)
+
+        if failures:
+            retry_after = max([wait or 0.0 for status, wait in failures if status == 429], default=0.0)
+            self.delay = min(max(self.delay * 2, retry_after), self.max_interval)
+        else:
+            self.delay = max(self.interval, self.delay / 2)
+        return articles
+
+
+def run_live(api_key, query, ticker, interval=POLL_SECONDS, market_hours_only=True, cache=None,
+             max_polls=None, requests_per_second=collector.REQUESTS_PER_SECOND, lexicon=DEFAULT_LEXICON):
+    """
+    Atualiza continuamente os totais de sentimento ao vivo de um ticker.
+
+    Fora do pregão (com `market_hours_only`), aguarda a próxima abertura. A
+    cada consulta, as notícias novas são pontuadas e o arquivo de
+    `live_path(ticker)` é regravado. `max_polls` limita o número de consultas
+    (útil em testes contra scripts/newsapi_standin.py).
+    """
+    state = LiveSentiment(live_path(ticker))
+    limiter = TokenBucket(requests_per_second)
+    polls = 0
+    with create_session(pool_size=2) as session:
+        poller = HeadlinePoller(api_key, query, session, limiter, interval)
+        while max_polls is None or polls < max_polls:
+            if market_hours_only and not market_is_open():
+                wait = seconds_until_open()
+                print(f"Pregão fechado; próxima consulta em {wait / 3600:.1f} h.")
+                time.sleep(wait)
+                continue
+
+            # Sem histórico, começa no início do dia (UTC), como a coleta diária
+            since = state.last_published or datetime.now(timezone.utc).strftime('%Y-%m-%dT00:00:00')
+            with stage('poll_headlines') as s:
+                articles = poller.poll(since)
+                n_new = state.add_articles(articles, lexicon, cache, advance=poller.complete)
+                state.prune()
+                state.save()
+                s.rows_out = n_new
+            polls += 1
+
+            daily = state.daily_frame()
+            if not daily.empty:
+                today = daily.iloc[-1]
+                print(f"[{datetime.now():%H:%M:%S}] {len(articles)} notícias recebidas, {n_new} novas; "
+                      f"sentimento de {today['date']:%Y-%m-%d}: {today['sentiment_score']:.3f} "
+                      f"({today['articles']} notícias). Próxima consulta em {poller.delay:.0f}s.")
+            if max_polls is None or polls < max_polls:
+                time.sleep(poller.delay)
+    return state
+
+
+# --- Execução Principal ---
+if __name__ == "__main__":
+    print("--- Iniciando Monitoramento de Headlines (NewsAPI.org) ---")
+    parser = argparse.ArgumentParser(description="Atualiza o sentimento do dia durante o pregão da B3.")
+    parser.add_argument('--ticker', default=collector.TICKER, help=f"Ticker monitorado (padrão: {collector.TICKER})")
+    parser.add_argument('--query', default=collector.SEARCH_TERM,
+                        help=f"Termo de busca na NewsAPI (padrão: {collector.SEARCH_TERM})")
+    parser.add_argument('--interval', type=float, default=POLL_SECONDS,
+                        help=f"Segundos entre consultas (padrão: {POLL_SECONDS})")
+    parser.add_argument('--always', action='store_true', help="Consulta também fora do horário do pregão")
+    parser.add_argument('--max-polls', type=int, default=None, help="Encerra após este número de consultas")
+    parser.add_argument('--no-cache', action='store_true',
+                        help="Recalcula todos os scores sem usar o cache em data/cache")
+    parser.add_argument('--scorer', choices=SCORERS, default='keywords',
+                        help="Pontuador de sentimento: léxico de palavras-chave ou modelo linear treinado (padrão: keywords)")
+    parser.add_argument('--model', default=MODEL_PATH,
+                        help="Arquivo do modelo linear usado com --scorer linear (padrão: data/models/sentiment_linear.npz)")
+    args = parser.parse_args()
+
+    if not collector.NEWSAPI_KEY:
+        raise ValueError("Chave da NEWSAPI_KEY não encontrada. Verifique seu arquivo .env")
+
+    report = start_run('live_sentiment', vars(args))
+    try:
+        run_live(collector.NEWSAPI_KEY, args.query, args.ticker, args.interval,
+                 market_hours_only=not args.always, cache=None if args.no_cache else ScoreCache(),
+                 max_polls=args.max_polls, lexicon=load_scorer(args.scorer, args.model))
+    except KeyboardInterrupt:
+        print("Monitoramento interrompido.")
+    finally:
+        print(f"Relatório da execução salvo em: {report.save()}")
+
+    print("--- Monitoramento de Headlines Finalizado ---")
@@ -0,0 +1,56 @@
+import json
+import os
+import tempfile
+
+import pandas as pd
+
+# --- Arquivo do Sentimento ao Vivo (data/live) ---
+# Gravado por scripts/live_sentiment.py e lido pelo dashboard. Este módulo não
+# importa o coletor nem o processador, de modo que o dashboard pode lê-lo sem
+# carregar o yfinance, o cliente HTTP ou as pastas criadas pelo coletor.
+
+LIVE_PATH = os.path.join(os.path.dirname(__file__), '..', 'data', 'live')
+
+
+def live_path(ticker):
+    """Arquivo com os totais ao vivo de um ticker."""
+    return os.path.join(LIVE_PATH, f"{ticker}_sentiment.json")
+
+
+def live_frame(days):
+    """Converte {dia: {'sum', 'count'}} em um DataFrame (date, sentiment_score, articles) ordenado."""
+    if not days:
+        return pd.DataFrame(columns=['date', 'sentiment_score', 'articles'])
+    totals = pd.DataFrame.from_dict(days, orient='index').sort_index()
+    return pd.DataFrame({'date': pd.to_datetime(totals.index),
+                         'sentiment_score': (totals['sum'] / totals['count']).to_numpy(),
+                         'articles': totals['count'].to_numpy()})
+
+
+def save_live_state(state, path):
+    """Grava o estado ao vivo de forma atômica (arquivo temporário + rename); o dashboard nunca lê um arquivo pela metade."""
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(state, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+    except Exception:
+        os.remove(tmp_path)
+        raise
+
+
+def read_live_sentiment(ticker, path=None):
+    """
+    Lê os totais ao vivo de um ticker para o dashboard.
+
+    Retorna (DataFrame de `live_frame`, horário da última atualização) ou None
+    se o monitoramento nunca rodou para o ticker.
+    """
+    path = path or live_path(ticker)
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r', encoding='utf-8') as f:
+        state = json.load(f)
+    return live_frame(state.get('days', {})), state.get('updated')
@@ -0,0 +1,47 @@
+from datetime import timedelta
+
+import pandas as pd
+
+# --- Horário do Pregão da B3 ---
+
+# Pregão regular (horário de Brasília), incluindo o leilão de fechamento
+MARKET_TIMEZONE = 'America/Sao_Paulo'
+MARKET_OPEN = (10, 0)
+MARKET_CLOSE = (18, 0)
+
+
+def _market_now(now):
+    return pd.Timestamp.now(tz=MARKET_TIMEZONE) if now is None else pd.Timestamp(now).tz_convert(MARKET_TIMEZONE)
+
+
+def market_is_open(now=None):
+    """Indica se `now` (padrão: agora) cai em um dia útil dentro do horário do pregão."""
+    now = _market_now(now)
+    opens = now.replace(hour=MARKET_OPEN[0], minute=MARKET_OPEN[1], second=0, microsecond=0)
+    closes = now.replace(hour=MARKET_CLOSE[0], minute=MARKET_CLOSE[1], second=0, microsecond=0)
+    return now.weekday() < 5 and opens <= now < closes
+
+
+def seconds_until_open(now=None):
+    """Segundos até a próxima abertura do pregão (0 se o pregão estiver aberto)."""
+    now = _market_now(now)
+    if market_is_open(now):
+        return 0.0
+    opens = now.replace(hour=MARKET_OPEN[0], minute=MARKET_OPEN[1], second=0, microsecond=0)
+    if opens <= now:
+        opens += timedelta(days=1)
+    while opens.weekday() >= 5:
+        opens += timedelta(days=1)
+    return (opens - now).total_seconds()
+
+
+def session_close_times(session_dates):
+    """
+    Horário de fechamento (UTC) de cada pregão, a partir das datas dos pregões.
+
+    Usar as datas em que houve negociação (e não o calendário de dias úteis)
+    faz com que feriados sejam pulados naturalmente.
+    """
+    dates = pd.DatetimeIndex(pd.to_datetime(session_dates)).normalize()
+    closes = dates + pd.Timedelta(hours=MARKET_CLOSE[0], minutes=MARKET_CLOSE[1])
+    return closes.tz_localize(MARKET_TIMEZONE).tz_convert('UTC')
@@ -0,0 +1,379 @@
+import argparse
+import hashlib
+import json
+import random
+import threading
+import time
+from collections import deque
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+import pandas as pd
+
+from market_hours import MARKET_CLOSE, MARKET_OPEN, MARKET_TIMEZONE
+from sentiment_lexicon import NEGATIVE_KEYWORDS, POSITIVE_KEYWORDS
+
+# --- Servidor Local Substituto da NewsAPI.org e do Yahoo Finance ---
+# Responde nos mesmos caminhos e formatos dos serviços reais:
+#   /v2/everything, /v2/top-headlines   (NewsAPI.org)
+#   /v8/finance/chart/<símbolo>          (API de gráficos do Yahoo, usada com PRICES_BASE_URL)
+#   /__stats                             (contadores de respostas do próprio servidor)
+# Uso com o coletor:
+#   NEWSAPI_BASE_URL=http://127.0.0.1:8765/v2 PRICES_BASE_URL=http://127.0.0.1:8765 NEWSAPI_KEY=teste \
+#       python scripts/data_collector_newsapi_fixed.py
+
+DEFAULT_PORT = 8765
+ARTICLES_PER_DAY = 20
+MAX_PAGE_SIZE = 100
+MAX_RESULTS = 100  # Resultados alcançáveis paginando, como no plano developer da NewsAPI.org
+INTRADAY_MINUTES = {'1m': 1, '2m': 2, '5m': 5, '15m': 15, '30m': 30, '60m': 60, '90m': 90, '1h': 60}  # Intervalos do chart
+
+SOURCES = ['InfoMoney', 'Valor Econômico', 'Exame', 'Money Times', 'CNN Brasil', 'Estadão']
+NEUTRAL_WORDS = ['empresa', 'ações', 'pregão', 'bilhões', 'reais', 'preço', 'setor', 'índice', 'governo']
+
+
+class StandInConfig:
+    """
+    Comportamento injetável do servidor.
+
+    - latency / jitter: atraso de cada resposta (segundos, uniforme em latency ± jitter)
+    - error_rate: fração de respostas 500
+    - error_pages: páginas do /everything que sempre respondem 500 (ex.: (2,) para
+      falhar no meio da paginação de uma janela)
+    - upgrade_rate: fração de respostas 426 para clientes com User-Agent de navegador
+      (o coletor repete a requisição sem esses headers)
+    - rate_limit: requisições por segundo antes de responder 429 com Retry-After
+    - quota: total de requisições aceitas (cota diária); depois, 429 "rateLimited"
+    - articles_per_day: notícias sintéticas por dia e termo de busca
+    - max_results: resultados alcançáveis paginando; páginas além dele recebem 426
+      "maximumResultsReached" (None: sem limite)
+    - replay: DataFrame de notícias no formato do coletor, servido no lugar das sintéticas
+    """
+
+    def __init__(self, latency=0.0, jitter=0.0, error_rate=0.0, upgrade_rate=0.0, rate_limit=None,
+                 quota=None, articles_per_day=ARTICLES_PER_DAY, max_results=MAX_RESULTS, replay=None, seed=42,
+                 error_pages=()):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_pages = set(error_pages)
+        self.upgrade_rate = upgrade_rate
+        self.rate_limit = rate_limit
+        self.quota = quota
+        self.articles_per_day = articles_per_day
+        self.max_results = max_results
+        self.replay = replay
+        self.seed = seed
+
+
+def _seed(*parts):
+    return int.from_bytes(hashlib.blake2b('|'.join(map(str, parts)).encode('utf-8'), digest_size=8).digest(), 'big')
+
+
+def synthetic_articles(query, day, count, seed=42):
+    """Notícias determinísticas para (termo, dia), no formato de resposta da NewsAPI."""
+    rng = np.random.default_rng(_seed(seed, query, day))
+    words = np.array(POSITIVE_KEYWORDS + NEGATIVE_KEYWORDS + NEUTRAL_WORDS, dtype=object)
+    subject = query.split(' OR ')[0].strip('"')
+    articles = []
+    for i, seconds in enumerate(np.sort(rng.integers(9 * 3600, 22 * 3600, count))[::-1]):
+        text = ' '.join(rng.choice(words, rng.integers(12, 40)))
+        published = datetime.combine(day, datetime.min.time()) + timedelta(seconds=int(seconds))
+        source = SOURCES[int(rng.integers(len(SOURCES)))]
+        articles.append({
+            'source': {'id': None, 'name': source},
+            'author': None,
+            'title': f"{subject}: {' '.join(rng.choice(words, 6))}",
+            'description': text[:160],
+            'url': f"https://standin.local/{day.isoformat()}/{_seed(query) % 10**8}-{i}",
+            'urlToImage': None,
+            'publishedAt': published.strftime('%Y-%m-%dT%H:%M:%SZ'),
+            'content': f"{text}… [+{int(rng.integers(500, 5000))} chars]",
+        })
+    return articles
+
+
+def replay_articles(replay, start, end):
+    """Notícias gravadas pelo coletor (CSV de data/raw) entre dois instantes (UTC, inclusive), no formato da NewsAPI."""
+    published = pd.to_datetime(replay['publishedAt'], utc=True, errors='coerce')
+    selected = replay[(published >= pd.Timestamp(start, tz='UTC')) & (published <= pd.Timestamp(end, tz='UTC'))]
+    selected = selected.iloc[np.argsort(-published[selected.index].astype('int64').to_numpy(), kind='stable')]
+    return [{
+        'source': {'id': None, 'name': row.get('source') or ''},
+        'author': None,
+        'title': row.get('title'),
+        'description': row.get('description'),
+        'url': row.get('url'),
+        'urlToImage': None,
+        'publishedAt': row.get('publishedAt'),
+        'content': row.get('body'),
+    } for row in selected.where(selected.notna(), None).to_dict('records')]
+
+
+def _intraday_bars(day, previous, close, volume, minutes, rng):
+    """
+    Barras de `minutes` minutos de um pregão, entre o fechamento anterior e o do dia.
+
+    O caminho é uma ponte browniana: a última barra fecha no fechamento diário,
+    de modo que as barras intradiárias concordam com as diárias.
+    """
+    session_minutes = (MARKET_CLOSE[0] - MARKET_OPEN[0]) * 60 + MARKET_CLOSE[1] - MARKET_OPEN[1]
+    n = -(-session_minutes // minutes)
+    path = np.cumsum(rng.normal(0.0, 0.015 / np.sqrt(n), n))
+    path += (np.log(close / previous) - path[-1]) * np.arange(1, n + 1) / n
+    closes = previous * np.exp(path)
+    opens = np.concatenate([[previous], closes[:-1]])
+    spread = np.abs(rng.normal(0, 0.002, (n, 2)))
+    opening = pd.Timestamp(day) + pd.Timedelta(hours=MARKET_OPEN[0], minutes=MARKET_OPEN[1])
+    times = pd.DatetimeIndex(opening + pd.to_timedelta(minutes * np.arange(n), unit='min')).tz_localize(MARKET_TIMEZONE)
+    return pd.DataFrame({'time': times, 'open': opens, 'high': np.maximum(opens, closes) * (1 + spread[:, 0]),
+                         'low': np.minimum(opens, closes) * (1 - spread[:, 1]), 'close': closes,
+                         'volume': rng.multinomial(volume, np.full(n, 1 / n))})
+
+
+def synthetic_chart(symbol, period1, period2, seed=42, interval='1d'):
+    """
+    Preços sintéticos (dias úteis) no formato da API de gráficos do Yahoo.
+
+    `interval` é '1d' ou um dos INTRADAY_MINUTES; barras intradiárias cobrem o
+    pregão da B3 e são marcadas pelo horário de abertura.
+    """
+    start = datetime.fromtimestamp(period1, tz=timezone.utc).date()
+    end = datetime.fromtimestamp(period2, tz=timezone.utc).date()
+    # O passeio aleatório começa em uma data fixa, de modo que consultas sobrepostas concordam
+    calendar = pd.bdate_range('2000-01-03', max(end, start))
+    rng = np.random.default_rng(_seed(seed, symbol))
+    close = 30.0 * np.exp(np.cumsum(rng.normal(0.0, 0.015, len(calendar))))
+    spread = np.abs(rng.normal(0, 0.006, (len(calendar), 2)))
+    volume = rng.integers(5_000_000, 60_000_000, len(calendar))
+    if interval == '1d':
+        mask = (calendar.date >= start) & (calendar.date < end)
+        bars = pd.DataFrame({'time': calendar[mask], 'open': close[mask] * (1 + spread[mask, 0] - spread[mask, 1]),
+                             'high': close[mask] * (1 + spread[mask, 0]), 'low': close[mask] * (1 - spread[mask, 1]),
+                             'close': close[mask], 'volume': volume[mask]})
+    else:
+        days = np.flatnonzero((calendar.date >= start) & (calendar.date <= end))
+        bars = pd.DataFrame(columns=['time', 'open', 'high', 'low', 'close', 'volume'])
+        if len(days):
+            bars = pd.concat([_intraday_bars(calendar[i], close[max(i - 1, 0)], close[i], volume[i],
+                                             INTRADAY_MINUTES[interval],
+                                             np.random.default_rng(_seed(seed, symbol, calendar[i].date(), interval)))
+                              for i in days], ignore_index=True)
+            epoch = bars['time'].map(lambda ts: ts.timestamp())
+            bars = bars[(epoch >= period1) & (epoch < period2)]
+    return {'chart': {'result': [{
+        'meta': {'symbol': symbol, 'currency': 'BRL', 'exchangeTimezoneName': MARKET_TIMEZONE,
+                 'dataGranularity': interval},
+        'timestamp': [int(ts.timestamp()) for ts in bars['time']],
+        'indicators': {'quote': [{
+            'open': bars['open'].astype(float).round(4).tolist(),
+            'high': bars['high'].astype(float).round(4).tolist(),
+            'low': bars['low'].astype(float).round(4).tolist(),
+            'close': bars['close'].astype(float).round(4).tolist(),
+            'volume': bars['volume'].astype('int64').tolist(),
+        }]},
+    }], 'error': None}}
+
+
+def _parse_bound(value, default, end=False):
+    """Limite from/to (UTC, sem fuso): uma data sozinha vale pelo dia inteiro, como na NewsAPI."""
+    if not value:
+        value = default.isoformat()
+    moment = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(timezone.utc).replace(tzinfo=None)
+    if end and 'T' not in value:
+        moment += timedelta(days=1, seconds=-1)
+    return moment
+
+
+class StandInServer:
+    """
+    Servidor HTTP local com as respostas da NewsAPI.org e do Yahoo Finance.
+
+    Pode ser executado como script ou iniciado em uma thread (`start`) por
+    benchmarks e testes de carga; `url` é a base do servidor e `stats` conta
+    as respostas por status.
+    """
+
+    def __init__(self, config=None, host='127.0.0.1', port=0):
+        self.config = config or StandInConfig()
+        self.stats = {'requests': 0, 'status': {}}
+        self._lock = threading.Lock()
+        self._recent = deque()
+        self._random = random.Random(self.config.seed)
+        self._httpd = ThreadingHTTPServer((host, port), self._handler())
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        """Atende em uma thread em segundo plano e retorna o próprio servidor."""
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def serve_forever(self):
+        try:
+            self._httpd.serve_forever()
+        finally:
+            self._httpd.server_close()
+
+    def _admit(self, browser):
+        """Decide, sob trava, se a requisição recebe erro injetado: (status, corpo, headers) ou None."""
+        config = self.config
+        with self._lock:
+            self.stats['requests'] += 1
+            now = time.monotonic()
+            if config.quota is not None and self.stats['requests'] > config.quota:
+                return 429, {'status': 'error', 'code': 'rateLimited',
+                             'message': 'You have made too many requests recently.'}, {}
+            if config.rate_limit:
+                while self._recent and now - self._recent[0] >= 1.0:
+                    self._recent.popleft()
+                if len(self._recent) >= config.rate_limit:
+                    return 429, {'status': 'error', 'code': 'rateLimited',
+                                 'message': 'Too many requests per second.'}, {'Retry-After': '1'}
+                self._recent.append(now)
+            error_draw, upgrade_draw = self._random.random(), self._random.random()
+        if error_draw < config.error_rate:
+            return 500, {'status': 'error', 'code': 'unexpectedError', 'message': 'Injected error.'}, {}
+        if browser and upgrade_draw < config.upgrade_rate:
+            return 426, {'status': 'error', 'code': 'upgradeRequired', 'message': 'Upgrade required.'}, {}
+        return None
+
+    def _count(self, status):
+        with self._lock:
+            key = str(status)
+            self.stats['status'][key] = self.stats['status'].get(key, 0) + 1
+
+    def _everything(self, params):
+        config = self.config
+        today = datetime.now(timezone.utc).date()
+        start = _parse_bound(params.get('from'), today - timedelta(days=29))
+        end = _parse_bound(params.get('to'), today, end=True)
+        page_size = min(int(params.get('pageSize', MAX_PAGE_SIZE)), MAX_PAGE_SIZE)
+        page = max(int(params.get('page', 1)), 1)
+        if page in config.error_pages:
+            return 500, {'status': 'error', 'code': 'unexpectedError', 'message': f'Injected error on page {page}.'}
+        if config.max_results is not None and (page - 1) * page_size >= config.max_results:
+            return 426, {'status': 'error', 'code': 'maximumResultsReached',
+                         'message': f'You have requested too many results. Limited to {config.max_results} results.'}
+        if config.replay is not None:
+            articles = replay_articles(config.replay, start, end)
+        else:
+            low, high = start.strftime('%Y-%m-%dT%H:%M:%SZ'), end.strftime('%Y-%m-%dT%H:%M:%SZ')
+            articles = []
+            day = end.date()
+            while day >= start.date():
+                articles.extend(article for article in synthetic_articles(params.get('q', ''), day,
+                                                                          config.articles_per_day, config.seed)
+                                if low <= article['publishedAt'] <= high)
+                day -= timedelta(days=1)
+        return 200, {'status': 'ok', 'totalResults': len(articles),
+                     'articles': articles[(page - 1) * page_size:page * page_size]}
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def _send(self, status, body, headers=None):
+                payload = json.dumps(body, ensure_ascii=False).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json; charset=utf-8')
+                self.send_header('Content-Length', str(len(payload)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(payload)
+                server._count(status)
+
+            def do_GET(self):
+                parsed = urlparse(self.path)
+                params = {key: values[-1] for key, values in parse_qs(parsed.query).items()}
+                if parsed.path == '/__stats':
+                    with server._lock:
+                        stats = json.loads(json.dumps(server.stats))
+                    return self._send(200, stats)
+
+                config = server.config
+                if config.latency or config.jitter:
+                    time.sleep(max(0.0, config.latency + random.uniform(-config.jitter, config.jitter)))
+
+                is_news = parsed.path in ('/v2/everything', '/v2/top-headlines')
+                if is_news and not params.get('apiKey'):
+                    return self._send(401, {'status': 'error', 'code': 'apiKeyMissing',
+                                            'message': 'Your API key is missing.'})
+                injected = server._admit('Mozilla' in self.headers.get('User-Agent', ''))
+                if injected is not None:
+                    return self._send(*injected)
+
+                if parsed.path == '/v2/everything':
+                    return self._send(*server._everything(params))
+                if parsed.path == '/v2/top-headlines':
+                    today = datetime.now(timezone.utc).date()
+                    articles = synthetic_articles(params.get('q', ''), today, config.articles_per_day, config.seed)
+                    page_size = min(int(params.get('pageSize', 20)), MAX_PAGE_SIZE)
+                    return self._send(200, {'status': 'ok', 'totalResults': len(articles),
+                                            'articles': articles[:page_size]})
+                if parsed.path.startswith('/v8/finance/chart/'):
+                    symbol = parsed.path.rsplit('/', 1)[-1]
+                    period2 = int(params.get('period2', time.time()))
+                    period1 = int(params.get('period1', period2 - 30 * 86400))
+                    interval = params.get('interval', '1d')
+                    if interval != '1d' and interval not in INTRADAY_MINUTES:
+                        return self._send(422, {'chart': {'result': None, 'error': {
+                            'code': 'Unprocessable Entity',
+                            'description': f"Invalid input - interval={interval} is not supported"}}})
+                    return self._send(200, synthetic_chart(symbol, period1, period2, config.seed, interval))
+                return self._send(404, {'status': 'error', 'code': 'notFound', 'message': 'Unknown endpoint.'})
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+
+# --- Execução Principal ---
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Servidor local que substitui a NewsAPI.org e o Yahoo Finance.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help=f"Porta (padrão: {DEFAULT_PORT})")
+    parser.add_argument('--latency', type=float, default=0.0, help="Atraso de cada resposta em segundos")
+    parser.add_argument('--jitter', type=float, default=0.0, help="Variação do atraso em segundos (±)")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="Fração de respostas 500")
+    parser.add_argument('--error-pages', type=int, nargs='*', default=[],
+                        help="Páginas do /everything que sempre respondem 500")
+    parser.add_argument('--upgrade-rate', type=float, default=0.0,
+                        help="Fração de respostas 426 para clientes com User-Agent de navegador")
+    parser.add_argument('--rate-limit', type=int, default=None, help="Requisições por segundo antes de responder 429")
+    parser.add_argument('--quota', type=int, default=None, help="Total de requisições aceitas antes de 429 (cota diária)")
+    parser.add_argument('--articles-per-day', type=int, default=ARTICLES_PER_DAY,
+                        help=f"Notícias sintéticas por dia (padrão: {ARTICLES_PER_DAY})")
+    parser.add_argument('--max-results', type=int, default=MAX_RESULTS,
+                        help=f"Resultados alcançáveis paginando por consulta (padrão: {MAX_RESULTS}; 0: sem limite)")
+    parser.add_argument('--replay', default=None,
+                        help="CSV de notícias gravado pelo coletor (data/raw) servido no lugar das sintéticas")
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    config = StandInConfig(latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+                           upgrade_rate=args.upgrade_rate, rate_limit=args.rate_limit, quota=args.quota,
+                           articles_per_day=args.articles_per_day, max_results=args.max_results or None,
+                           replay=pd.read_csv(args.replay) if args.replay else None, seed=args.seed,
+                           error_pages=args.error_pages)
+    server = StandInServer(config, args.host, args.port)
+    print(f"Servidor substituto em {server.url} (NEWSAPI_BASE_URL={server.url}/v2, PRICES_BASE_URL={server.url})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("Servidor encerrado.")
@@ -0,0 +1,220 @@
+import argparse
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+import data_collector_newsapi_fixed as collector
+from data_processor_newsapi_fixed import (FINAL_DATA_PATH, TODAY_STR, clean_newsapi_data, combine_partial_sentiment,
+                                          create_complete_dataset, process_stock_data)
+from catalog import Catalog
+from dedup import deduplicate_articles, normalize_url
+from instrumentation import in_current_stage, stage, start_run
+from score_cache import ScoreCache, text_hash
+from sentiment_lexicon import DEFAULT_LEXICON
+from sentiment_model import MODEL_PATH, SCORERS, load_scorer
+from storage import flatten_yfinance_prices, write_dataset
+
+# --- Pipeline Contínuo: Coleta -> Limpeza -> Sentimento -> Dataset Final ---
+# Substitui a passagem de arquivos entre o coletor e o processador: as notícias
+# de cada dia seguem para a limpeza e a pontuação assim que o dia fica completo,
+# enquanto as threads de coleta continuam buscando as demais janelas de datas
+# (ver `NewsApiPlanner` no coletor). Os preços ficam em
+# memória (Close como float), sem o CSV intermediário. Gravar os dados brutos
+# em data/raw e data/parquet é opcional (--persist-raw).
+
+BATCH_DAYS = 7  # Dias agrupados por lote de limpeza/pontuação (amortiza o custo fixo do pandas)
+
+
+def batch_days(days, batch_days=BATCH_DAYS, stats=None):
+    """Agrupa os dias coletados em listas de artigos de até `batch_days` dias."""
+    articles, pending = [], 0
+    for date_str, day_articles in days:
+        if stats is not None:
+            stats['days'] += 1
+            stats['days_failed'] += day_articles is None
+        articles.extend(day_articles or [])
+        pending += 1
+        if pending >= batch_days:
+            if articles:
+                yield articles
+            articles, pending = [], 0
+    if articles:
+        yield articles
+
+
+def persist_raw_batches(batches, query, ticker, name=None):
+    """
+    Repassa os lotes sem alterá-los e, ao final, grava as notícias brutas.
+
+    Saída lateral opcional: mesmo CSV de data/raw e mesmo dataset Parquet
+    gravados por `fetch_newsapi_news_fixed`.
+    """
+    frames = []
+    for articles in batches:
+        frames.append(pd.DataFrame(articles, columns=collector.NEWS_COLUMNS))
+        yield articles
+    if not frames:
+        return
+    df = pd.concat(frames, ignore_index=True).sort_values('publishedAt', ascending=False, ignore_index=True)
+    prefix = name or query.replace(' ', '_')
+    filename = f"{prefix}_news_newsapi_fixed_{collector.END_DATE.strftime('%Y%m%d')}.csv"
+    with stage('write_news', rows_in=len(df)) as s:
+        df.to_csv(os.path.join(collector.RAW_DATA_PATH, filename), index=False)
+        Catalog().register(os.path.join(collector.RAW_DATA_PATH, filename), 'news', df, ticker=ticker, query=prefix)
+        write_dataset(df, 'news', ticker)
+        s.rows_out = len(df)
+    print(f"Notícias brutas salvas em: {filename} (e em data/parquet/news)")
+
+
+def clean_batches(batches, dedup=True, stats=None):
+    """
+    Limpa cada lote e remove duplicatas.
+
+    Quase duplicatas (MinHash) são detectadas dentro do lote; duplicatas exatas
+    (mesma URL normalizada ou mesmo texto) também entre lotes, por meio das
+    chaves já vistas.
+    """
+    seen = set()
+    for articles in batches:
+        cleaned = clean_newsapi_data(pd.DataFrame(articles, columns=collector.NEWS_COLUMNS), verbose=False)
+        if dedup and not cleaned.empty:
+            cleaned = deduplicate_articles(cleaned, verbose=False)
+            urls = [normalize_url(url) for url in cleaned['url']]
+            hashes = [text_hash(str(text).strip().lower()) for text in cleaned['full_text']]
+            keep = [not ((url and url in seen) or text in seen) for url, text in zip(urls, hashes)]
+            seen.update(url for url in urls if url)
+            seen.update(hashes)
+            cleaned = cleaned[keep]
+        if stats is not None:
+            stats['articles'] += len(articles)
+            stats['unique'] += len(cleaned)
+        if not cleaned.empty:
+            yield cleaned
+
+
+def score_batches(batches, lexicon=DEFAULT_LEXICON, cache=None, stats=None):
+    """Pontua cada lote e gera a soma e a contagem de scores por dia."""
+    for cleaned in batches:
+        start = time.perf_counter()
+        if cache is not None:
+            scores = cache.score_series(cleaned['full_text'], lexicon)
+        else:
+            scores = lexicon.score_series(cleaned['full_text'])
+        partial = scores.groupby(cleaned['day'].to_numpy()).agg(['sum', 'count'])
+        if stats is not None:
+            stats['score_seconds'] += time.perf_counter() - start
+        yield partial
+
+
+def run_pipeline(api_key, query, ticker, start_date, end_date, max_workers=collector.MAX_WORKERS,
+                 requests_per_second=collector.REQUESTS_PER_SECOND, cache=None, dedup=True,
+                 persist_raw=False, batch_size=BATCH_DAYS, name=None, lexicon=DEFAULT_LEXICON):
+    """
+    Coleta, pontua e junta notícias e preços de um ticker em um único processo.
+
+    Os preços são baixados em uma thread paralela à coleta das notícias. As
+    notícias passam pela cadeia de geradores coleta -> lotes -> [gravação
+    bruta] -> limpeza -> pontuação, e os agregados parciais por data são
+    combinados na média diária, como em `analyze_sentiment_streaming`.
+    Retorna o dataset final (date, Close, price_change, sentiment_score) ou
+    None se não houver preços.
+    """
+    stats = {'days': 0, 'days_failed': 0, 'articles': 0, 'unique': 0, 'score_seconds': 0.0}
+    plan = {}
+    dates = collector._date_range(start_date, end_date)
+    print(f"Pipeline contínuo para '{query}' ({ticker}): {len(dates)} dias...")
+
+    def download_prices():
+        # Etapa própria na thread dos preços, para que as requisições não contem na coleta das notícias
+        with stage('download_prices') as s:
+            stock_data = collector._download_prices(ticker, start_date, end_date)
+            s.rows_out = 0 if stock_data is None else len(stock_data)
+            return stock_data
+
+    with ThreadPoolExecutor(max_workers=1) as prices_executor:
+        prices_future = prices_executor.submit(in_current_stage(download_prices))
+
+        with stage('stream_sentiment', rows_in=len(dates)) as s:
+            days = collector.stream_newsapi_days(api_key, query, dates, max_workers, requests_per_second, stats=plan)
+            batches = batch_days(days, batch_size, stats)
+            if persist_raw:
+                batches = persist_raw_batches(batches, query, ticker, name)
+            partials = list(score_batches(clean_batches(batches, dedup, stats), lexicon, cache, stats))
+            sentiment_data, n_scored = combine_partial_sentiment(partials)
+            s.rows_out = len(sentiment_data)
+            collector.report_newsapi_plan(s, plan, stats['articles'])
+        print(f"Notícias: {stats['articles']} coletadas, {n_scored} únicas pontuadas em {len(sentiment_data)} datas "
+              f"({stats['days_failed']} de {stats['days']} dias falharam); "
+              f"pontuação: {stats['score_seconds']:.2f}s sobrepostos à coleta")
+
+        with stage('fetch_stock_prices') as s:
+            try:
+                stock_data = prices_future.result()
+            except Exception as e:
+                print(f"Erro ao buscar dados de ações: {e}")
+                return None
+            s.rows_out = len(stock_data)
+    if stock_data.empty:
+        print(f"Nenhum dado encontrado para {ticker}.")
+        return None
+    if persist_raw:
+        collector._save_stock_prices(stock_data, ticker)
+
+    stock_df = flatten_yfinance_prices(stock_data)[['Date', 'Close']]
+    with stage('process_stock_data', rows_in=len(stock_df)) as s:
+        processed_stock = process_stock_data(stock_df)
+        s.rows_out = len(processed_stock)
+    with stage('create_complete_dataset', rows_in=len(processed_stock)) as s:
+        final_df = create_complete_dataset(processed_stock, sentiment_data)
+        s.rows_out = len(final_df)
+    return final_df
+
+
+# --- Execução Principal ---
+if __name__ == "__main__":
+    print("--- Iniciando Pipeline Contínuo (Coleta + Processamento) ---")
+    parser = argparse.ArgumentParser(description="Coleta e processa notícias e preços sem arquivos intermediários.")
+    parser.add_argument('--persist-raw', action='store_true',
+                        help="Também grava as notícias e os preços brutos em data/raw e data/parquet")
+    parser.add_argument('--workers', type=int, default=collector.MAX_WORKERS,
+                        help=f"Threads de coleta (padrão: {collector.MAX_WORKERS})")
+    parser.add_argument('--rps', type=float, default=collector.REQUESTS_PER_SECOND,
+                        help=f"Limite de requisições/s (padrão: {collector.REQUESTS_PER_SECOND})")
+    parser.add_argument('--batch-days', type=int, default=BATCH_DAYS,
+                        help=f"Dias por lote de pontuação (padrão: {BATCH_DAYS})")
+    parser.add_argument('--no-cache', action='store_true',
+                        help="Recalcula todos os scores sem usar o cache em data/cache")
+    parser.add_argument('--no-dedup', action='store_true',
+                        help="Não remove notícias duplicadas antes da análise de sentimento")
+    parser.add_argument('--scorer', choices=SCORERS, default='keywords',
+                        help="Pontuador de sentimento: léxico de palavras-chave ou modelo linear treinado (padrão: keywords)")
+    parser.add_argument('--model', default=MODEL_PATH,
+                        help="Arquivo do modelo linear usado com --scorer linear (padrão: data/models/sentiment_linear.npz)")
+    args = parser.parse_args()
+
+    if not collector.NEWSAPI_KEY:
+        raise ValueError("Chave da NEWSAPI_KEY não encontrada. Verifique seu arquivo .env")
+
+    report = start_run('pipeline', vars(args))
+    final_df = None
+    try:
+        final_df = run_pipeline(collector.NEWSAPI_KEY, collector.SEARCH_TERM, collector.TICKER,
+                                collector.START_DATE, collector.END_DATE, args.workers, args.rps,
+                                cache=None if args.no_cache else ScoreCache(), dedup=not args.no_dedup,
+                                persist_raw=args.persist_raw, batch_size=args.batch_days,
+                                lexicon=load_scorer(args.scorer, args.model))
+        if final_df is not None:
+            final_filename = os.path.join(FINAL_DATA_PATH, f'final_dataset_newsapi_fixed_{TODAY_STR}.csv')
+            with stage('write_final', rows_in=len(final_df)) as s:
+                write_dataset(final_df, 'final', collector.TICKER, mode='replace')
+                final_df.to_csv(final_filename, index=False)
+                Catalog().register(final_filename, 'final', final_df, ticker=collector.TICKER,
+                                   query=collector.SEARCH_TERM)
+                s.rows_out = len(final_df)
+            print(f"Dataset completo criado e salvo em: {final_filename}")
+    finally:
+        print(f"Relatório da execução salvo em: {report.save()}")
+
+    print("--- Pipeline Contínuo Finalizado ---")
@@ -0,0 +1,209 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+# --- Armazenamento Local de Preços (OHLCV) em Colunas Mapeadas em Memória ---
+# Cada ticker tem uma pasta com um arquivo binário por coluna, de largura fixa:
+#   day.i32 (dias desde 1970-01-01), open/high/low/close.f64, volume.i64
+# Os arquivos crescem pelo final; só os últimos pregões são regravados quando
+# chegam revisados (ex.: o pregão do dia, gravado antes do fechamento). A leitura
+# usa np.memmap: abrir um ticker não lê os dados, e um recorte por datas é uma
+# visão dos arrays, sem cópia.
+
+PRICE_STORE_PATH = os.path.join(os.path.dirname(__file__), '..', 'data', 'prices')
+COLUMNS = {'day': np.int32, 'open': np.float64, 'high': np.float64, 'low': np.float64,
+           'close': np.float64, 'volume': np.int64}
+SUFFIXES = {np.int32: 'i32', np.int64: 'i64', np.float64: 'f64'}  # Extensão dos arquivos por tipo
+FRAME_COLUMNS = {'Date': 'day', 'Open': 'open', 'High': 'high', 'Low': 'low', 'Close': 'close', 'Volume': 'volume'}
+
+
+def to_day(dates):
+    """Converte datas (ou uma Series/índice de datas) em dias desde 1970-01-01 (int32)."""
+    dates = pd.DatetimeIndex(pd.to_datetime(dates))
+    if dates.tz is not None:
+        dates = dates.tz_localize(None)
+    return dates.to_numpy(dtype='datetime64[D]').astype(np.int32)
+
+
+def _day_or_none(date):
+    return None if date is None else to_day([date])[0]
+
+
+class PriceSeries:
+    """
+    Barras diárias de um ticker como arrays NumPy (memmaps ou visões deles).
+
+    Atributos: `day`, `open`, `high`, `low`, `close` e `volume`, todos com o
+    mesmo comprimento e ordenados por `day`.
+    """
+
+    def __init__(self, ticker, arrays):
+        self.ticker = ticker
+        for name in COLUMNS:
+            setattr(self, name, arrays[name])
+
+    def __len__(self):
+        return len(self.day)
+
+    def bounds(self, start=None, end=None):
+        """Posições [lo, hi) dos pregões com start <= data <= end (busca binária no índice de dias)."""
+        return self._bounds(_day_or_none(start), _day_or_none(end))
+
+    def _bounds(self, start_day, end_day):
+        lo = 0 if start_day is None else int(np.searchsorted(self.day, start_day, side='left'))
+        hi = len(self) if end_day is None else int(np.searchsorted(self.day, end_day, side='right'))
+        return lo, max(lo, hi)
+
+    def slice(self, start=None, end=None):
+        """Recorte por datas, inclusive nas duas pontas, sem copiar os dados."""
+        return self._slice(_day_or_none(start), _day_or_none(end))
+
+    def _slice(self, start_day, end_day):
+        lo, hi = self._bounds(start_day, end_day)
+        return PriceSeries(self.ticker, {name: getattr(self, name)[lo:hi] for name in COLUMNS})
+
+    @property
+    def dates(self):
+        """Datas dos pregões (datetime64[D]); gera uma cópia."""
+        return self.day.astype('datetime64[D]')
+
+    def largest_gap(self):
+        """Maior distância, em dias corridos, entre pregões consecutivos (0 com menos de dois pregões)."""
+        return int(np.diff(self.day).max()) if len(self) > 1 else 0
+
+    def price_change(self):
+        """Variação percentual do fechamento em relação ao pregão anterior (NaN no primeiro)."""
+        close = np.asarray(self.close)
+        change = np.full(len(close), np.nan)
+        change[1:] = close[1:] / close[:-1] - 1
+        return change
+
+    def to_frame(self, columns=tuple(FRAME_COLUMNS)):
+        """DataFrame com as colunas pedidas (Date, Open, High, Low, Close, Volume), no formato de `flatten_yfinance_prices`."""
+        data = {}
+        for column in columns:
+            if column == 'Date':
+                data[column] = pd.to_datetime(self.dates).as_unit('ns')
+            else:
+                data[column] = np.asarray(getattr(self, FRAME_COLUMNS[column]))
+        return pd.DataFrame(data)
+
+    def to_yfinance(self):
+        """DataFrame no formato do yfinance (colunas Price/Ticker, índice Date), como o salvo nos CSVs do coletor."""
+        df = self.to_frame().set_index('Date')
+        df = df[['Close', 'High', 'Low', 'Open', 'Volume']]
+        df.columns = pd.MultiIndex.from_product([df.columns, [self.ticker]], names=['Price', 'Ticker'])
+        return df
+
+
+class PriceStore:
+    """
+    Histórico OHLCV diário por ticker em arquivos binários que crescem pelo final.
+
+    `append` grava pregões novos e substitui os já gravados nas mesmas datas,
+    regravando os arquivos apenas a partir do primeiro pregão que muda. O
+    arquivo `day.i32` é encurtado primeiro e gravado por último, e seu
+    comprimento define quantas linhas são válidas: uma gravação interrompida
+    deixa sobras nas outras colunas, que são descartadas na próxima gravação.
+    """
+
+    def __init__(self, root=PRICE_STORE_PATH):
+        self.root = root
+
+    def _path(self, ticker, name):
+        return os.path.join(self.root, ticker, f"{name}.{SUFFIXES[COLUMNS[name]]}")
+
+    def tickers(self):
+        """Tickers com preços gravados."""
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(name for name in os.listdir(self.root) if name in self)
+
+    def __contains__(self, ticker):
+        return self._rows(ticker) > 0
+
+    def _rows(self, ticker):
+        path = self._path(ticker, 'day')
+        return os.path.getsize(path) // np.dtype(COLUMNS['day']).itemsize if os.path.exists(path) else 0
+
+    def load(self, ticker):
+        """Abre os arquivos de um ticker como memmaps somente leitura (vazio se não houver dados)."""
+        rows = self._rows(ticker)
+        arrays = {}
+        for name, dtype in COLUMNS.items():
+            if rows == 0:
+                arrays[name] = np.empty(0, dtype=dtype)
+            else:
+                arrays[name] = np.memmap(self._path(ticker, name), dtype=dtype, mode='r', shape=(rows,))
+        return PriceSeries(ticker, arrays)
+
+    def load_many(self, tickers=None, start=None, end=None):
+        """Recortes de vários tickers (padrão: todos) como {ticker: PriceSeries}."""
+        tickers = self.tickers() if tickers is None else tickers
+        start_day, end_day = _day_or_none(start), _day_or_none(end)
+        return {ticker: self.load(ticker)._slice(start_day, end_day) for ticker in tickers}
+
+    def last_day(self, ticker):
+        """Data (Timestamp) do último pregão gravado, ou None."""
+        rows = self._rows(ticker)
+        if rows == 0:
+            return None
+        return pd.Timestamp(self.load(ticker).day[rows - 1].astype('datetime64[D]'))
+
+    def append(self, ticker, df):
+        """
+        Grava os pregões de `df` (Date, Open, High, Low, Close, Volume), substituindo os já gravados nas mesmas datas.
+
+        Pregões gravados a partir da primeira data de `df` que não estão nele
+        são mantidos. Linhas sem fechamento são ignoradas. Retorna o número de
+        pregões regravados (do primeiro novo ou alterado até o fim).
+        """
+        df = df.dropna(subset=['Close'])
+        days = to_day(df['Date'])
+        order = np.argsort(days, kind='stable')
+        days = days[order]
+        # Mantém a última ocorrência de cada dia
+        keep = np.r_[days[1:] != days[:-1], True] if len(days) else np.zeros(0, dtype=bool)
+        if not keep.any():
+            return 0
+        new = {'day': days[keep]}
+        for column, name in FRAME_COLUMNS.items():
+            if name != 'day':
+                new[name] = df[column].to_numpy()[order][keep]
+        new['volume'] = np.nan_to_num(new['volume'].astype(float), nan=0.0)
+        new = {name: np.asarray(values, dtype=COLUMNS[name]) for name, values in new.items()}
+
+        stored = self.load(ticker)
+        lo = int(np.searchsorted(stored.day, new['day'][0], side='left'))
+        old = {name: np.asarray(getattr(stored, name)[lo:]) for name in COLUMNS}
+        # Final dos arquivos: pregões gravados ausentes de `df` mais os de `df`, em ordem de data
+        kept = ~np.isin(old['day'], new['day'])
+        tail = {name: np.concatenate([old[name][kept], new[name]]) for name in COLUMNS}
+        tail_order = np.argsort(tail['day'], kind='stable')
+        tail = {name: values[tail_order] for name, values in tail.items()}
+
+        # Primeira linha do final que difere do que já está gravado
+        common = min(len(old['day']), len(tail['day']))
+        equal = np.ones(common, dtype=bool)
+        for name in COLUMNS:
+            a, b = old[name][:common], tail[name][:common]
+            equal &= (a == b) | (np.isnan(a) & np.isnan(b)) if a.dtype.kind == 'f' else (a == b)
+        same = common if equal.all() else int(np.argmin(equal))
+        if same == len(tail['day']) == len(old['day']):
+            return 0
+
+        # Libera os memmaps antes de encurtar os arquivos
+        del stored, old
+        os.makedirs(os.path.join(self.root, ticker), exist_ok=True)
+        rows = lo + same
+        # day.i32 é encurtado antes das outras colunas: se a gravação parar no meio, as linhas alteradas já não valem
+        with open(self._path(ticker, 'day'), 'ab') as f:
+            f.truncate(rows * np.dtype(COLUMNS['day']).itemsize)
+        for name in [n for n in COLUMNS if n != 'day'] + ['day']:
+            dtype = np.dtype(COLUMNS[name])
+            with open(self._path(ticker, name), 'ab') as f:
+                # Descarta as linhas substituídas e sobras de uma gravação interrompida antes de gravar o final
+                f.truncate(rows * dtype.itemsize)
+                f.write(tail[name][same:].tobytes())
+        return len(tail['day']) - same
@@ -0,0 +1,116 @@
+import os
+import sqlite3
+
+import pandas as pd
+
+# --- Estado persistido do processamento incremental ---
+
+STATE_PATH = os.path.join(os.path.dirname(__file__), '..', 'data', 'state', 'processor_state.sqlite')
+
+
+def _nullable(value):
+    """Converte NaN em None (NULL no SQLite)."""
+    return None if pd.isna(value) else float(value)
+
+
+class AggregateStore:
+    """
+    Agregados por data mantidos entre execuções do processador (SQLite).
+
+    Guarda, por ticker, a soma, a contagem, o mínimo e o máximo dos scores de
+    cada dia, o fechamento e a variação de cada pregão e quantos bytes de cada
+    arquivo acumulado (append-only) do coletor já foram processados. Uma
+    execução lê apenas o final dos arquivos e atualiza somente as datas
+    afetadas, em vez de reagrupar todo o histórico.
+
+    Os métodos não fazem commit: agrupe uma execução em `with store.conn:`
+    para que os agregados e as posições de leitura avancem juntos.
+    """
+
+    def __init__(self, path=STATE_PATH):
+        self.path = path
+        self._conn = None
+
+    @property
+    def conn(self):
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self._conn = sqlite3.connect(self.path, timeout=60)
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.executescript(
+                'CREATE TABLE IF NOT EXISTS sentiment_days ('
+                ' ticker TEXT NOT NULL, date TEXT NOT NULL, sum REAL NOT NULL, count INTEGER NOT NULL,'
+                ' min REAL NOT NULL, max REAL NOT NULL, PRIMARY KEY (ticker, date)) WITHOUT ROWID;'
+                'CREATE TABLE IF NOT EXISTS price_days ('
+                ' ticker TEXT NOT NULL, date TEXT NOT NULL, close REAL NOT NULL, price_change REAL,'
+                ' PRIMARY KEY (ticker, date)) WITHOUT ROWID;'
+                'CREATE TABLE IF NOT EXISTS progress ('
+                ' ticker TEXT NOT NULL, source TEXT NOT NULL, path TEXT NOT NULL, offset INTEGER NOT NULL,'
+                ' PRIMARY KEY (ticker, source)) WITHOUT ROWID;'
+            )
+        return self._conn
+
+    def offset(self, ticker, source, path):
+        """Bytes já processados do arquivo `path` ('news' ou 'prices'); 0 se o arquivo mudou de nome."""
+        row = self.conn.execute('SELECT path, offset FROM progress WHERE ticker = ? AND source = ?',
+                                (ticker, source)).fetchone()
+        if row is None or row[0] != os.path.abspath(path):
+            return 0
+        return row[1]
+
+    def set_offset(self, ticker, source, path, offset):
+        self.conn.execute('INSERT OR REPLACE INTO progress VALUES (?, ?, ?, ?)',
+                          (ticker, source, os.path.abspath(path), int(offset)))
+
+    def reset(self, ticker):
+        """Apaga os agregados e as posições de leitura de um ticker (reprocessamento completo)."""
+        for table in ('sentiment_days', 'price_days', 'progress'):
+            self.conn.execute(f'DELETE FROM {table} WHERE ticker = ?', (ticker,))
+
+    def add_sentiment(self, ticker, totals):
+        """
+        Soma agregados parciais aos dias existentes.
+
+        `totals` é indexado pela data (YYYY-MM-DD) e tem as colunas sum, count, min e max.
+        """
+        self.conn.executemany(
+            'INSERT INTO sentiment_days VALUES (?, ?, ?, ?, ?, ?) '
+            'ON CONFLICT (ticker, date) DO UPDATE SET sum = sum + excluded.sum, count = count + excluded.count, '
+            'min = MIN(min, excluded.min), max = MAX(max, excluded.max)',
+            ((ticker, date, float(row['sum']), int(row['count']), float(row['min']), float(row['max']))
+             for date, row in totals.iterrows())
+        )
+
+    def last_price(self, ticker, before=None):
+        """Último pregão processado (anterior a `before`, se dado) como (data YYYY-MM-DD, fechamento), ou (None, None)."""
+        row = self.conn.execute('SELECT date, close FROM price_days WHERE ticker = ? AND date < ? '
+                                'ORDER BY date DESC LIMIT 1', (ticker, before or '9999-12-31')).fetchone()
+        return row if row is not None else (None, None)
+
+    def add_prices(self, ticker, prices):
+        """Grava pregões novos ou revisados; `prices` tem as colunas date (YYYY-MM-DD), Close e price_change."""
+        self.conn.executemany(
+            'INSERT OR REPLACE INTO price_days VALUES (?, ?, ?, ?)',
+            ((ticker, date, float(close), _nullable(change))
+             for date, close, change in zip(prices['date'], prices['Close'], prices['price_change']))
+        )
+
+    def final_rows(self, ticker, dates):
+        """
+        Linhas do dataset final (date, Close, price_change, sentiment_score) para as datas dadas.
+
+        Mesmas regras de `create_complete_dataset`: apenas pregões, sentimento
+        neutro (0) em dias sem notícias e sem o primeiro pregão (sem variação).
+        """
+        self.conn.execute('CREATE TEMP TABLE IF NOT EXISTS affected (date TEXT PRIMARY KEY)')
+        self.conn.execute('DELETE FROM affected')
+        self.conn.executemany('INSERT OR IGNORE INTO affected VALUES (?)', ((d,) for d in dates))
+        rows = self.conn.execute(
+            'SELECT p.date, p.close, p.price_change, COALESCE(s.sum / s.count, 0.0) FROM price_days p '
+            'JOIN affected a ON a.date = p.date '
+            'LEFT JOIN sentiment_days s ON s.ticker = p.ticker AND s.date = p.date '
+            'WHERE p.ticker = ? AND p.price_change IS NOT NULL ORDER BY p.date', (ticker,)
+        ).fetchall()
+        df = pd.DataFrame(rows, columns=['date', 'Close', 'price_change', 'sentiment_score'])
+        df['date'] = pd.to_datetime(df['date'])
+        return df
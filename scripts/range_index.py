@@ -0,0 +1,128 @@
+import numpy as np
+import pandas as pd
+
+# --- Índice de Datas com Somas Prefixadas ---
+
+
+def _prefix(values):
+    """Soma prefixada com zero inicial, tratando NaN como 0."""
+    return np.concatenate(([0.0], np.cumsum(np.nan_to_num(values, nan=0.0))))
+
+
+class RangeIndex:
+    """
+    Índice ordenado por data com somas prefixadas de price_change e sentiment_score.
+
+    Um intervalo de datas é convertido em posições com busca binária
+    (O(log n)) e as métricas do intervalo — média de sentimento, variação
+    acumulada e correlação de Pearson entre o sentimento de D-1 e a variação
+    de preço de D — saem de diferenças de somas prefixadas em O(1).
+    """
+
+    def __init__(self, df):
+        df = df.sort_values('date', kind='stable').reset_index(drop=True)
+        self.df = df
+        self.dates = df['date'].to_numpy(dtype='datetime64[ns]')
+        self.close = df['Close'].to_numpy(dtype=float)
+        price_change = df['price_change'].to_numpy(dtype=float)
+        sentiment = df['sentiment_score'].to_numpy(dtype=float)
+
+        self._change_sum = _prefix(price_change)
+        self._sentiment_sum = _prefix(sentiment)
+        self._sentiment_count = _prefix(~np.isnan(sentiment))
+
+        # Pares (sentimento de D-1, variação de D): o par i usa as linhas i-1 e i
+        x = np.r_[np.nan, sentiment[:-1]]
+        y = price_change
+        self._lag_sentiment = x
+        self._price_change = y
+        valid = ~np.isnan(x) & ~np.isnan(y)
+        x = np.where(valid, x, 0.0)
+        y = np.where(valid, y, 0.0)
+        self._pair_n = _prefix(valid)
+        self._pair_x = _prefix(x)
+        self._pair_y = _prefix(y)
+        self._pair_xx = _prefix(x * x)
+        self._pair_yy = _prefix(y * y)
+        self._pair_xy = _prefix(x * y)
+
+    def __len__(self):
+        return len(self.dates)
+
+    def bounds(self, start, end):
+        """Posições [lo, hi) das linhas com start <= date <= end."""
+        lo = np.searchsorted(self.dates, np.datetime64(pd.Timestamp(start), 'ns'), side='left')
+        hi = np.searchsorted(self.dates, np.datetime64(pd.Timestamp(end), 'ns'), side='right')
+        return int(lo), int(hi)
+
+    def slice(self, start, end):
+        """Linhas do intervalo, como fatia contígua do DataFrame ordenado."""
+        lo, hi = self.bounds(start, end)
+        return self.df.iloc[lo:hi]
+
+    def metrics(self, start, end):
+        """
+        Métricas do intervalo: último fechamento, sentimento médio e variação acumulada.
+
+        Retorna None se não houver linhas no intervalo.
+        """
+        lo, hi = self.bounds(start, end)
+        if hi <= lo:
+            return None
+        count = self._sentiment_count[hi] - self._sentiment_count[lo]
+        return {
+            'latest_price': self.close[hi - 1],
+            'avg_sentiment': (self._sentiment_sum[hi] - self._sentiment_sum[lo]) / count if count else np.nan,
+            'price_change_sum': self._change_sum[hi] - self._change_sum[lo],
+            'rows': hi - lo,
+        }
+
+    def lag1_pairs(self, start, end, max_points=None):
+        """
+        Pares (sentiment_shifted, price_change) do intervalo, com as duas linhas dentro dele.
+
+        Equivale ao `.shift(1)` seguido de `dropna` no DataFrame filtrado, mas
+        lê os arrays do índice. Com `max_points`, toma pregões espaçados
+        igualmente antes de descartar os pares incompletos, de modo que o
+        custo não cresce com o tamanho do intervalo.
+        """
+        lo, hi = self.bounds(start, end)
+        a, b = lo + 1, hi
+        if b <= a:
+            positions = np.arange(0)
+        elif max_points is not None and b - a > max_points:
+            positions = np.unique(np.linspace(a, b - 1, max_points).astype(np.int64))
+        else:
+            positions = np.arange(a, b)
+        x = self._lag_sentiment[positions]
+        y = self._price_change[positions]
+        valid = ~np.isnan(x) & ~np.isnan(y)
+        return pd.DataFrame({'date': self.dates[positions][valid],
+                             'sentiment_shifted': x[valid], 'price_change': y[valid]})
+
+    def lag1_correlation(self, start, end):
+        """
+        Correlação de Pearson entre o sentimento de D-1 e a variação de preço de D no intervalo.
+
+        Considera apenas pares com as duas linhas dentro do intervalo, como o
+        `.shift(1)` aplicado ao DataFrame filtrado. Retorna (correlação, número
+        de pares); a correlação é NaN com menos de 2 pares ou variância nula.
+        """
+        lo, hi = self.bounds(start, end)
+        if hi - lo < 2:
+            return np.nan, 0
+        a, b = lo + 1, hi
+        n = self._pair_n[b] - self._pair_n[a]
+        if n < 2:
+            return np.nan, int(n)
+        sx = self._pair_x[b] - self._pair_x[a]
+        sy = self._pair_y[b] - self._pair_y[a]
+        sxx = self._pair_xx[b] - self._pair_xx[a]
+        syy = self._pair_yy[b] - self._pair_yy[a]
+        sxy = self._pair_xy[b] - self._pair_xy[a]
+        cov = sxy - sx * sy / n
+        var_x = sxx - sx * sx / n
+        var_y = syy - sy * sy / n
+        if var_x <= 0 or var_y <= 0:
+            return np.nan, int(n)
+        return cov / np.sqrt(var_x * var_y), int(n)
@@ -0,0 +1,201 @@
+import hashlib
+import json
+import os
+import sqlite3
+import time
+
+import numpy as np
+import pandas as pd
+
+# --- Cache Persistente de Scores de Sentimento ---
+
+CACHE_PATH = os.path.join(os.path.dirname(__file__), '..', 'data', 'cache', 'sentiment_scores.sqlite')
+MAX_ENTRIES = 2_000_000  # Limite de entradas antes da remoção das menos usadas
+EVICT_FRACTION = 0.1     # Fração extra de max_entries removida a cada limpeza, para não limpar a cada gravação
+KEYWORD_SCORER = 'keywords'  # Chave comum às versões de um léxico de palavras-chave
+
+
+def text_hash(text):
+    """Hash de conteúdo (BLAKE2b, 128 bits) do texto de um artigo."""
+    if pd.isna(text):
+        text = ''
+    return hashlib.blake2b(str(text).encode('utf-8'), digest_size=16).hexdigest()
+
+
+def _scorer_key(lexicon):
+    """
+    Chave do pontuador nas entradas do cache.
+
+    Léxicos de palavras-chave (com `score_with_keywords`) compartilham as entradas
+    entre versões; outros pontuadores, como o modelo linear, usam a impressão digital.
+    """
+    return KEYWORD_SCORER if hasattr(lexicon, 'score_with_keywords') else lexicon.fingerprint
+
+
+class ScoreCache:
+    """
+    Cache em disco (SQLite) de scores por artigo.
+
+    Cada entrada é indexada pelo hash do `full_text` e pelo pontuador, e guarda a
+    impressão digital da versão que a calculou. Para léxicos de palavras-chave a
+    entrada guarda também as palavras encontradas no texto: quando uma lista muda,
+    apenas os textos com uma palavra alterada, removida ou adicionada são pontuados
+    de novo (`KeywordLexicon.changed_since`); os demais passam para a nova versão.
+    Para os outros pontuadores, uma nova impressão digital invalida as entradas
+    anteriores. Passando de `max_entries`, as entradas usadas há mais tempo saem.
+
+    A conexão é aberta sob demanda, então o objeto pode ser enviado para
+    processos de um ProcessPoolExecutor.
+    """
+
+    def __init__(self, path=CACHE_PATH, max_entries=MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        self.last_hits = 0
+        self.last_misses = 0
+        self._conn = None
+        self._count = None
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_conn'] = None
+        state['_count'] = None
+        return state
+
+    @property
+    def conn(self):
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self._conn = sqlite3.connect(self.path, timeout=60)
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            # Formato anterior, indexado pela impressão digital do léxico inteiro
+            self._conn.execute('DROP TABLE IF EXISTS scores')
+            self._conn.execute(
+                'CREATE TABLE IF NOT EXISTS article_scores ('
+                ' text_hash TEXT NOT NULL, scorer TEXT NOT NULL, lexicon TEXT NOT NULL, keywords TEXT,'
+                ' score REAL NOT NULL, last_used REAL NOT NULL, PRIMARY KEY (text_hash, scorer)) WITHOUT ROWID'
+            )
+            self._conn.execute('CREATE INDEX IF NOT EXISTS article_scores_last_used ON article_scores (last_used)')
+            # Pesos de cada versão de léxico de palavras-chave com entradas no cache
+            self._conn.execute(
+                'CREATE TABLE IF NOT EXISTS lexicons (fingerprint TEXT PRIMARY KEY, weights TEXT NOT NULL)'
+            )
+        return self._conn
+
+    def lookup(self, hashes, scorer):
+        """Retorna {hash: (score, impressão digital, palavras-chave)} para os hashes já presentes no cache."""
+        unique = list(dict.fromkeys(hashes))
+        now = time.time()
+        with self.conn:
+            self.conn.execute('CREATE TEMP TABLE IF NOT EXISTS wanted (text_hash TEXT PRIMARY KEY)')
+            self.conn.execute('DELETE FROM wanted')
+            self.conn.executemany('INSERT INTO wanted VALUES (?)', ((h,) for h in unique))
+            rows = self.conn.execute(
+                'SELECT s.text_hash, s.score, s.lexicon, s.keywords FROM article_scores s '
+                'JOIN wanted w ON s.text_hash = w.text_hash WHERE s.scorer = ?', (scorer,)
+            ).fetchall()
+            found = {h: (score, lexicon, keywords) for h, score, lexicon, keywords in rows}
+            # Marca as entradas encontradas como usadas agora (política LRU)
+            self.conn.execute(
+                'UPDATE article_scores SET last_used = ? WHERE scorer = ? '
+                'AND text_hash IN (SELECT text_hash FROM wanted)', (now, scorer)
+            )
+        return found
+
+    def _revalidate(self, cached, texts, lexicon):
+        """
+        Mantém as entradas de outras versões do léxico cujo score não mudou.
+
+        `texts` mapeia cada hash para o seu texto. As entradas mantidas passam a
+        apontar para a versão atual, para não serem verificadas de novo.
+        """
+        valid, older = {}, {}
+        for h, (score, fingerprint, _) in cached.items():
+            if fingerprint == lexicon.fingerprint:
+                valid[h] = score
+            else:
+                older.setdefault(fingerprint, []).append(h)
+
+        kept = []
+        for fingerprint, group in older.items():
+            row = self.conn.execute('SELECT weights FROM lexicons WHERE fingerprint = ?', (fingerprint,)).fetchone()
+            if row is None:
+                continue
+            stale = lexicon.changed_since(json.loads(row[0]), [texts[h] for h in group],
+                                          [json.loads(cached[h][2]) for h in group])
+            kept.extend(h for h, is_stale in zip(group, stale) if not is_stale)
+        if kept:
+            with self.conn:
+                self.conn.executemany(
+                    'UPDATE article_scores SET lexicon = ? WHERE text_hash = ? AND scorer = ?',
+                    ((lexicon.fingerprint, h, KEYWORD_SCORER) for h in kept)
+                )
+            valid.update((h, cached[h][0]) for h in kept)
+        return valid
+
+    def store(self, hashes, scores, lexicon, keywords=None):
+        """Grava novos scores e aplica o limite de tamanho do cache."""
+        now = time.time()
+        scorer = _scorer_key(lexicon)
+        keywords = [None] * len(hashes) if keywords is None else [json.dumps(k, ensure_ascii=False) for k in keywords]
+        with self.conn:
+            if scorer == KEYWORD_SCORER:
+                self.conn.execute('INSERT OR IGNORE INTO lexicons VALUES (?, ?)',
+                                  (lexicon.fingerprint, json.dumps(lexicon.weights, ensure_ascii=False)))
+            self.conn.executemany(
+                'INSERT OR REPLACE INTO article_scores VALUES (?, ?, ?, ?, ?, ?)',
+                ((h, scorer, lexicon.fingerprint, k, float(score), now) for h, score, k in zip(hashes, scores, keywords))
+            )
+            # Contagem mantida em memória (limite superior: substituições também contam);
+            # o COUNT(*) só roda na abertura e quando o limite parece ter sido ultrapassado
+            if self._count is None:
+                self._count = self.conn.execute('SELECT COUNT(*) FROM article_scores').fetchone()[0]
+            else:
+                self._count += len(hashes)
+            if self._count > self.max_entries:
+                self._count = self.conn.execute('SELECT COUNT(*) FROM article_scores').fetchone()[0]
+                excess = self._count - self.max_entries
+                if excess > 0:
+                    excess += int(self.max_entries * EVICT_FRACTION)
+                    self.conn.execute(
+                        'DELETE FROM article_scores WHERE (text_hash, scorer) IN '
+                        '(SELECT text_hash, scorer FROM article_scores ORDER BY last_used LIMIT ?)', (excess,)
+                    )
+                    self._count = max(self._count - excess, 0)
+
+    def score_series(self, texts, lexicon):
+        """
+        Pontua uma Series de textos usando o cache.
+
+        Apenas textos ausentes do cache (novos ou alterados) ou afetados por uma
+        mudança do léxico são pontuados; os demais vêm do disco. Retorna uma Series
+        com o índice de `texts` e atualiza `last_hits`/`last_misses` com as
+        estatísticas da chamada.
+        """
+        texts = pd.Series(texts)
+        hashes = texts.map(text_hash).to_numpy()
+        scorer = _scorer_key(lexicon)
+        cached = self.lookup(hashes, scorer)
+        if scorer == KEYWORD_SCORER:
+            cached = self._revalidate(cached, dict(zip(hashes, texts.to_numpy())), lexicon)
+        else:
+            cached = {h: score for h, (score, fingerprint, _) in cached.items() if fingerprint == lexicon.fingerprint}
+
+        scores = np.array([cached.get(h, np.nan) for h in hashes], dtype=float)
+        missing = np.isnan(scores)
+        if missing.any():
+            # Textos repetidos são pontuados uma única vez
+            miss_hashes, first = np.unique(hashes[missing], return_index=True)
+            miss_texts = texts[missing].iloc[first]
+            if scorer == KEYWORD_SCORER:
+                new_scores, keywords = lexicon.score_with_keywords(miss_texts)
+            else:
+                new_scores, keywords = lexicon.score_series(miss_texts), None
+            new_scores = new_scores.to_numpy()
+            self.store(miss_hashes, new_scores, lexicon, keywords)
+            lookup = dict(zip(miss_hashes, new_scores))
+            scores[missing] = [lookup[h] for h in hashes[missing]]
+
+        self.last_hits = int((~missing).sum())
+        self.last_misses = int(missing.sum())
+        return pd.Series(scores, index=texts.index, name='sentiment_score')
@@ -0,0 +1,187 @@
+import hashlib
+import json
+import re
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+
+# --- Léxico de Sentimento ---
+
+# Palavras-chave positivas e negativas relacionadas a finanças e economia
+POSITIVE_KEYWORDS = [
+    # Termos financeiros positivos
+    'alta', 'subida', 'crescimento', 'lucro', 'ganho', 'positivo', 'melhora',
+    'recuperação', 'forte', 'bom', 'excelente', 'ótimo', 'favorável', 'otimista',
+    'avanço', 'progresso', 'sucesso', 'benefício', 'vantagem', 'superior',
+    'elevado', 'ascendente', 'próspero', 'rentável', 'lucrativo', 'promissor',
+    'expansão', 'desenvolvimento', 'inovação', 'tecnologia', 'investimento',
+    'parceria', 'acordo', 'negociação', 'cooperação', 'integração',
+    'sustentável', 'responsável', 'eficiente', 'produtivo', 'competitivo',
+    'estratégico', 'planejamento', 'visão', 'futuro', 'oportunidade',
+    'mercado', 'demanda', 'oferta', 'consumo', 'vendas', 'receita',
+    'dividendo', 'retorno', 'performance', 'resultado', 'balanço',
+    # Termos específicos da Petrobras
+    'petróleo', 'óleo', 'gás', 'refinaria', 'exploração', 'produção',
+    'reservas', 'pré-sal', 'bacia', 'poço', 'plataforma', 'navio',
+    'exportação', 'importação', 'comercialização', 'distribuição'
+]
+
+NEGATIVE_KEYWORDS = [
+    # Termos financeiros negativos
+    'queda', 'perda', 'negativo', 'piora', 'crise', 'problema',
+    'fraco', 'ruim', 'péssimo', 'desfavorável', 'pessimista', 'risco',
+    'declínio', 'recessão', 'falência', 'prejuízo', 'déficit',
+    'fracasso', 'insucesso', 'desvantagem', 'inferior', 'baixo', 'mínimo',
+    'redução', 'diminuição', 'queda', 'decréscimo', 'contração',
+    'instabilidade', 'volatilidade', 'incerteza', 'dúvida', 'preocupação',
+    'ameaça', 'perigo', 'risco', 'vulnerabilidade', 'fragilidade',
+    'dependência', 'limitação', 'obstáculo', 'barreira', 'impedimento',
+    'conflito', 'disputa', 'guerra', 'sanção', 'tarifa', 'taxação',
+    'inflação', 'desemprego', 'falta', 'escassez', 'carência',
+    'dívida', 'endividamento', 'calote', 'inadimplência', 'falência',
+    # Termos específicos negativos da Petrobras
+    'vazamento', 'poluição', 'acidente', 'greve', 'paralisação',
+    'investigação', 'multa', 'sanção', 'corrupção', 'escândalo',
+    'prejuízo', 'perda', 'queda', 'redução', 'corte', 'demissão'
+]
+
+
+def _trie_pattern(words):
+    """
+    Monta uma expressão regular em forma de trie a partir de uma lista de palavras.
+
+    Prefixos comuns são fatorados ('pre' em 'prejuízo' e 'preocupação'), de modo
+    que o custo em cada posição do texto depende da profundidade da trie e não
+    do número de palavras do léxico.
+    """
+    trie = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[''] = {}
+
+    def build(node):
+        end = '' in node
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        if end:
+            # A palavra pode terminar aqui ou continuar em um dos ramos
+            body = '(?:' + body + ')?'
+        return body
+
+    return build(trie)
+
+
+class KeywordLexicon:
+    """
+    Léxico compilado para pontuação de sentimento por palavras-chave.
+
+    As listas são compiladas uma única vez em uma regex com fronteiras de palavra
+    ("gás" não casa mais dentro de "gastos"). Cada texto é varrido em uma única
+    passada e uma Series inteira pode ser pontuada de uma vez com `score_series`.
+    """
+
+    def __init__(self, positive_keywords, negative_keywords):
+        positive_keywords = [w.lower() for w in positive_keywords]
+        negative_keywords = [w.lower() for w in negative_keywords]
+
+        # Peso de cada palavra: +1 por ocorrência na lista positiva, -1 na negativa.
+        # Palavras repetidas nas listas mantêm o peso que tinham na versão original.
+        weights = Counter(positive_keywords)
+        weights.subtract(Counter(negative_keywords))
+        self.weights = dict(weights)
+        self.positive_weights = dict(Counter(positive_keywords))
+        self.negative_weights = dict(Counter(negative_keywords))
+
+        self.pattern = re.compile(r'(?<!\w)(' + _trie_pattern(self.weights) + r')(?!\w)')
+
+        # Impressão digital do léxico: muda sempre que alguma lista muda
+        payload = json.dumps([sorted(self.positive_weights.items()), sorted(self.negative_weights.items())],
+                             ensure_ascii=False)
+        self.fingerprint = 'keywords:' + hashlib.sha256(payload.encode('utf-8')).hexdigest()[:16]
+
+    def calculate_sentiment_score(self, text):
+        """Calcula o score de sentimento de um único texto."""
+        if pd.isna(text) or not text:
+            return 0
+        text_lower = str(text).lower()
+
+        # Conta palavras positivas e negativas
+        found = set(self.pattern.findall(text_lower))
+        positive_count = sum(self.positive_weights.get(word, 0) for word in found)
+        negative_count = sum(self.negative_weights.get(word, 0) for word in found)
+
+        # Calcula o total de palavras para normalização
+        total_words = len(text_lower.split())
+        if total_words == 0:
+            return 0
+
+        score = (positive_count - negative_count) / max(total_words, 1)
+        return float(np.tanh(score * 3))  # Multiplica por 3 para dar mais peso
+
+    def _scan(self, texts):
+        """Scores de uma Series de textos e as palavras-chave distintas encontradas em cada um."""
+        texts = pd.Series(texts)
+        lowered = texts.fillna('').astype(str).str.lower().reset_index(drop=True)
+
+        # Uma única varredura por texto; cada palavra-chave conta uma vez por artigo
+        matches = lowered.str.findall(self.pattern).explode().dropna()
+        net = np.zeros(len(lowered), dtype=float)
+        found = pd.DataFrame({'pos': matches.index, 'word': matches.to_numpy()}).drop_duplicates()
+        if not found.empty:
+            per_text = found['word'].map(self.weights).groupby(found['pos']).sum()
+            net[per_text.index.to_numpy()] = per_text.to_numpy()
+
+        # Calcula o total de palavras para normalização
+        total_words = lowered.str.split().str.len().to_numpy()
+        scores = np.tanh(3 * net / np.maximum(total_words, 1))
+        scores[total_words == 0] = 0.0
+        return pd.Series(scores, index=texts.index, name='sentiment_score'), found
+
+    def score_series(self, texts):
+        """
+        Pontua uma Series inteira de textos em lote.
+
+        Retorna uma Series de floats com o mesmo índice de `texts`. Textos vazios
+        ou ausentes recebem score 0.
+        """
+        return self._scan(texts)[0]
+
+    def score_with_keywords(self, texts):
+        """
+        Como `score_series`, retornando também as palavras-chave de cada texto.
+
+        Retorna (scores, keywords), em que `keywords[i]` é a lista ordenada das
+        palavras do léxico encontradas no i-ésimo texto.
+        """
+        scores, found = self._scan(texts)
+        keywords = [[] for _ in range(len(scores))]
+        for pos, words in found.groupby('pos')['word']:
+            keywords[pos] = sorted(words)
+        return scores, keywords
+
+    def changed_since(self, old_weights, texts, keywords):
+        """
+        Máscara dos textos cujo score pode ter mudado desde outra versão do léxico.
+
+        `old_weights` são os pesos daquela versão e `keywords` as palavras que ela
+        encontrou em cada texto. O score só muda se o texto contém uma palavra
+        removida ou com peso alterado (visível em `keywords`) ou uma palavra nova,
+        procurada nos textos com uma regex apenas das palavras adicionadas.
+        """
+        changed = {word for word, weight in old_weights.items() if self.weights.get(word) != weight}
+        added = [word for word in self.weights if word not in old_weights]
+        stale = np.array([not changed.isdisjoint(found) for found in keywords], dtype=bool)
+        if added:
+            pattern = re.compile(r'(?<!\w)(?:' + _trie_pattern(added) + r')(?!\w)')
+            lowered = pd.Series(list(texts), dtype=object).fillna('').astype(str).str.lower()
+            stale |= lowered.str.contains(pattern).to_numpy(dtype=bool)
+        return stale
+
+
+# Léxico padrão construído uma vez por processo
+DEFAULT_LEXICON = KeywordLexicon(POSITIVE_KEYWORDS, NEGATIVE_KEYWORDS)
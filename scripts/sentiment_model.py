@@ -0,0 +1,238 @@
+import argparse
+import hashlib
+import os
+import time
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from sentiment_lexicon import DEFAULT_LEXICON
+
+# --- Modelo Linear de Sentimento sobre N-gramas com Hashing ---
+# Alternativa ao léxico de palavras-chave com a mesma interface (`score_series`
+# e `fingerprint`), aceita em qualquer lugar onde o léxico é usado, inclusive no
+# ScoreCache. Cada texto vira um vetor esparso de unigramas e bigramas cujos
+# índices vêm de um hash (sem vocabulário), e o score é tanh(z / 2), com
+# z = w·x + b: um lote inteiro de textos é pontuado como um produto
+# esparso x denso (np.bincount), sem uma chamada Python por artigo.
+
+MODEL_PATH = os.path.join(os.path.dirname(__file__), '..', 'data', 'models', 'sentiment_linear.npz')
+SCORERS = ('keywords', 'linear')  # Valores aceitos por --scorer
+N_FEATURES = 2 ** 18    # Posições do vetor de pesos (1 MB em float32)
+NGRAMS = 2              # Unigramas e bigramas
+BATCH_SIZE = 100_000    # Textos por lote de pontuação (limita a memória dos índices esparsos)
+TRIM_PATTERN = r'^[^\p{L}\p{N}]+|[^\p{L}\p{N}]+$'  # Pontuação nas pontas dos tokens (RE2)
+STRING_DTYPE = 'string[pyarrow]'  # Textos no Arrow, tokenizados sem objetos Python por token
+BIGRAM_MULTIPLIER = np.uint64(0x9E3779B97F4A7C15)  # Combina os hashes de dois tokens vizinhos
+EPOCHS = 60             # Épocas do treino (gradiente completo)
+LEARNING_RATE = 0.5     # Passo inicial do Adagrad
+L2 = 1e-6               # Regularização dos pesos
+HOLDOUT = 0.2           # Fração dos exemplos reservada para validação no treino
+
+
+def _tokens(texts):
+    """
+    Tokens de cada texto como (rows, hashes): o texto de origem e o hash de cada token, na ordem.
+
+    Os textos são separados por espaços em branco no Arrow, e a pontuação das
+    pontas é removida apenas no dicionário de tokens distintos (bem menor que
+    o total de tokens), que também é o único trecho com hash calculado.
+    """
+    strings = pd.Series(texts).reset_index(drop=True).astype(STRING_DTYPE).fillna('')
+    words = pc.utf8_split_whitespace(pc.utf8_lower(pa.chunked_array(pa.array(strings.array)).combine_chunks()))
+    rows = pc.list_parent_indices(words).to_numpy()
+    encoded = pc.dictionary_encode(pc.list_flatten(words))
+    vocabulary = pc.replace_substring_regex(encoded.dictionary, TRIM_PATTERN, '')
+    valid = pc.utf8_length(vocabulary).to_numpy(zero_copy_only=False) > 0
+    vocabulary_hashes = pd.util.hash_array(vocabulary.to_numpy(zero_copy_only=False))
+    indices = encoded.indices.to_numpy(zero_copy_only=False)
+    keep = valid[indices]
+    return rows[keep].astype(np.int64), vocabulary_hashes[indices[keep]]
+
+
+def hashed_features(texts, n_features=N_FEATURES, ngrams=NGRAMS):
+    """
+    Matriz esparsa (formato COO) dos n-gramas de uma Series de textos.
+
+    Retorna (rows, cols, values): o texto, a posição no vetor de pesos e o
+    valor de cada ocorrência. O bit mais alto do hash define o sinal do valor
+    (reduz o viés das colisões), e os valores são divididos pela raiz do número
+    de tokens do texto. Ocorrências repetidas somam no produto.
+    """
+    rows, hashes = _tokens(texts)
+    n_tokens = np.bincount(rows, minlength=len(texts))
+
+    all_rows, all_hashes = [rows], [hashes]
+    if ngrams >= 2 and len(rows) > 1:
+        # Bigramas: pares de tokens vizinhos do mesmo texto
+        same_text = rows[1:] == rows[:-1]
+        all_rows.append(rows[1:][same_text])
+        all_hashes.append(hashes[:-1][same_text] * BIGRAM_MULTIPLIER + hashes[1:][same_text])
+    rows, hashes = np.concatenate(all_rows), np.concatenate(all_hashes)
+
+    cols = (hashes % np.uint64(n_features)).astype(np.int64)
+    signs = np.where(hashes >> np.uint64(63), -1.0, 1.0)
+    values = signs / np.sqrt(np.maximum(n_tokens[rows], 1))
+    return rows, cols, values
+
+
+class LinearSentimentModel:
+    """
+    Regressão logística sobre n-gramas com hashing, usada como pontuador de sentimento.
+
+    O score de um texto é 2·P(positivo) - 1 = tanh(z / 2), no mesmo intervalo
+    [-1, 1] do léxico; textos vazios recebem 0. A impressão digital deriva dos
+    pesos, então retreinar invalida apenas as entradas deste modelo no cache.
+    """
+
+    def __init__(self, weights, bias=0.0, ngrams=NGRAMS):
+        self.weights = np.asarray(weights, dtype=np.float32)
+        self.bias = float(bias)
+        self.ngrams = int(ngrams)
+        digest = hashlib.sha256(self.weights.tobytes())
+        digest.update(f'{self.bias!r}:{self.ngrams}'.encode())
+        self.fingerprint = 'linear:' + digest.hexdigest()[:16]
+
+    @property
+    def n_features(self):
+        return len(self.weights)
+
+    def decision_function(self, texts):
+        """z = w·x + b para cada texto (NaN nos textos sem tokens), em lotes de BATCH_SIZE."""
+        texts = pd.Series(texts)
+        z = np.empty(len(texts))
+        for start in range(0, len(texts), BATCH_SIZE):
+            batch = texts.iloc[start:start + BATCH_SIZE]
+            rows, cols, values = hashed_features(batch, self.n_features, self.ngrams)
+            dot = np.bincount(rows, weights=values * self.weights[cols], minlength=len(batch))
+            has_tokens = np.bincount(rows, minlength=len(batch)) > 0
+            z[start:start + len(batch)] = np.where(has_tokens, dot + self.bias, np.nan)
+        return z
+
+    def calculate_sentiment_score(self, text):
+        """Calcula o score de sentimento de um único texto."""
+        return float(self.score_series(pd.Series([text])).iloc[0])
+
+    def score_series(self, texts):
+        """
+        Pontua uma Series inteira de textos em lote.
+
+        Retorna uma Series de floats com o mesmo índice de `texts`. Textos vazios
+        ou ausentes recebem score 0.
+        """
+        texts = pd.Series(texts)
+        scores = np.nan_to_num(np.tanh(self.decision_function(texts) / 2), nan=0.0)
+        return pd.Series(scores, index=texts.index, name='sentiment_score')
+
+    @classmethod
+    def train(cls, texts, labels, n_features=N_FEATURES, ngrams=NGRAMS, epochs=EPOCHS,
+              learning_rate=LEARNING_RATE, l2=L2):
+        """
+        Treina o modelo com gradiente completo (Adagrad) sobre a perda logística.
+
+        `labels` é numérico: valores positivos são a classe positiva e negativos
+        a negativa; exemplos com rótulo 0 ou ausente são ignorados.
+        """
+        texts, labels = pd.Series(texts).reset_index(drop=True), pd.Series(labels).reset_index(drop=True)
+        keep = labels.notna() & (labels != 0)
+        texts, y = texts[keep].reset_index(drop=True), (labels[keep] > 0).to_numpy(dtype=float)
+        rows, cols, values = hashed_features(texts, n_features, ngrams)
+        n = len(texts)
+
+        weights, bias = np.zeros(n_features), 0.0
+        grad_sq, bias_grad_sq = np.full(n_features, 1e-8), 1e-8
+        for _ in range(epochs):
+            z = np.bincount(rows, weights=values * weights[cols], minlength=n) + bias
+            error = (1 / (1 + np.exp(-z)) - y) / max(n, 1)
+            grad = np.bincount(cols, weights=values * error[rows], minlength=n_features) + l2 * weights
+            grad_sq += grad ** 2
+            weights -= learning_rate * grad / np.sqrt(grad_sq)
+            bias_grad = error.sum()
+            bias_grad_sq += bias_grad ** 2
+            bias -= learning_rate * bias_grad / np.sqrt(bias_grad_sq)
+        return cls(weights, bias, ngrams)
+
+    def save(self, path=MODEL_PATH):
+        """Grava os pesos em .npz comprimido, de forma atômica."""
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp_path = f"{path}.tmp.npz"
+        np.savez_compressed(tmp_path, weights=self.weights, bias=self.bias, ngrams=self.ngrams)
+        os.replace(tmp_path, path)
+        return path
+
+    @classmethod
+    def load(cls, path=MODEL_PATH):
+        with np.load(path) as data:
+            return cls(data['weights'], float(data['bias']), int(data['ngrams']))
+
+
+def load_scorer(name='keywords', model_path=MODEL_PATH):
+    """Pontuador escolhido por --scorer: o léxico padrão ('keywords') ou o modelo linear treinado ('linear')."""
+    if name == 'keywords':
+        return DEFAULT_LEXICON
+    if name == 'linear':
+        if not os.path.exists(model_path):
+            raise FileNotFoundError(f"Modelo não encontrado em {model_path}. "
+                                    "Treine-o com: python scripts/sentiment_model.py train <rotulos.csv>")
+        return LinearSentimentModel.load(model_path)
+    raise ValueError(f"Pontuador desconhecido: {name} (opções: {', '.join(SCORERS)})")
+
+
+def evaluate(scorer, texts, labels):
+    """Acurácia do sinal do score contra os rótulos, correlação e vazão (textos/s) de um pontuador."""
+    texts, labels = pd.Series(texts).reset_index(drop=True), pd.Series(labels).reset_index(drop=True)
+    keep = labels.notna() & (labels != 0)
+    start = time.perf_counter()
+    scores = scorer.score_series(texts[keep]).to_numpy()
+    seconds = time.perf_counter() - start
+    truth = labels[keep].to_numpy(dtype=float)
+    return {
+        'accuracy': float((np.sign(scores) == np.sign(truth)).mean()) if len(truth) else np.nan,
+        'correlation': float(np.corrcoef(scores, truth)[0, 1]) if len(truth) > 1 and scores.std() > 0 else np.nan,
+        'texts_per_sec': len(truth) / seconds if seconds > 0 else np.nan,
+    }
+
+
+def _read_labels(path, text_column, label_column):
+    df = pd.read_csv(path, usecols=[text_column, label_column])
+    return df[text_column], pd.to_numeric(df[label_column], errors='coerce')
+
+
+def _print_comparison(model, texts, labels):
+    for name, scorer in (('keywords', DEFAULT_LEXICON), ('linear', model)):
+        metrics = evaluate(scorer, texts, labels)
+        print(f"  {name:<9} acurácia {metrics['accuracy']:.3f}  correlação {metrics['correlation']:.3f}  "
+              f"{metrics['texts_per_sec']:>10.0f} textos/s")
+
+
+# --- Execução Principal ---
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Treina e avalia o modelo linear de sentimento (n-gramas com hashing).")
+    parser.add_argument('command', choices=['train', 'evaluate'])
+    parser.add_argument('labels', help="CSV com uma coluna de texto e uma de rótulo numérico (>0 positivo, <0 negativo)")
+    parser.add_argument('--text-column', default='text', help="Coluna de texto (padrão: text)")
+    parser.add_argument('--label-column', default='label', help="Coluna de rótulo (padrão: label)")
+    parser.add_argument('--model', default=MODEL_PATH, help="Arquivo do modelo (padrão: data/models/sentiment_linear.npz)")
+    parser.add_argument('--features', type=int, default=N_FEATURES, help=f"Tamanho do vetor de pesos (padrão: {N_FEATURES})")
+    parser.add_argument('--epochs', type=int, default=EPOCHS, help=f"Épocas de treino (padrão: {EPOCHS})")
+    parser.add_argument('--holdout', type=float, default=HOLDOUT,
+                        help=f"Fração reservada para validação no treino (padrão: {HOLDOUT})")
+    args = parser.parse_args()
+
+    texts, labels = _read_labels(args.labels, args.text_column, args.label_column)
+    if args.command == 'train':
+        order = np.random.default_rng(0).permutation(len(texts))
+        n_holdout = int(len(texts) * args.holdout)
+        holdout, train = order[:n_holdout], order[n_holdout:]
+        start = time.perf_counter()
+        model = LinearSentimentModel.train(texts.iloc[train], labels.iloc[train], args.features, epochs=args.epochs)
+        print(f"Modelo treinado com {len(train)} exemplos em {time.perf_counter() - start:.1f}s")
+        if n_holdout:
+            print(f"Validação ({n_holdout} exemplos):")
+            _print_comparison(model, texts.iloc[holdout], labels.iloc[holdout])
+        print(f"Modelo salvo em: {model.save(args.model)}")
+    else:
+        print(f"Avaliação em {len(texts)} exemplos:")
+        _print_comparison(LinearSentimentModel.load(args.model), texts, labels)
@@ -0,0 +1,177 @@
+import os
+import shutil
+import tempfile
+
+import pandas as pd
+import pyarrow.dataset as ds
+
+# --- Armazenamento Colunar (Parquet) ---
+
+PARQUET_ROOT = os.path.join(os.path.dirname(__file__), '..', 'data', 'parquet')
+COMPRESSION = 'zstd'
+
+# Esquema de cada dataset: coluna de data usada no particionamento, chave de
+# deduplicação e tipos das colunas gravadas.
+DATASETS = {
+    'news': {
+        'date_column': 'publishedAt',
+        'key': ['url'],
+        'dtypes': {'publishedAt': 'datetime64[ns, UTC]', 'title': 'string', 'body': 'string',
+                   'url': 'string', 'source': 'string', 'description': 'string'},
+    },
+    'prices': {
+        'date_column': 'Date',
+        'key': ['Date'],
+        'dtypes': {'Date': 'datetime64[ns]', 'Open': 'float64', 'High': 'float64', 'Low': 'float64',
+                   'Close': 'float64', 'Volume': 'int64'},
+    },
+    'intraday': {
+        'date_column': 'Datetime',
+        'key': ['interval', 'Datetime'],
+        'dtypes': {'Datetime': 'datetime64[ns, UTC]', 'interval': 'string', 'Open': 'float64', 'High': 'float64',
+                   'Low': 'float64', 'Close': 'float64', 'Volume': 'int64'},
+    },
+    'final': {
+        'date_column': 'date',
+        'key': ['date'],
+        'dtypes': {'date': 'datetime64[ns]', 'Close': 'float64', 'price_change': 'float64',
+                   'sentiment_score': 'float64'},
+    },
+}
+
+
+def flatten_yfinance_prices(stock_data):
+    """
+    Converte o DataFrame do yfinance (colunas Price/Ticker, índice Date) em colunas simples.
+
+    Retorna Date, Open, High, Low, Close e Volume, sem o cabeçalho de várias linhas.
+    """
+    df = stock_data.copy()
+    if isinstance(df.columns, pd.MultiIndex):
+        df.columns = df.columns.get_level_values(0)
+    df.columns.name = None
+    df = df.rename_axis('Date').reset_index()
+    return df[['Date', 'Open', 'High', 'Low', 'Close', 'Volume']]
+
+
+def _normalize(df, dataset):
+    """Aplica os tipos do esquema do dataset, mantendo apenas as colunas conhecidas."""
+    dtypes = DATASETS[dataset]['dtypes']
+    df = df[[c for c in dtypes if c in df.columns]].copy()
+    for column, dtype in dtypes.items():
+        if column not in df.columns:
+            continue
+        if dtype.startswith('datetime64'):
+            df[column] = pd.to_datetime(df[column], utc='UTC' in dtype)
+            if 'UTC' not in dtype and df[column].dt.tz is not None:
+                df[column] = df[column].dt.tz_localize(None)
+        elif dtype == 'int64':
+            df[column] = pd.to_numeric(df[column]).fillna(0).astype('int64')
+        else:
+            df[column] = df[column].astype(dtype)
+    return df
+
+
+def _write_parquet_atomic(df, path):
+    """Grava um arquivo Parquet via arquivo temporário + rename."""
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    os.close(fd)
+    try:
+        df.to_parquet(tmp_path, index=False, compression=COMPRESSION)
+        os.replace(tmp_path, path)
+    except Exception:
+        os.remove(tmp_path)
+        raise
+
+
+def write_dataset(df, dataset, ticker, mode='upsert', root=PARQUET_ROOT):
+    """
+    Grava um DataFrame no dataset particionado por ticker e mês.
+
+    Layout: <root>/<dataset>/ticker=<ticker>/month=<YYYY-MM>/part-0.parquet.
+    Com `mode='upsert'`, as linhas são mescladas às partições existentes pela
+    chave do dataset (a mais recente prevalece); com `mode='replace'`, todas as
+    partições do ticker são substituídas.
+    """
+    spec = DATASETS[dataset]
+    df = _normalize(df, dataset)
+    ticker_root = os.path.join(root, dataset, f'ticker={ticker}')
+    if mode == 'replace':
+        shutil.rmtree(ticker_root, ignore_errors=True)
+    if df.empty:
+        return
+
+    date_column = spec['date_column']
+    months = df[date_column].dt.strftime('%Y-%m')
+    for month, part in df.groupby(months):
+        path = os.path.join(ticker_root, f'month={month}', 'part-0.parquet')
+        if mode == 'upsert' and os.path.exists(path):
+            part = pd.concat([pd.read_parquet(path), part], ignore_index=True)
+            part = part.drop_duplicates(subset=spec['key'], keep='last')
+        _write_parquet_atomic(part.sort_values(date_column, ignore_index=True), path)
+
+
+def list_tickers(dataset, root=PARQUET_ROOT):
+    """Lista os tickers com partições gravadas no dataset."""
+    dataset_root = os.path.join(root, dataset)
+    if not os.path.isdir(dataset_root):
+        return []
+    return sorted(name.split('=', 1)[1] for name in os.listdir(dataset_root) if name.startswith('ticker='))
+
+
+def read_dataset(dataset, tickers=None, columns=None, start=None, end=None, root=PARQUET_ROOT):
+    """
+    Lê um dataset particionado lendo apenas as colunas e partições necessárias.
+
+    `tickers`, `start` e `end` descartam partições inteiras antes da leitura
+    (filtro por ticker e por mês); o recorte exato por data é aplicado depois.
+    Retorna um DataFrame vazio se o dataset não existir.
+    """
+    spec = DATASETS[dataset]
+    dataset_root = os.path.join(root, dataset)
+    if not os.path.isdir(dataset_root):
+        return pd.DataFrame(columns=columns or list(spec['dtypes']))
+
+    date_column = spec['date_column']
+    start = pd.Timestamp(start) if start is not None else None
+    end = pd.Timestamp(end) if end is not None else None
+
+    expression = None
+    conditions = []
+    if tickers is not None:
+        conditions.append(ds.field('ticker').isin(list(tickers)))
+    if start is not None:
+        conditions.append(ds.field('month') >= start.strftime('%Y-%m'))
+    if end is not None:
+        conditions.append(ds.field('month') <= end.strftime('%Y-%m'))
+    for condition in conditions:
+        expression = condition if expression is None else expression & condition
+
+    read_columns = None
+    if columns is not None:
+        # A coluna de data é necessária para o recorte exato, mesmo se não pedida
+        read_columns = list(dict.fromkeys(list(columns) + ([date_column] if start is not None or end is not None else [])))
+
+    parquet = ds.dataset(dataset_root, format='parquet', partitioning='hive')
+    df = parquet.to_table(columns=read_columns, filter=expression).to_pandas()
+    if 'ticker' in df.columns:
+        df['ticker'] = df['ticker'].astype('string')
+    if 'month' in df.columns:
+        df = df.drop(columns='month')
+
+    if start is not None or end is not None:
+        dates = df[date_column]
+        if dates.dt.tz is not None:
+            dates = dates.dt.tz_localize(None)
+        mask = pd.Series(True, index=df.index)
+        if start is not None:
+            mask &= dates >= start
+        if end is not None:
+            mask &= dates <= end
+        df = df[mask]
+    if columns is not None:
+        df = df[list(columns)]
+    sort_columns = [c for c in ('ticker', date_column) if c in df.columns]
+    return df.sort_values(sort_columns, ignore_index=True) if sort_columns else df.reset_index(drop=True)
@@ -0,0 +1,30 @@
+import json
+import os
+
+# --- Universo de Tickers ---
+
+UNIVERSE_PATH = os.path.join(os.path.dirname(__file__), '..', 'config', 'universe.json')
+
+
+def load_universe(path=UNIVERSE_PATH):
+    """
+    Carrega a lista de tickers monitorados.
+
+    Cada entrada tem `ticker` (símbolo no yfinance), `name` (prefixo dos arquivos
+    de notícias) e `search_terms` (termos buscados na NewsAPI.org). Se `name`
+    não for informado, usa o primeiro termo de busca.
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        universe = json.load(f)
+
+    for entry in universe:
+        if 'ticker' not in entry or not entry.get('search_terms'):
+            raise ValueError(f"Entrada inválida no universo: {entry}")
+        entry.setdefault('name', entry['search_terms'][0].replace(' ', '_'))
+    return universe
+
+
+def universe_query(entry):
+    """Monta a consulta da NewsAPI.org combinando os termos de busca com OR."""
+    terms = [f'"{term}"' if ' ' in term else term for term in entry['search_terms']]
+    return ' OR '.join(terms)
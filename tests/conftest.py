@@ -0,0 +1,30 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'scripts'))
+from newsapi_standin import StandInConfig, StandInServer
+
+# --- Configuração Comum dos Testes ---
+# O servidor local substituto da NewsAPI e do Yahoo é iniciado antes de qualquer
+# import do coletor, que lê NEWSAPI_BASE_URL e PRICES_BASE_URL ao ser importado.
+
+_SERVER = StandInServer().start()
+os.environ['NEWSAPI_BASE_URL'] = f"{_SERVER.url}/v2"
+os.environ['PRICES_BASE_URL'] = _SERVER.url
+
+
+@pytest.fixture
+def standin():
+    """Servidor substituto; o teste troca `standin.config`, restaurado ao final."""
+    yield _SERVER
+    _SERVER.config = StandInConfig()
+
+
+@pytest.fixture
+def collector(monkeypatch):
+    """Coletor sem esperas entre novas tentativas."""
+    import data_collector_newsapi_fixed as collector
+    monkeypatch.setattr(collector, 'BACKOFF_SECONDS', 0.0)
+    return collector
@@ -0,0 +1,53 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from backtest import backtest_grid, smoothed_sentiment
+
+
+def _dataset(sentiment, returns):
+    return pd.DataFrame({'date': pd.bdate_range('2025-01-01', periods=len(returns)),
+                         'price_change': returns, 'sentiment_score': sentiment})
+
+
+def _naive(df, window, threshold, holding):
+    """Regra avaliada pregão a pregão, sem vetorização."""
+    sentiment = df['sentiment_score'].rolling(window, min_periods=1).mean().to_numpy()
+    returns = df['price_change'].fillna(0).to_numpy()
+    equity, exposure = 1.0, 0
+    for d in range(len(df)):
+        past = sentiment[max(d - holding, 0):d]
+        if (past > threshold).any():
+            equity *= 1 + returns[d]
+            exposure += 1
+    return equity - 1, exposure / len(df)
+
+
+def test_signal_is_traded_on_the_following_sessions():
+    sentiment = np.zeros(10)
+    sentiment[4] = 1.0
+    returns = np.full(10, 0.01)
+    returns[4] = 0.5  # Retorno do próprio pregão do sinal não pode entrar
+    result = backtest_grid(_dataset(sentiment, returns), windows=[1], thresholds=[0.5], holdings=[2]).iloc[0]
+    assert result['total_return'] == pytest.approx(1.01 ** 2 - 1)
+    assert result['trades'] == 1
+    assert result['exposure'] == pytest.approx(0.2)
+
+
+def test_grid_matches_naive_rule():
+    rng = np.random.default_rng(0)
+    sentiment = rng.normal(0, 0.3, 120)
+    sentiment[rng.random(120) < 0.2] = np.nan
+    df = _dataset(sentiment, rng.normal(0, 0.02, 120))
+    # Ordem das linhas não importa: o backtest ordena por data
+    results = backtest_grid(df.sample(frac=1, random_state=1), windows=[1, 3, 5], thresholds=[-0.1, 0.0, 0.2],
+                            holdings=[1, 4])
+    for row in results.itertuples():
+        total, exposure = _naive(df, row.window, row.threshold, row.holding)
+        assert row.total_return == pytest.approx(total)
+        assert row.exposure == pytest.approx(exposure)
+
+
+def test_smoothed_sentiment_ignores_missing_days():
+    smoothed = smoothed_sentiment([1.0, np.nan, 3.0, np.nan, np.nan], windows=[2])
+    np.testing.assert_allclose(smoothed[0], [1.0, 1.0, 3.0, 3.0, np.nan])
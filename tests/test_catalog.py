@@ -0,0 +1,76 @@
+import os
+
+import pandas as pd
+import pytest
+
+from catalog import Catalog, file_hash
+
+
+@pytest.fixture
+def catalog(tmp_path):
+    (tmp_path / 'raw').mkdir()
+    return Catalog(str(tmp_path / 'catalog.sqlite'), str(tmp_path))
+
+
+def _news(dates):
+    return pd.DataFrame({'publishedAt': [f"{day}T12:00:00Z" for day in dates], 'title': 'x'})
+
+
+def _write(catalog, name, df, written_at, kind='news', append=False):
+    path = os.path.join(catalog.data_root, 'raw', name)
+    df.to_csv(path, mode='a' if append else 'w', header=not append, index=False)
+    catalog.register(path, kind, df, query='Petrobras', append=append, written_at=written_at)
+    return path
+
+
+def test_append_chains_hash_and_extends_period(catalog):
+    path = _write(catalog, 'a.csv', _news(['2025-07-01', '2025-07-02']), 1)
+    first = catalog.latest('news')
+    assert first['content_hash'] == file_hash(path) and first['rows'] == 2
+
+    _write(catalog, 'a.csv', _news(['2025-07-03']), 2, append=True)
+    entry = catalog.latest('news')
+    assert entry['content_hash'] == file_hash(path, first['size'], first['content_hash'])
+    assert entry['content_hash'] != file_hash(path)
+    assert (entry['start_date'], entry['end_date'], entry['rows']) == ('2025-07-01', '2025-07-03', 3)
+    assert entry['size'] == os.path.getsize(path)
+
+    # O mesmo histórico de gravações dá o mesmo hash em outro arquivo
+    _write(catalog, 'b.csv', _news(['2025-07-01', '2025-07-02']), 3)
+    _write(catalog, 'b.csv', _news(['2025-07-03']), 4, append=True)
+    assert catalog.latest('news')['content_hash'] == entry['content_hash']
+
+
+def test_rewritten_file_is_hashed_again(catalog):
+    path = _write(catalog, 'a.csv', _news(['2025-07-01', '2025-07-02', '2025-07-03']), 1)
+    # Arquivo recriado menor antes de um append: o hash encadeado não vale mais
+    _news(['2025-07-05']).to_csv(path, index=False)
+    catalog.register(path, 'news', _news(['2025-07-05']), query='Petrobras', append=True, written_at=2)
+    entry = catalog.latest('news')
+    assert entry['content_hash'] == file_hash(path)
+    assert (entry['start_date'], entry['rows']) == ('2025-07-05', 1)
+
+
+def test_covering_picks_newest_files_first(catalog):
+    old = _write(catalog, 'old.csv', _news(pd.date_range('2025-01-01', '2025-03-31').strftime('%Y-%m-%d')), 1)
+    mid = _write(catalog, 'mid.csv', _news(pd.date_range('2025-02-01', '2025-04-30').strftime('%Y-%m-%d')), 2)
+    _write(catalog, 'inner.csv', _news(pd.date_range('2025-03-01', '2025-03-31').strftime('%Y-%m-%d')), 1.5)
+    new = _write(catalog, 'new.csv', _news(pd.date_range('2025-04-01', '2025-05-31').strftime('%Y-%m-%d')), 3)
+
+    paths = [entry['path'] for entry in catalog.covering('news', '2025-01-15', '2025-05-10')]
+    # inner.csv está coberto por mid.csv, gravado depois
+    assert paths == [new, mid, old]
+    assert [entry['path'] for entry in catalog.covering('news', '2025-04-05', '2025-05-10')] == [new]
+    assert [entry['path'] for entry in catalog.covering('news')][:2] == [new, mid]
+
+
+def test_latest_skips_and_forgets_only_passed_missing_files(catalog):
+    first = _write(catalog, 'first.csv', _news(['2025-07-01']), 1)
+    second = _write(catalog, 'second.csv', _news(['2025-07-02']), 2)
+    third = _write(catalog, 'third.csv', _news(['2025-07-03']), 3)
+    os.remove(third)
+    os.remove(first)
+    assert catalog.latest('news')['path'] == second
+    remaining = {row['path'] for row in catalog.conn.execute('SELECT path FROM datasets')}
+    assert remaining == {'raw/first.csv', 'raw/second.csv'}
+    assert [entry['path'] for entry in catalog.entries('news')] == [second]
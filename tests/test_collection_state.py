@@ -0,0 +1,66 @@
+import json
+from datetime import datetime
+
+import pandas as pd
+import pytest
+
+from catalog import Catalog
+from collection_state import CollectionState
+from newsapi_standin import StandInConfig
+
+
+@pytest.fixture
+def state(tmp_path):
+    return CollectionState(str(tmp_path / 'state.sqlite'), str(tmp_path / 'state.json'))
+
+
+def test_ledger_round_trip_and_prune(state):
+    state.add_news('Petrobras', ['2025-07-01', '2025-07-02'],
+                   [('https://a/1', '2025-06-20'), ('https://a/2', '2025-07-01'), ('https://a/3', '2025-07-02')])
+    assert state.news_days('Petrobras') == {'2025-07-01', '2025-07-02'}
+    assert state.seen_urls('Petrobras', ['https://a/1', 'https://a/3', 'https://a/9']) == {'https://a/1', 'https://a/3'}
+    assert state.seen_urls('Vale', ['https://a/1']) == set()
+
+    assert state.prune('Petrobras', '2025-07-02') == 2
+    assert state.news_days('Petrobras') == {'2025-07-02'}
+    assert state.seen_urls('Petrobras', ['https://a/1', 'https://a/3']) == {'https://a/3'}
+
+
+def test_price_watermark_only_moves_forward(state):
+    assert state.last_price_date('PETR4.SA') is None
+    state.update_last_price_date('PETR4.SA', '2025-07-10')
+    state.update_last_price_date('PETR4.SA', '2025-07-08')
+    assert state.last_price_date('PETR4.SA') == '2025-07-10'
+
+
+def test_legacy_json_is_imported(tmp_path):
+    legacy = tmp_path / 'state.json'
+    legacy.write_text(json.dumps({'news': {'Petrobras': {'days': ['2025-07-01'], 'urls': ['https://a/1']}},
+                                  'prices': {'PETR4.SA': {'last_date': '2025-07-01'}}}))
+    state = CollectionState(str(tmp_path / 'state.sqlite'), str(legacy))
+    assert state.news_days('Petrobras') == {'2025-07-01'}
+    assert state.seen_urls('Petrobras', ['https://a/1']) == {'https://a/1'}
+    assert state.last_price_date('PETR4.SA') == '2025-07-01'
+    assert not legacy.exists() and (tmp_path / 'state.json.migrated').exists()
+
+
+def test_incremental_run_skips_collected_days(collector, standin, monkeypatch, tmp_path, state):
+    monkeypatch.setattr(collector, 'RAW_DATA_PATH', str(tmp_path))
+    monkeypatch.setattr(collector, 'write_dataset', lambda *args, **kwargs: None)
+    monkeypatch.setattr(collector, 'Catalog', lambda: Catalog(str(tmp_path / 'catalog.sqlite'), str(tmp_path)))
+    standin.config = StandInConfig(articles_per_day=3)
+
+    first = collector.fetch_newsapi_news_incremental('teste', 'Petrobras', datetime(2025, 7, 1),
+                                                     datetime(2025, 7, 10), state, requests_per_second=1000)
+    assert len(first) == 30
+    assert len(state.news_days('Petrobras')) == 10
+    assert collector.fetch_newsapi_news_incremental('teste', 'Petrobras', datetime(2025, 7, 1),
+                                                    datetime(2025, 7, 10), state, requests_per_second=1000) is None
+
+    # A janela avança: os dias e URLs anteriores ao novo início saem do registro
+    collector.fetch_newsapi_news_incremental('teste', 'Petrobras', datetime(2025, 7, 5),
+                                             datetime(2025, 7, 12), state, requests_per_second=1000)
+    assert min(state.news_days('Petrobras')) == '2025-07-05'
+    saved = pd.read_csv(tmp_path / 'Petrobras_news_newsapi_fixed_incremental.csv')
+    assert len(saved) == 36 and saved['url'].is_unique
+    assert state.seen_urls('Petrobras', saved['url']) == set(saved.loc[saved['publishedAt'] >= '2025-07-05', 'url'])
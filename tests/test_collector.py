@@ -0,0 +1,65 @@
+from datetime import datetime
+from functools import partial
+
+from newsapi_standin import SOURCES, StandInConfig
+
+
+def _collect(collector, monkeypatch, dates, max_results):
+    monkeypatch.setattr(collector, 'NewsApiPlanner', partial(collector.NewsApiPlanner, max_results=max_results))
+    plan = {}
+    days = dict(collector.stream_newsapi_days('teste', 'Petrobras', dates, max_workers=4,
+                                              requests_per_second=1000, stats=plan))
+    return days, plan
+
+
+def test_wide_window_is_one_request(collector, standin, monkeypatch):
+    standin.config = StandInConfig(articles_per_day=3)
+    dates = collector._date_range(datetime(2025, 7, 1), datetime(2025, 7, 30))
+    days, plan = _collect(collector, monkeypatch, dates, max_results=100)
+    assert plan['requests'] == 1
+    assert all(len(days[day]) == 3 for day in dates)
+
+
+def test_failed_page_keeps_fetched_days(collector, standin, monkeypatch):
+    # 30 dias x 20 notícias = 6 páginas; a página 2 sempre falha
+    standin.config = StandInConfig(articles_per_day=20, max_results=None, error_pages=(2,))
+    dates = collector._date_range(datetime(2025, 7, 1), datetime(2025, 7, 30))
+    days, plan = _collect(collector, monkeypatch, dates, max_results=1000)
+    assert sorted(days) == dates
+    assert all(days[day] is not None and len(days[day]) == 20 for day in dates)
+    assert plan['resumed'] > 0
+    urls = [article['url'] for articles in days.values() for article in articles]
+    assert len(urls) == len(set(urls))
+
+
+def test_failed_first_page_fails_only_its_window(collector, standin, monkeypatch):
+    standin.config = StandInConfig(articles_per_day=20, max_results=None, error_pages=(1,))
+    dates = collector._date_range(datetime(2025, 7, 1), datetime(2025, 7, 3))
+    days, _ = _collect(collector, monkeypatch, dates, max_results=1000)
+    assert all(days[day] is None for day in dates)
+
+
+def test_headlines_go_through_shared_client(collector, standin, monkeypatch, tmp_path):
+    import instrumentation
+    from catalog import Catalog
+    from instrumentation import stage, start_run
+
+    monkeypatch.setattr(instrumentation, '_active', None)
+    monkeypatch.setattr(collector, 'RAW_DATA_PATH', str(tmp_path))
+    monkeypatch.setattr(collector, 'Catalog', lambda: Catalog(str(tmp_path / 'catalog.sqlite'), str(tmp_path)))
+    report = start_run('test_headlines')
+
+    standin.config = StandInConfig(articles_per_day=5)
+    with stage('fetch_newsapi_headlines') as s:
+        df = collector.fetch_newsapi_headlines_fixed('teste', 'Petrobras', requests_per_second=1000)
+    assert list(df.columns) == collector.NEWS_COLUMNS and len(df) == 5
+    assert df['source'].isin(SOURCES).all()
+    assert s['http']['requests'] == 1
+
+    # Respostas 500 são repetidas por _newsapi_get
+    standin.config = StandInConfig(error_rate=1.0)
+    with stage('fetch_newsapi_headlines') as s:
+        assert collector.fetch_newsapi_headlines_fixed('teste', 'Petrobras', requests_per_second=1000) is None
+    assert s['http'] == {'requests': collector.MAX_RETRIES + 1, 'retries': collector.MAX_RETRIES,
+                         'errors': collector.MAX_RETRIES + 1}
+    assert report.http.summary()['newsapi']['requests'] == collector.MAX_RETRIES + 2
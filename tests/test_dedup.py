@@ -0,0 +1,46 @@
+import numpy as np
+import pandas as pd
+
+from dedup import deduplicate_articles, find_duplicate_clusters, minhash_signatures
+
+BASE = ('Petrobras anuncia lucro recorde no trimestre impulsionado pela alta do petróleo e pela produção '
+        'do pré-sal, superando as projeções dos analistas do mercado financeiro')
+
+
+def _articles():
+    return pd.DataFrame({
+        'publishedAt': ['2025-07-01T10:00:00Z', '2025-07-01T09:00:00Z', '2025-07-01T11:00:00Z',
+                        '2025-07-01T12:00:00Z', '2025-07-02T08:00:00Z', '2025-07-02T09:00:00Z'],
+        'url': ['https://www.infomoney.com.br/a/', 'http://infomoney.com.br/a', 'https://exame.com/b',
+                'https://valor.com.br/c', 'https://valor.com.br/d', 'https://estadao.com.br/e'],
+        'full_text': [
+            BASE,
+            'Texto diferente, mas a mesma URL normalizada',
+            BASE + '… [+2345 chars]',  # cópia com o sufixo de truncamento da NewsAPI
+            BASE.replace('recorde', 'histórico'),  # quase duplicata
+            'Vale registra queda nas exportações de minério de ferro para a China no segundo trimestre',
+            'Banco Central mantém a taxa Selic e sinaliza cautela com a inflação de serviços nos próximos meses',
+        ],
+    })
+
+
+def test_clusters_exact_and_near_duplicates():
+    labels = find_duplicate_clusters(_articles())
+    assert len(set(labels[:4])) == 1
+    assert len(set(labels)) == 3
+
+
+def test_signatures_are_stable_and_ignore_truncation_suffix():
+    signatures = minhash_signatures([BASE, BASE + '… [+99 chars]', '', BASE])
+    np.testing.assert_array_equal(signatures[0], signatures[1])
+    np.testing.assert_array_equal(signatures[0], signatures[3])
+    assert (signatures[2] == signatures[2].max()).all()
+
+
+def test_deduplicate_keeps_earliest_with_cluster_size():
+    deduped = deduplicate_articles(_articles(), verbose=False)
+    assert len(deduped) == 3
+    first = deduped.iloc[0]
+    assert first['publishedAt'] == '2025-07-01T09:00:00Z'
+    assert first['cluster_size'] == 4
+    assert deduped['cluster_size'].tolist() == [4, 1, 1]
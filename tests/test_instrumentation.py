@@ -0,0 +1,22 @@
+import threading
+import time
+
+from instrumentation import RunReport
+
+
+def _spin(seconds):
+    end = time.thread_time() + seconds
+    while time.thread_time() < end:
+        pass
+
+
+def test_stage_separates_thread_and_process_cpu():
+    report = RunReport('test')
+    with report.stage('waits') as record:
+        # Outra thread consome CPU enquanto a etapa só espera
+        worker = threading.Thread(target=_spin, args=(0.3,))
+        worker.start()
+        worker.join()
+    assert record['thread_cpu_seconds'] < 0.1
+    assert record['process_cpu_seconds'] >= 0.25
+    assert report.to_dict()['process_cpu_seconds'] >= record['process_cpu_seconds']
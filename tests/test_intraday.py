@@ -0,0 +1,49 @@
+from datetime import datetime
+
+import pandas as pd
+import pytest
+
+import intraday
+from market_hours import MARKET_TIMEZONE
+from price_store import PriceStore
+
+
+@pytest.fixture
+def offline(collector, monkeypatch, tmp_path):
+    """Coletor com armazenamento de preços temporário e sem gravações fora dele."""
+    def no_writes(*args, **kwargs):
+        raise AssertionError('gravação inesperada')
+
+    store = PriceStore(str(tmp_path / 'prices'))
+    monkeypatch.setattr(collector, 'PriceStore', lambda: store)
+    monkeypatch.setattr(collector, 'RAW_DATA_PATH', str(tmp_path / 'raw'))
+    monkeypatch.setattr(collector, 'Catalog', no_writes)
+    monkeypatch.setattr(collector, 'write_dataset', no_writes)
+    return store
+
+
+def test_chart_serves_requested_interval(collector):
+    start, end = datetime(2025, 7, 7), datetime(2025, 7, 10)
+    daily = collector._download_prices('PETR4.SA', start, end)
+    bars = collector._download_prices('PETR4.SA', start, end, '1h')
+    assert len(daily) == 3 and len(bars) == 3 * 8
+    local = bars.index.tz_convert(MARKET_TIMEZONE)
+    assert local.hour.min() == 10 and local.hour.max() == 17
+    # A última barra de cada pregão fecha no fechamento diário
+    last = bars.groupby(local.date).tail(1)
+    assert last[('Close', 'PETR4.SA')].tolist() == pytest.approx(daily[('Close', 'PETR4.SA')].tolist())
+
+
+def test_session_mode_reads_prices_without_side_effects(offline, monkeypatch):
+    news = pd.DataFrame({'ticker': 'PETR4.SA', 'publishedAt': ['2025-07-08T12:00:00Z', '2025-07-08T22:00:00Z'],
+                         'sentiment_score': [0.5, -0.5]})
+    monkeypatch.setattr(intraday, 'load_scored_news', lambda *args, **kwargs: news)
+    monkeypatch.setattr(intraday.collector, 'END_DATE', datetime(2025, 7, 11))
+
+    aligned = intraday.build_intraday_dataset([{'name': 'Petrobras', 'ticker': 'PETR4.SA'}], 'session', days=10)
+    by_date = aligned.set_index('date')
+    assert list(by_date.index) == list(pd.bdate_range('2025-07-02', '2025-07-10'))
+    # A notícia das 19h (horário da B3) conta para o pregão seguinte
+    assert by_date.loc['2025-07-08', 'sentiment_score'] == 0.5
+    assert by_date.loc['2025-07-09', 'sentiment_score'] == -0.5
+    assert by_date.loc['2025-07-10', 'articles'] == 0
@@ -0,0 +1,41 @@
+import json
+from datetime import datetime, timezone
+
+from http_client import TokenBucket, create_session
+from live_sentiment import HeadlinePoller, LiveSentiment
+from newsapi_standin import StandInConfig
+
+
+def _poll(since, interval=1.0):
+    with create_session(pool_size=2) as session:
+        poller = HeadlinePoller('teste', 'Petrobras', session, TokenBucket(1000), interval)
+        return poller, poller.poll(since)
+
+
+def test_poll_collects_beyond_one_page(collector, standin, tmp_path):
+    # 250 notícias no dia: mais que uma página e mais que o alcance da paginação (100)
+    standin.config = StandInConfig(articles_per_day=250)
+    since = datetime.now(timezone.utc).strftime('%Y-%m-%dT00:00:00')
+    poller, articles = _poll(since)
+    assert poller.complete
+
+    state = LiveSentiment(str(tmp_path / 'live.json'))
+    # As headlines do dia também vêm no /everything; cada notícia conta uma vez
+    assert state.add_articles(articles) == 250
+    state.save()
+    with open(tmp_path / 'live.json', encoding='utf-8') as f:
+        saved = json.load(f)
+    assert sum(day['count'] for day in saved['days'].values()) == 250
+    assert saved['last_published'] == max(article['publishedAt'] for article in articles)
+
+
+def test_failed_poll_does_not_advance(collector, standin, tmp_path):
+    standin.config = StandInConfig(articles_per_day=250, error_pages=(1,))
+    since = datetime.now(timezone.utc).strftime('%Y-%m-%dT00:00:00')
+    poller, articles = _poll(since)
+    assert not poller.complete
+    assert poller.delay == 2.0
+
+    state = LiveSentiment(str(tmp_path / 'live.json'))
+    state.add_articles(articles, advance=poller.complete)
+    assert state.last_published is None
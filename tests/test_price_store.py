@@ -0,0 +1,117 @@
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from price_store import PriceStore
+
+TICKER = 'PETR4.SA'
+
+
+def _bars(dates, close=None):
+    dates = pd.DatetimeIndex(pd.to_datetime(dates))
+    close = np.linspace(30.0, 40.0, len(dates)) if close is None else np.asarray(close, dtype=float)
+    return pd.DataFrame({'Date': dates, 'Open': close - 0.5, 'High': close + 1, 'Low': close - 1,
+                         'Close': close, 'Volume': np.arange(len(dates)) * 1000})
+
+
+@pytest.fixture
+def store(tmp_path):
+    return PriceStore(str(tmp_path / 'prices'))
+
+
+def test_round_trip(store):
+    bars = _bars(pd.bdate_range('2025-07-01', '2025-07-31'))
+    assert store.append(TICKER, bars) == len(bars)
+    loaded = store.load(TICKER).to_frame()
+    pd.testing.assert_frame_equal(loaded, bars, check_dtype=False)
+    assert store.last_day(TICKER) == pd.Timestamp('2025-07-31')
+    assert store.tickers() == [TICKER]
+
+
+def test_append_at_boundary(store):
+    store.append(TICKER, _bars(pd.bdate_range('2025-07-01', '2025-07-15')))
+    later = _bars(pd.bdate_range('2025-07-16', '2025-07-31'), close=np.full(12, 50.0))
+    assert store.append(TICKER, later) == len(later)
+    series = store.load(TICKER)
+    assert len(series) == len(pd.bdate_range('2025-07-01', '2025-07-31'))
+    assert np.all(np.diff(series.day) > 0)
+    assert series.slice('2025-07-16', None).close.tolist() == [50.0] * 12
+
+    # Repetir o último pregão sem mudanças não regrava nada
+    assert store.append(TICKER, later.tail(1)) == 0
+
+
+def test_revise_last_session(store):
+    bars = _bars(pd.bdate_range('2025-07-01', '2025-07-31'))
+    store.append(TICKER, bars)
+    before = store.load(TICKER).close.copy()
+
+    # Barra parcial do último pregão corrigida e um pregão novo
+    revised = _bars(['2025-07-31', '2025-08-01'], close=[99.0, 100.0])
+    assert store.append(TICKER, revised) == 2
+    series = store.load(TICKER)
+    assert len(series) == len(bars) + 1
+    assert series.close[-2:].tolist() == [99.0, 100.0]
+    np.testing.assert_array_equal(series.close[:-2], before[:-1])
+
+
+def test_revise_keeps_stored_sessions_missing_from_update(store):
+    store.append(TICKER, _bars(['2025-07-01', '2025-07-02', '2025-07-03'], close=[1.0, 2.0, 3.0]))
+    assert store.append(TICKER, _bars(['2025-07-02'], close=[20.0])) == 2
+    assert store.load(TICKER).close.tolist() == [1.0, 20.0, 3.0]
+
+
+def test_interrupted_write_leftovers_are_ignored(store):
+    store.append(TICKER, _bars(pd.bdate_range('2025-07-01', '2025-07-10')))
+    # Sobras de uma gravação interrompida nas colunas que não são day.i32
+    with open(store._path(TICKER, 'close'), 'ab') as f:
+        f.write(np.array([123.0, 456.0]).tobytes())
+    assert len(store.load(TICKER)) == 8
+    store.append(TICKER, _bars(['2025-07-11'], close=[77.0]))
+    series = store.load(TICKER)
+    assert len(series) == 9 and series.close[-1] == 77.0
+
+
+def test_slice_is_zero_copy(store):
+    store.append(TICKER, _bars(pd.bdate_range('2025-01-01', '2025-12-31')))
+    series = store.load(TICKER)
+    assert isinstance(series.close, np.memmap)
+    part = series.slice('2025-03-01', '2025-03-31')
+    assert np.shares_memory(part.close, series.close)
+    assert part.dates.min() >= np.datetime64('2025-03-01') and part.dates.max() <= np.datetime64('2025-03-31')
+    assert len(part) == len(pd.bdate_range('2025-03-01', '2025-03-31'))
+
+
+def _with_store(collector, monkeypatch, store):
+    calls = []
+
+    def download(ticker, start, end, interval='1d'):
+        calls.append(pd.Timestamp(start))
+        bars = _bars(pd.bdate_range(start, end, inclusive='left')).set_index('Date')
+        bars.columns = pd.MultiIndex.from_product([bars.columns, [ticker]], names=['Price', 'Ticker'])
+        return bars
+
+    monkeypatch.setattr(collector, 'PriceStore', lambda: store)
+    monkeypatch.setattr(collector, '_download_prices', download)
+    return calls
+
+
+def test_download_refreshes_last_sessions(collector, monkeypatch, store):
+    sessions = pd.bdate_range('2025-07-01', '2025-07-31')
+    store.append(TICKER, _bars(sessions))
+    calls = _with_store(collector, monkeypatch, store)
+    collector._download_missing_prices(TICKER, datetime(2025, 7, 1), datetime(2025, 8, 8))
+    # Baixa de novo os dois últimos pregões gravados, não o período inteiro
+    assert calls == [sessions[-collector.STORE_REFRESH_SESSIONS]]
+    assert store.last_day(TICKER) == pd.Timestamp('2025-08-07')
+
+
+def test_download_skips_store_with_gaps(collector, monkeypatch, store):
+    sessions = pd.bdate_range('2025-07-01', '2025-07-31')
+    store.append(TICKER, _bars(sessions[(sessions < '2025-07-10') | (sessions > '2025-07-20')]))
+    calls = _with_store(collector, monkeypatch, store)
+    prices = collector._download_missing_prices(TICKER, datetime(2025, 7, 1), datetime(2025, 8, 1))
+    assert calls == [pd.Timestamp('2025-07-01')]
+    assert len(prices) == len(sessions)
@@ -0,0 +1,53 @@
+import numpy as np
+import pandas as pd
+
+import data_processor_newsapi_fixed as processor
+from newsapi_standin import synthetic_articles
+from processor_state import AggregateStore
+
+TICKER = 'PETR4.SA'
+PREFIX = 'Petrobras'
+
+
+def _write_raw(root):
+    """Grava notícias e preços acumulados como o coletor com --incremental; alguns pregões ficam sem notícias."""
+    import data_collector_newsapi_fixed as collector
+
+    sessions = pd.bdate_range('2025-07-01', '2025-07-31')
+    news_days = [day.date() for day in pd.date_range('2025-07-01', '2025-07-31') if day.day % 3]
+    articles = []
+    for day in news_days:
+        articles.extend(collector._parse_newsapi_articles({'articles': synthetic_articles(PREFIX, day, 4)}))
+    pd.DataFrame(articles, columns=collector.NEWS_COLUMNS).to_csv(
+        root / f"{PREFIX}_news_newsapi_fixed_incremental.csv", index=False)
+
+    close = 30 + np.cumsum(np.linspace(-0.5, 0.5, len(sessions)))
+    prices = pd.DataFrame({'Close': close, 'High': close + 1, 'Low': close - 1, 'Open': close, 'Volume': 1000},
+                          index=pd.DatetimeIndex(sessions, name='Date'))
+    prices.columns = pd.MultiIndex.from_product([prices.columns, [TICKER]], names=['Price', 'Ticker'])
+    prices.to_csv(root / f"{TICKER}_prices_incremental.csv")
+    return sessions, news_days
+
+
+def test_full_and_incremental_runs_match(tmp_path, monkeypatch):
+    sessions, news_days = _write_raw(tmp_path)
+    monkeypatch.setattr(processor, 'RAW_DATA_PATH', str(tmp_path))
+    monkeypatch.setattr(processor, 'write_dataset', lambda *args, **kwargs: None)
+
+    news_df = pd.read_csv(tmp_path / f"{PREFIX}_news_newsapi_fixed_incremental.csv")
+    stock_df = processor.load_stock_csv(tmp_path / f"{TICKER}_prices_incremental.csv")[['Date', 'Close']]
+    full = processor.build_final_dataset(news_df, stock_df).reset_index(drop=True)
+
+    store = AggregateStore(str(tmp_path / 'state.sqlite'))
+    incremental = processor.process_incremental(PREFIX, TICKER, store).reset_index(drop=True)
+
+    # Todos os pregões menos o primeiro (sem variação), inclusive os sem notícias
+    assert len(full) == len(sessions) - 1
+    no_news = ~full['date'].dt.date.isin(news_days)
+    assert no_news.any() and (full.loc[no_news, 'sentiment_score'] == 0).all()
+
+    assert list(full.columns) == list(incremental.columns)
+    pd.testing.assert_series_equal(full['date'], incremental['date'], check_dtype=False)
+    for column in ('Close', 'price_change', 'sentiment_score'):
+        np.testing.assert_allclose(full[column].to_numpy(dtype=float), incremental[column].to_numpy(dtype=float),
+                                   rtol=1e-9, atol=1e-12)
@@ -0,0 +1,67 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from score_cache import ScoreCache
+from sentiment_lexicon import KeywordLexicon
+
+TEXTS = pd.Series([
+    'Petrobras registra lucro e alta na produção',
+    'Greve paralisa refinaria e provoca queda nas ações',
+    'Conselho aprova novo plano de negócios',
+    'Petrobras registra lucro e alta na produção',
+    'Governo discute tarifa sobre importação de diesel',
+])
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return ScoreCache(str(tmp_path / 'scores.sqlite'))
+
+
+def _lexicon(positive=('lucro', 'alta', 'produção'), negative=('greve', 'queda', 'tarifa')):
+    return KeywordLexicon(list(positive), list(negative))
+
+
+def test_repeated_texts_are_scored_once(cache):
+    lexicon = _lexicon()
+    scores = cache.score_series(TEXTS, lexicon)
+    pd.testing.assert_series_equal(scores, lexicon.score_series(TEXTS))
+    assert (cache.last_hits, cache.last_misses) == (0, 5)
+    cache.score_series(TEXTS, lexicon)
+    assert (cache.last_hits, cache.last_misses) == (5, 0)
+
+
+def test_keyword_change_rescores_only_affected_texts(cache):
+    cache.score_series(TEXTS, _lexicon())
+
+    # 'tarifa' sai da lista negativa: só o último texto muda
+    lexicon = _lexicon(negative=('greve', 'queda'))
+    scores = cache.score_series(TEXTS, lexicon)
+    pd.testing.assert_series_equal(scores, lexicon.score_series(TEXTS))
+    assert cache.last_misses == 1
+
+    # 'refinaria' entra na lista positiva: só o segundo texto a contém
+    lexicon = _lexicon(positive=('lucro', 'alta', 'produção', 'refinaria'), negative=('greve', 'queda'))
+    scores = cache.score_series(TEXTS, lexicon)
+    pd.testing.assert_series_equal(scores, lexicon.score_series(TEXTS))
+    assert cache.last_misses == 1
+
+    # As entradas mantidas passaram para a versão atual
+    cache.score_series(TEXTS, lexicon)
+    assert cache.last_misses == 0
+    assert cache.conn.execute('SELECT DISTINCT lexicon FROM article_scores').fetchall() == [(lexicon.fingerprint,)]
+
+
+def test_store_evicts_least_recently_used(tmp_path):
+    cache = ScoreCache(str(tmp_path / 'scores.sqlite'), max_entries=10)
+    lexicon = _lexicon()
+    texts = pd.Series([f'lucro número {i}' for i in range(12)])
+    cache.score_series(texts[:6], lexicon)
+    cache.score_series(texts[:3], lexicon)  # Os três primeiros são usados de novo
+    cache.score_series(texts[6:], lexicon)
+    remaining = cache.conn.execute('SELECT COUNT(*) FROM article_scores').fetchone()[0]
+    assert remaining <= 10 and cache._count == remaining
+    cache.score_series(texts[:3], lexicon)
+    assert cache.last_hits == 3
+    np.testing.assert_allclose(cache.score_series(texts, lexicon), lexicon.score_series(texts))